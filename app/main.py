@@ -7,7 +7,8 @@ from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
-from app.db import Base, engine, get_db
+from app.db import engine, get_db
+from app.migrations import migrate
 from app.models import (
     Appraiser,
     AuditLog,
@@ -30,7 +31,7 @@ from app.schemas import (
 )
 
 app = FastAPI(title="Gold Loan Backend", version="v1")
-Base.metadata.create_all(bind=engine)
+migrate(engine)
 
 CRITICAL_POSTS = {
     "/auth/face-verify",
@@ -63,7 +64,7 @@ def audit(db: Session, tenant_id: str, action: str, entity_type: str, entity_id:
         action=action,
         entity_type=entity_type,
         entity_id=entity_id,
-        metadata=json.dumps(metadata or {}),
+        metadata_json=json.dumps(metadata or {}),
     )
     db.add(rec)
     db.commit()
@@ -241,7 +242,7 @@ def create_loan(
     db.commit()
     db.refresh(rec)
     audit(db, tenant_id, "CREATE_LOAN", "LOAN", rec.id)
-    response = ok({"loan_id": rec.id, "status": rec.status}, request_id)
+    response = ok({"loan_id": rec.id, "loan_number": rec.loan_number, "status": rec.status}, request_id)
     idempotency_store(db, tenant_id, endpoint, idempotency_key, body, response)
     return response
 
@@ -449,7 +450,7 @@ def get_audit(entity_type: str, entity_id: str, tenant_id: str = Depends(auth_gu
                 "action": r.action,
                 "entity_type": r.entity_type,
                 "entity_id": r.entity_id,
-                "metadata": json.loads(r.metadata),
+                "metadata": json.loads(r.metadata_json),
                 "created_at": r.created_at.isoformat(),
             }
             for r in rows
@@ -0,0 +1,42 @@
+from sqlalchemy.engine import Engine
+
+from app.db import Base
+
+# Schema versions for the SQLite service, tracked in PRAGMA user_version. A fresh
+# database gets the current models from the baseline, so every later step must check
+# before it alters anything.
+
+
+def _baseline(conn) -> None:
+    Base.metadata.create_all(bind=conn)
+
+
+def _loan_number(conn) -> None:
+    columns = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(loan)")}
+    if "loan_number" in columns:
+        return
+    conn.exec_driver_sql("ALTER TABLE loan ADD COLUMN loan_number VARCHAR")
+    conn.exec_driver_sql(
+        "UPDATE loan SET loan_number = 'GL-' || strftime('%Y%m%d', created_at) || '-' "
+        "|| upper(substr(replace(id, '-', ''), 1, 12)) WHERE loan_number IS NULL"
+    )
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS ix_loan_loan_number ON loan (loan_number)")
+
+
+MIGRATIONS = [(1, _baseline), (2, _loan_number)]
+LATEST = MIGRATIONS[-1][0]
+
+
+def migrate(engine: Engine) -> int:
+    # One PRAGMA read when the database is current; otherwise each pending step and
+    # its version bump commit together.
+    with engine.connect() as conn:
+        version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+    for target, step in MIGRATIONS:
+        if target <= version:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {target}")
+        version = target
+    return version
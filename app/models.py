@@ -29,10 +29,15 @@ class Customer(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
+def new_loan_number() -> str:
+    return f"GL-{datetime.utcnow():%Y%m%d}-{uuid.uuid4().hex[:12].upper()}"
+
+
 class Loan(Base):
     __tablename__ = "loan"
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     tenant_id: Mapped[str] = mapped_column(String, index=True)
+    loan_number: Mapped[str] = mapped_column(String, unique=True, default=new_loan_number)
     customer_id: Mapped[str] = mapped_column(String, ForeignKey("customer.id"))
     appraiser_id: Mapped[str] = mapped_column(String, ForeignKey("appraiser.id"))
     bank_id: Mapped[str] = mapped_column(String)
@@ -89,7 +94,8 @@ class AuditLog(Base):
     action: Mapped[str] = mapped_column(String)
     entity_type: Mapped[str] = mapped_column(String)
     entity_id: Mapped[str] = mapped_column(String)
-    metadata: Mapped[str] = mapped_column(Text, default="{}")
+    # "metadata" is reserved on declarative models; the column keeps its name.
+    metadata_json: Mapped[str] = mapped_column("metadata", Text, default="{}")
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
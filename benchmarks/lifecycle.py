@@ -0,0 +1,216 @@
+# End-to-end loan lifecycle load test for both services:
+#
+#   appraiser -> customer -> loan -> upload URLs -> compliance -> purity -> summary -> complete
+#
+# Each worker runs whole lifecycles back to back; a share of idempotent POSTs is
+# replayed with the same Idempotency-Key and must return the same data. Reports
+# p50/p95/p99 per endpoint plus throughput, writes them as JSON, and exits 1 when
+# a baseline file shows a regression beyond --threshold.
+#
+#   python -m benchmarks.lifecycle --target sqlite --spawn --lifecycles 500 --concurrency 16
+#   python -m benchmarks.lifecycle --target postgres --base-url http://127.0.0.1:8000 \
+#       --tenant-id <uuid> --bank-id <uuid> --branch-id <uuid> \
+#       --out results.json --baseline baseline.json --threshold 0.15
+#
+# The Postgres service keeps foreign keys to reference data, so its bank and branch
+# rows must exist; the SQLite app takes any ids.
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+from benchmarks.targets import TARGETS
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVICE_DIRS = {"sqlite": ROOT, "postgres": ROOT / "gold-loan-backend"}
+HEADERS = {"Authorization": "Bearer bench", "Content-Type": "application/json"}
+
+
+class StepFailed(Exception):
+    pass
+
+
+class Runner:
+    def __init__(self, client: httpx.AsyncClient, tenant_id: str, retry_rate: float, seed: int = 0):
+        self.client = client
+        self.headers = HEADERS | {"X-Tenant-ID": tenant_id}
+        self.retry_rate = retry_rate
+        self.random = random.Random(seed)
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    def _record(self, name: str, elapsed: float, ok: bool) -> None:
+        self.samples.setdefault(name, []).append(elapsed)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    async def _send(self, name: str, method: str, path: str, headers: dict, body: dict | None):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, f"/api/v1{path}", headers=headers, json=body)
+        except httpx.HTTPError:
+            self._record(name, time.perf_counter() - started, False)
+            raise StepFailed(name)
+        ok = response.status_code < 400
+        self._record(name, time.perf_counter() - started, ok)
+        if not ok:
+            raise StepFailed(f"{name}: {response.status_code} {response.text[:200]}")
+        return response
+
+    async def call(self, name: str, method: str, path: str, json: dict | None = None):
+        headers = self.headers
+        if method == "POST":
+            headers = headers | {"Idempotency-Key": str(uuid.uuid4())}
+        response = await self._send(name, method, path, headers, json)
+        data = response.json()["data"] if response.headers.get("content-type", "").startswith("application/json") else None
+        if method == "POST" and self.random.random() < self.retry_rate:
+            # A client retry after a lost response: same key, same body, same result.
+            replay = await self._send(f"{name} (retry)", method, path, headers, json)
+            if replay.json()["data"] != data:
+                self._record(f"{name} (retry)", 0.0, False)
+                raise StepFailed(f"{name}: replay returned different data")
+        return data
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def run(client: httpx.AsyncClient, target: str, lifecycles: int, concurrency: int,
+              jewels: int = 3, retry_rate: float = 0.1, seed: int = 0, refs: dict | None = None) -> dict:
+    refs = refs or {}
+    runner = Runner(client, refs.get("tenant_id") or str(uuid.uuid4()), retry_rate, seed)
+    refs = {name: refs.get(name) or str(uuid.uuid4()) for name in ("bank_id", "branch_id")}
+    lifecycle = TARGETS[target]
+    remaining = iter(range(lifecycles))
+    failed = 0
+
+    async def worker():
+        nonlocal failed
+        for _ in remaining:
+            try:
+                await lifecycle(runner.call, jewels, refs)
+            except StepFailed:
+                failed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    requests = sum(len(samples) for samples in runner.samples.values())
+    return {
+        "target": target,
+        "lifecycles": lifecycles,
+        "concurrency": concurrency,
+        "jewels": jewels,
+        "retry_rate": retry_rate,
+        "elapsed_s": elapsed,
+        "lifecycles_per_s": (lifecycles - failed) / elapsed,
+        "requests_per_s": requests / elapsed,
+        "failed_lifecycles": failed,
+        "endpoints": {
+            name: {
+                "count": len(samples),
+                "errors": runner.errors.get(name, 0),
+                "p50_ms": percentile(samples, 0.50) * 1000,
+                "p95_ms": percentile(samples, 0.95) * 1000,
+                "p99_ms": percentile(samples, 0.99) * 1000,
+            }
+            for name, samples in sorted(runner.samples.items())
+        },
+    }
+
+
+def regressions(result: dict, baseline: dict, threshold: float) -> list[str]:
+    # Throughput may not drop, and no endpoint's p95 may rise, by more than threshold.
+    found = []
+    if result["lifecycles_per_s"] < baseline["lifecycles_per_s"] * (1 - threshold):
+        found.append(f"throughput {result['lifecycles_per_s']:.1f}/s vs baseline {baseline['lifecycles_per_s']:.1f}/s")
+    for name, stats in result["endpoints"].items():
+        base = baseline["endpoints"].get(name)
+        if base and stats["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            found.append(f"{name} p95 {stats['p95_ms']:.1f} ms vs baseline {base['p95_ms']:.1f} ms")
+    return found
+
+
+def report(result: dict) -> None:
+    print(f"{result['target']}: {result['lifecycles_per_s']:.1f} lifecycles/s, {result['requests_per_s']:.1f} req/s, "
+          f"{result['failed_lifecycles']} failed of {result['lifecycles']}")
+    for name, stats in result["endpoints"].items():
+        print(f"  {name:<44} n={stats['count']:<6} p50 {stats['p50_ms']:7.1f}  p95 {stats['p95_ms']:7.1f}  "
+              f"p99 {stats['p99_ms']:7.1f} ms  errors {stats['errors']}")
+
+
+def _serve(target: str, port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=SERVICE_DIRS[target],
+        env=os.environ.copy(),
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs")
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+async def _run_http(base_url: str, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        refs = {"tenant_id": args.tenant_id, "bank_id": args.bank_id, "branch_id": args.branch_id}
+        return await run(client, args.target, args.lifecycles, args.concurrency, args.jewels, args.retry_rate, args.seed, refs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", choices=sorted(TARGETS), required=True)
+    parser.add_argument("--base-url", default=None, help="running service; omit with --spawn")
+    parser.add_argument("--spawn", action="store_true", help="start uvicorn for the target on --port")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--lifecycles", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--jewels", type=int, default=3)
+    parser.add_argument("--retry-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tenant-id", default=None, help="default: a new tenant per run")
+    parser.add_argument("--bank-id", default=None, help="existing bank row (postgres target)")
+    parser.add_argument("--branch-id", default=None, help="existing branch row of that bank (postgres target)")
+    parser.add_argument("--out", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    if not args.spawn and not args.base_url:
+        parser.error("pass --base-url or --spawn")
+
+    proc = _serve(args.target, args.port) if args.spawn else None
+    try:
+        result = asyncio.run(_run_http(args.base_url or f"http://127.0.0.1:{args.port}", args))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+    report(result)
+    if args.out:
+        args.out.write_text(json.dumps(result, indent=2))
+    if args.baseline:
+        found = regressions(result, json.loads(args.baseline.read_text()), args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
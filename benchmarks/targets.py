@@ -0,0 +1,85 @@
+import uuid
+
+# One full loan lifecycle per service. `call` is Runner.call: it times the request
+# under the given endpoint name, may replay it with the same Idempotency-Key, and
+# returns the response's `data`. `refs` holds the bank_id and branch_id loans are
+# filed under; the Postgres service requires both rows to exist.
+
+
+def _appraiser(refs: dict) -> dict:
+    suffix = uuid.uuid4().hex[:12]
+    return {
+        "name": "Bench Appraiser",
+        "email": f"bench-{suffix}@example.com",
+        "phone": "9000000000",
+        "branch_id": refs["branch_id"],
+        "appraiser_code": f"BENCH-{suffix}",
+        "face_image_id": str(uuid.uuid4()),
+    }
+
+
+def _customer() -> dict:
+    return {"customer_code": f"BENCH-{uuid.uuid4().hex[:12]}", "name": "Bench Customer", "face_image_id": str(uuid.uuid4())}
+
+
+def _compliance(image_ids: list[str]) -> dict:
+    return {
+        "total_jewel_count": len(image_ids) - 1,
+        "overall_image_id": image_ids[0],
+        "jewel_images": [{"index": i, "image_id": image_id} for i, image_id in enumerate(image_ids[1:], start=1)],
+    }
+
+
+async def sqlite_lifecycle(call, jewels: int, refs: dict) -> None:
+    # app/: single upload URLs, purity scored inline, summary generated before completion.
+    appraiser = await call("POST /appraisers", "POST", "/appraisers", json=_appraiser(refs))
+    customer = await call("POST /customers", "POST", "/customers", json=_customer())
+    loan = await call("POST /loans", "POST", "/loans", json={
+        "customer_id": customer["customer_id"],
+        "appraiser_id": appraiser["appraiser_id"],
+        "bank_id": refs["bank_id"],
+        "branch_id": refs["branch_id"],
+    })
+    loan_id = loan["loan_id"]
+    image_ids = []
+    for image_type in ["OVERALL"] + ["JEWEL"] * jewels:
+        image = await call("POST /images/upload-url", "POST", "/images/upload-url",
+                           json={"image_type": image_type, "loan_id": loan_id})
+        image_ids.append(image["image_id"])
+    await call("POST /loans/{loan_id}/compliance", "POST", f"/loans/{loan_id}/compliance", json=_compliance(image_ids))
+    await call("POST /loans/{loan_id}/purity-test", "POST", f"/loans/{loan_id}/purity-test")
+    await call("GET /loans/{loan_id}/purity-test", "GET", f"/loans/{loan_id}/purity-test")
+    await call("POST /loans/{loan_id}/summary", "POST", f"/loans/{loan_id}/summary")
+    await call("POST /loans/{loan_id}/complete", "POST", f"/loans/{loan_id}/complete")
+    await call("GET /loans/{loan_id}", "GET", f"/loans/{loan_id}")
+
+
+async def postgres_lifecycle(call, jewels: int, refs: dict) -> None:
+    # gold-loan-backend: batched upload URLs, purity queued as a job, summary
+    # materialized by completion and read back afterwards.
+    appraiser = await call("POST /appraisers", "POST", "/appraisers", json=_appraiser(refs))
+    customer = await call("POST /customers", "POST", "/customers", json=_customer())
+    loan = await call("POST /loans", "POST", "/loans", json={
+        "customer_id": customer["customer_id"],
+        "appraiser_id": appraiser["appraiser_id"],
+        "bank_id": refs["bank_id"],
+        "branch_id": refs["branch_id"],
+    })
+    loan_id = loan["loan_id"]
+    images = await call("POST /images/upload-urls", "POST", "/images/upload-urls", json={
+        "loan_id": loan_id,
+        "images": [
+            {"image_type": image_type, "mime_type": "image/jpeg", "file_size": 250_000}
+            for image_type in ["OVERALL"] + ["JEWEL"] * jewels
+        ],
+    })
+    image_ids = [image["image_id"] for image in images]
+    await call("POST /loans/{loan_id}/compliance", "POST", f"/loans/{loan_id}/compliance", json=_compliance(image_ids))
+    job = await call("POST /loans/{loan_id}/purity-test", "POST", f"/loans/{loan_id}/purity-test")
+    await call("GET /purity-jobs/{job_id}", "GET", f"/purity-jobs/{job['job_id']}")
+    await call("POST /loans/{loan_id}/complete", "POST", f"/loans/{loan_id}/complete")
+    await call("GET /loans/{loan_id}/summary", "GET", f"/loans/{loan_id}/summary")
+    await call("GET /loans/{loan_id}", "GET", f"/loans/{loan_id}")
+
+
+TARGETS = {"sqlite": sqlite_lifecycle, "postgres": postgres_lifecycle}
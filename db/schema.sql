@@ -1,3 +1,6 @@
+-- Current schema, for reference. Databases are created and upgraded by the versioned
+-- files in gold-loan-backend/migrations (python -m app.core.migrations), never from this file.
+
 -- Control plane: tenant registry only (no customer/loan data)
 CREATE TABLE IF NOT EXISTS tenant (
   id UUID PRIMARY KEY,
@@ -64,6 +67,11 @@ CREATE TABLE IF NOT EXISTS appraiser (
   tenant_id UUID NOT NULL,
   user_id UUID REFERENCES user_account(id),
   appraiser_code VARCHAR(50) UNIQUE,
+  name VARCHAR(255),
+  email VARCHAR(255),
+  phone VARCHAR(20),
+  branch_id UUID REFERENCES branch(id),
+  status VARCHAR(20) DEFAULT 'ACTIVE',
   face_image_id UUID,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -91,8 +99,16 @@ CREATE TABLE IF NOT EXISTS loan (
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   completed_at TIMESTAMP
 );
-CREATE INDEX IF NOT EXISTS idx_loan_tenant ON loan(tenant_id);
-CREATE INDEX IF NOT EXISTS idx_loan_status ON loan(status);
+-- Keyset listing (GET /loans): newest first per tenant, optionally per branch; index-only via INCLUDE
+DROP INDEX IF EXISTS idx_loan_tenant;
+DROP INDEX IF EXISTS idx_loan_status;
+CREATE INDEX IF NOT EXISTS idx_loan_tenant_created ON loan(tenant_id, created_at, id)
+  INCLUDE (status, branch_id, appraiser_id, customer_id, completed_at);
+CREATE INDEX IF NOT EXISTS idx_loan_branch_created ON loan(tenant_id, branch_id, created_at, id)
+  INCLUDE (status, appraiser_id, customer_id, completed_at);
+-- Regulatory export (GET /exports/loans): completed loans by completion time
+CREATE INDEX IF NOT EXISTS idx_loan_tenant_completed ON loan(tenant_id, completed_at, id)
+  WHERE status = 'COMPLETED';
 
 CREATE TABLE IF NOT EXISTS rbi_compliance (
   id UUID PRIMARY KEY,
@@ -103,6 +119,7 @@ CREATE TABLE IF NOT EXISTS rbi_compliance (
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 CREATE INDEX IF NOT EXISTS idx_compliance_tenant ON rbi_compliance(tenant_id);
+CREATE INDEX IF NOT EXISTS idx_compliance_loan ON rbi_compliance(tenant_id, loan_id, created_at);
 
 CREATE TABLE IF NOT EXISTS rbi_compliance_item (
   id UUID PRIMARY KEY,
@@ -112,6 +129,7 @@ CREATE TABLE IF NOT EXISTS rbi_compliance_item (
   jewel_image_id UUID NOT NULL
 );
 CREATE INDEX IF NOT EXISTS idx_compliance_item_tenant ON rbi_compliance_item(tenant_id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_compliance_item_jewel ON rbi_compliance_item(compliance_id, jewel_index);
 
 CREATE TABLE IF NOT EXISTS purity_test (
   id UUID PRIMARY KEY,
@@ -127,6 +145,25 @@ CREATE TABLE IF NOT EXISTS purity_test (
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 CREATE INDEX IF NOT EXISTS idx_purity_tenant ON purity_test(tenant_id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_purity_test_jewel ON purity_test(tenant_id, loan_id, jewel_index);
+
+CREATE TABLE IF NOT EXISTS purity_job (
+  id UUID PRIMARY KEY,
+  tenant_id UUID NOT NULL,
+  loan_id UUID REFERENCES loan(id),
+  jewel_count INTEGER NOT NULL,
+  status VARCHAR(20) NOT NULL DEFAULT 'QUEUED' CHECK (status IN ('QUEUED','PROCESSING','COMPLETED','FAILED')),
+  attempts INTEGER NOT NULL DEFAULT 0,
+  error TEXT,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  started_at TIMESTAMP,
+  finished_at TIMESTAMP
+);
+-- Workers claim with FOR UPDATE SKIP LOCKED in created_at order
+CREATE INDEX IF NOT EXISTS idx_purity_job_claim ON purity_job(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_purity_job_loan ON purity_job(tenant_id, loan_id);
+-- At most one live job per loan
+CREATE UNIQUE INDEX IF NOT EXISTS uq_purity_job_active ON purity_job(tenant_id, loan_id) WHERE status <> 'FAILED';
 
 CREATE TABLE IF NOT EXISTS image (
   id UUID PRIMARY KEY,
@@ -137,9 +174,12 @@ CREATE TABLE IF NOT EXISTS image (
   file_size BIGINT,
   mime_type VARCHAR(100),
   image_type VARCHAR(30) CHECK (image_type IN ('APPRAISER_FACE','CUSTOMER_FACE','JEWEL','OVERALL')),
-  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  verified_at TIMESTAMP
 );
 CREATE INDEX IF NOT EXISTS idx_image_tenant ON image(tenant_id);
+-- Content-addressed dedupe of uploads: only objects whose hash the server has verified are reused
+CREATE INDEX IF NOT EXISTS idx_image_content ON image(tenant_id, file_hash, file_size) WHERE verified_at IS NOT NULL;
 
 CREATE TABLE IF NOT EXISTS loan_summary (
   id UUID PRIMARY KEY,
@@ -160,7 +200,9 @@ CREATE TABLE IF NOT EXISTS audit_log (
   metadata JSONB,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
-CREATE INDEX IF NOT EXISTS idx_audit_tenant ON audit_log(tenant_id);
+DROP INDEX IF EXISTS idx_audit_tenant;
+CREATE INDEX IF NOT EXISTS idx_audit_entity ON audit_log(tenant_id, entity_type, entity_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_audit_tenant_created ON audit_log(tenant_id, created_at, id);
 
 -- Idempotency storage
 CREATE TABLE IF NOT EXISTS idempotency_record (
@@ -168,12 +210,16 @@ CREATE TABLE IF NOT EXISTS idempotency_record (
   tenant_id UUID NOT NULL,
   key VARCHAR(255) NOT NULL,
   endpoint VARCHAR(255) NOT NULL,
-  response_hash VARCHAR(255) NOT NULL,
-  response_payload JSONB NOT NULL,
+  request_hash VARCHAR(255) NOT NULL,
+  status_code SMALLINT NOT NULL DEFAULT 200,
+  response_body BYTEA, -- exact response bytes; NULL while the first request with this key is in flight
+  content_encoding VARCHAR(16), -- 'gzip' for large bodies
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  expires_at TIMESTAMP NOT NULL,
   UNIQUE (tenant_id, key, endpoint)
 );
 CREATE INDEX IF NOT EXISTS idx_idempotency_tenant ON idempotency_record(tenant_id);
+CREATE INDEX IF NOT EXISTS idx_idempotency_expires ON idempotency_record(expires_at);
 
 -- Enforce immutable completed loans
 CREATE OR REPLACE FUNCTION prevent_completed_loan_update()
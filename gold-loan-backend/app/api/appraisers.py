@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, Header, HTTPException
 from sqlalchemy.orm import Session
 from app.config.security import auth_headers
-from app.core.database import get_db
+from app.core.database import get_db, run_db
 from app.core.exceptions import success
 from app.core.idempotency import get_cached, store_response
 from app.schemas.appraiser_schema import CreateAppraiserRequest
@@ -13,22 +13,26 @@ service = AppraiserService()
 audit = AuditService()
 
 @router.post('')
-def create(payload: CreateAppraiserRequest, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db), idempotency_key: str = Header(..., alias='Idempotency-Key')):
+async def create(payload: CreateAppraiserRequest, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db), idempotency_key: str = Header(..., alias='Idempotency-Key')):
+    return await run_db(db, _create, ctx['tenant_id'], payload.model_dump(), idempotency_key)
+
+def _create(db: Session, tenant_id: str, body: dict, idempotency_key: str):
     endpoint = '/appraisers'
-    body = payload.model_dump()
     try:
-        cached = get_cached(db, ctx['tenant_id'], idempotency_key, endpoint, body)
+        cached = get_cached(db, tenant_id, idempotency_key, endpoint, body)
     except ValueError as ex:
         raise HTTPException(status_code=409, detail=str(ex))
     if cached:
         return cached
-    rec = service.create(db, ctx['tenant_id'], body)
-    audit.log(db, ctx['tenant_id'], 'CREATE_APPRAISER', 'APPRAISER', rec.id)
+    rec = service.create(db, tenant_id, body)
+    audit.log(db, tenant_id, 'CREATE_APPRAISER', 'APPRAISER', rec.id)
     resp = success({'appraiser_id': rec.id, 'status': rec.status})
-    store_response(db, ctx['tenant_id'], idempotency_key, endpoint, body, resp)
-    return resp
+    return store_response(db, tenant_id, idempotency_key, endpoint, body, resp)
 
 @router.get('')
-def list_appraisers(ctx: dict = Depends(auth_headers), db: Session = Depends(get_db)):
-    rows = service.list(db, ctx['tenant_id'])
+async def list_appraisers(ctx: dict = Depends(auth_headers), db: Session = Depends(get_db)):
+    return await run_db(db, _list_appraisers, ctx['tenant_id'])
+
+def _list_appraisers(db: Session, tenant_id: str):
+    rows = service.list(db, tenant_id)
     return success([{'id': r.id, 'name': r.name, 'branch_id': r.branch_id, 'status': r.status} for r in rows])
@@ -1,13 +1,34 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.config.security import auth_headers
-from app.core.database import get_db
+from app.core.database import get_db, run_db
 from app.core.exceptions import success
+from app.core.timing import outside_budget
 from app.services.audit_service import AuditService
+from app.schemas.common import Id
 
 router = APIRouter(prefix='/audit', tags=['Audit'])
 service = AuditService()
 
+def audit_filters(
+    entity_type: str | None = None,
+    entity_id: Id | None = None,
+    action: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> dict:
+    return {'entity_type': entity_type, 'entity_id': entity_id, 'action': action, 'since': since, 'until': until}
+
 @router.get('')
-def get_logs(entity_type: str, entity_id: str, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db)):
-    return success(service.list(db, ctx['tenant_id'], entity_type, entity_id))
+async def get_logs(response: Response, filters: dict = Depends(audit_filters), cursor: str | None = None, limit: int = Query(100, ge=1, le=1000), ctx: dict = Depends(auth_headers), db: Session = Depends(get_db)):
+    items, next_cursor = await run_db(db, service.list, ctx['tenant_id'], filters, cursor, limit)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return success(items)
+
+@router.get('/stream')
+# Sync on purpose: the NDJSON generator is iterated in the threadpool on its own sync session.
+def stream_logs(filters: dict = Depends(audit_filters), cursor: str | None = None, ctx: dict = Depends(auth_headers)):
+    return StreamingResponse(outside_budget(service.stream(ctx['tenant_id'], filters, cursor)), media_type='application/x-ndjson')
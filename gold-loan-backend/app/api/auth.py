@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, Header, HTTPException
 from sqlalchemy.orm import Session
 from app.config.security import auth_headers
-from app.core.database import get_db
+from app.core.database import get_db, run_db
 from app.core.idempotency import get_cached, store_response
 from app.core.exceptions import success
 from app.schemas.auth_schema import LoginRequest, FaceVerifyRequest
@@ -11,24 +11,25 @@ router = APIRouter(prefix='/auth', tags=['Auth'])
 service = AuthService()
 
 @router.post('/login')
-def login(payload: LoginRequest):
+async def login(payload: LoginRequest):
     return success(service.login())
 
 @router.post('/face-verify')
-def face_verify(
+async def face_verify(
     payload: FaceVerifyRequest,
     ctx: dict = Depends(auth_headers),
     db: Session = Depends(get_db),
     idempotency_key: str = Header(..., alias='Idempotency-Key'),
 ):
+    return await run_db(db, _face_verify, ctx['tenant_id'], payload.model_dump(), idempotency_key)
+
+def _face_verify(db: Session, tenant_id: str, body: dict, idempotency_key: str):
     endpoint = '/auth/face-verify'
-    body = payload.model_dump()
     try:
-        cached = get_cached(db, ctx['tenant_id'], idempotency_key, endpoint, body)
+        cached = get_cached(db, tenant_id, idempotency_key, endpoint, body)
     except ValueError as ex:
         raise HTTPException(status_code=409, detail=str(ex))
     if cached:
         return cached
     resp = success(service.face_verify())
-    store_response(db, ctx['tenant_id'], idempotency_key, endpoint, body, resp)
-    return resp
+    return store_response(db, tenant_id, idempotency_key, endpoint, body, resp)
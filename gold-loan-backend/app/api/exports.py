@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import Literal
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from app.config.security import auth_headers
+from app.core.timing import outside_budget
+from app.services.export_service import ExportService
+
+router = APIRouter(prefix='/exports', tags=['Exports'])
+service = ExportService()
+
+MEDIA_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+@router.get('/loans')
+# Sync on purpose: the export generator is iterated in the threadpool on its own sync session.
+def export_loans(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    fmt: Literal['ndjson', 'csv'] = Query('ndjson', alias='format'),
+    cursor: str | None = None,
+    ctx: dict = Depends(auth_headers),
+):
+    body = service.stream_loans(ctx['tenant_id'], {'since': since, 'until': until}, cursor, fmt)
+    return StreamingResponse(outside_budget(body), media_type=MEDIA_TYPES[fmt])
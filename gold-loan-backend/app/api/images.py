@@ -1,25 +1,59 @@
 from fastapi import APIRouter, Depends, Header, HTTPException
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.config.security import auth_headers
-from app.core.database import get_db
+from app.core.database import get_db, run_db
 from app.core.exceptions import success
 from app.core.idempotency import get_cached, store_response
-from app.schemas.image_schema import UploadUrlRequest
+from app.schemas.image_schema import UploadUrlRequest, UploadUrlsRequest
 from app.services.image_service import ImageService
+from app.schemas.common import Id
 
 router = APIRouter(prefix='/images', tags=['Images'])
 service = ImageService()
 
 @router.post('/upload-url')
-def upload_url(payload: UploadUrlRequest, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db), idempotency_key: str = Header(..., alias='Idempotency-Key')):
+async def upload_url(payload: UploadUrlRequest, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db), idempotency_key: str = Header(..., alias='Idempotency-Key')):
+    return await run_db(db, _upload_url, ctx['tenant_id'], payload.model_dump(), idempotency_key)
+
+def _upload_url(db: Session, tenant_id: str, body: dict, idempotency_key: str):
     endpoint = '/images/upload-url'
-    body = payload.model_dump()
     try:
-        cached = get_cached(db, ctx['tenant_id'], idempotency_key, endpoint, body)
+        cached = get_cached(db, tenant_id, idempotency_key, endpoint, body)
+    except ValueError as ex:
+        raise HTTPException(status_code=409, detail=str(ex))
+    if cached:
+        return cached
+    resp = success(service.upload_url(db, tenant_id, body))
+    return store_response(db, tenant_id, idempotency_key, endpoint, body, resp)
+
+@router.post('/upload-urls')
+async def upload_urls(payload: UploadUrlsRequest, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db), idempotency_key: str = Header(..., alias='Idempotency-Key')):
+    return await run_db(db, _upload_urls, ctx['tenant_id'], payload.model_dump(), idempotency_key)
+
+def _upload_urls(db: Session, tenant_id: str, body: dict, idempotency_key: str):
+    # One round trip, one idempotency record and one INSERT for every image of a loan.
+    endpoint = '/images/upload-urls'
+    try:
+        cached = get_cached(db, tenant_id, idempotency_key, endpoint, body)
     except ValueError as ex:
         raise HTTPException(status_code=409, detail=str(ex))
     if cached:
         return cached
-    resp = success(service.upload_url())
-    store_response(db, ctx['tenant_id'], idempotency_key, endpoint, body, resp)
-    return resp
+    resp = success(service.upload_urls(db, tenant_id, body))
+    return store_response(db, tenant_id, idempotency_key, endpoint, body, resp)
+
+@router.post('/{image_id}/verify')
+async def verify(image_id: Id, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db)):
+    image = await run_db(db, _get_and_release, ctx['tenant_id'], image_id)
+    if image.verified_at:
+        return success({'image_id': image.id, 'file_hash': image.file_hash, 'file_size': image.file_size, 'verified': True})
+    file_hash, file_size = await run_in_threadpool(service.hash_object, image.s3_key)
+    return success(await run_db(db, service.mark_verified, ctx['tenant_id'], image, file_hash, file_size))
+
+def _get_and_release(db: Session, tenant_id: str, image_id: str):
+    # The read transaction ends here, so the pooled connection is not held while the object
+    # is downloaded and hashed; mark_verified starts a new one.
+    image = service.get(db, tenant_id, image_id)
+    db.commit()
+    return image
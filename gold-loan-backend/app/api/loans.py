@@ -1,51 +1,141 @@
-from fastapi import APIRouter, Depends, Header, HTTPException
+from datetime import datetime
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy.exc import DataError, IntegrityError
 from sqlalchemy.orm import Session
 from app.config.security import auth_headers
-from app.core.database import get_db
-from app.core.exceptions import success
-from app.core.idempotency import get_cached, store_response
-from app.schemas.loan_schema import CreateLoanRequest
+from app.core.database import get_db, run_db, savepoint
+from app.core.exceptions import missing_reference, success
+from app.core.idempotency import IdempotencyInProgress, get_cached, get_cached_many, load_many, store_many, store_response
+from app.schemas.loan_schema import BatchCreateLoansRequest, CreateLoanRequest
 from app.services.loan_service import LoanService
 from app.services.audit_service import AuditService
+from app.schemas.common import Id
 
 router = APIRouter(prefix='/loans', tags=['Loans'])
 service = LoanService()
 audit = AuditService()
 
 @router.post('')
-def create(payload: CreateLoanRequest, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db), idempotency_key: str = Header(..., alias='Idempotency-Key')):
+async def create(payload: CreateLoanRequest, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db), idempotency_key: str = Header(..., alias='Idempotency-Key')):
+    return await run_db(db, _create, ctx['tenant_id'], payload.model_dump(), idempotency_key)
+
+def _create(db: Session, tenant_id: str, body: dict, idempotency_key: str):
     endpoint = '/loans'
-    body = payload.model_dump()
     try:
-        cached = get_cached(db, ctx['tenant_id'], idempotency_key, endpoint, body)
+        cached = get_cached(db, tenant_id, idempotency_key, endpoint, body)
     except ValueError as ex:
         raise HTTPException(status_code=409, detail=str(ex))
     if cached:
         return cached
-    rec = service.create(db, ctx['tenant_id'], body)
-    audit.log(db, ctx['tenant_id'], 'CREATE_LOAN', 'LOAN', rec.id)
-    resp = success({'loan_id': rec.id, 'status': rec.status})
-    store_response(db, ctx['tenant_id'], idempotency_key, endpoint, body, resp)
-    return resp
+    rec = service.create(db, tenant_id, body)
+    audit.log(db, tenant_id, 'CREATE_LOAN', 'LOAN', rec.id)
+    resp = success({'loan_id': rec.id, 'loan_number': rec.loan_number, 'status': rec.status})
+    return store_response(db, tenant_id, idempotency_key, endpoint, body, resp)
+
+@router.post(':batch')
+async def create_batch(payload: BatchCreateLoansRequest, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db)):
+    return await run_db(db, _create_batch, ctx['tenant_id'], payload.model_dump())
+
+def _create_batch(db: Session, tenant_id: str, body: dict):
+    # Branch offline sync. Each item is the body of a POST /loans under its own key and
+    # shares that endpoint's idempotency records, so items can be retried either way.
+    # One transaction; an item whose key is held elsewhere, or whose row the database
+    # rejects, fails alone.
+    endpoint = '/loans'
+    keys, payloads = [], {}
+    for item in body['loans']:
+        key = item.pop('idempotency_key')
+        keys.append(key)
+        payloads.setdefault(key, item)
+    outcomes = get_cached_many(db, tenant_id, endpoint, payloads)
+    rows = {key: service.repo.new_row(tenant_id, payload) for key, payload in payloads.items() if key not in outcomes}
+    if rows:
+        try:
+            with savepoint(db):
+                created = _store_batch(db, tenant_id, endpoint, payloads, rows)
+        except (IdempotencyInProgress, IntegrityError, DataError):
+            # Rare: redo item by item, each under its own savepoint, to find the ones that fail.
+            created = {}
+            for key, row in rows.items():
+                try:
+                    with savepoint(db):
+                        created |= _store_batch(db, tenant_id, endpoint, payloads, {key: row})
+                except (IdempotencyInProgress, IntegrityError, DataError) as ex:
+                    outcomes[key] = ex
+        audit.log_many(db, tenant_id, 'CREATE_LOAN', 'LOAN', [rows[key]['id'] for key in rows if key in created])
+        outcomes |= created
+        # Lost to a concurrent request with the same key, which has committed by now.
+        lost = {key: payloads[key] for key in rows if key not in created and key not in outcomes}
+        if lost:
+            outcomes |= load_many(db, tenant_id, endpoint, lost)
+    results, seen = [], set()
+    for key in keys:
+        outcome = outcomes.get(key)
+        if key in seen:
+            outcome = ValueError('Idempotency-Key repeated in batch')
+        seen.add(key)
+        if isinstance(outcome, Response):
+            results.append({'idempotency_key': key, 'status_code': outcome.status_code, 'data': orjson.loads(outcome.body)['data']})
+        elif isinstance(outcome, (IntegrityError, DataError)):
+            # Nothing was stored for this item, so it can be retried under the same key.
+            status_code = 409 if isinstance(outcome, IntegrityError) and not missing_reference(outcome) else 422
+            results.append({'idempotency_key': key, 'status_code': status_code,
+                            'error': f'Loan rejected by the database ({type(outcome.orig).__name__})'})
+        else:
+            message = str(outcome) if outcome is not None else 'Request with this Idempotency-Key is still in progress'
+            results.append({'idempotency_key': key, 'status_code': 409, 'error': message})
+    return success(results)
+
+def _store_batch(db: Session, tenant_id: str, endpoint: str, payloads: dict, rows: dict) -> dict:
+    created = store_many(db, tenant_id, endpoint, {
+        key: (payloads[key], success({'loan_id': row['id'], 'loan_number': row['loan_number'], 'status': row['status']}))
+        for key, row in rows.items()
+    })
+    if not created:
+        return created
+    service.create_many(db, tenant_id, [rows[key] for key in rows if key in created])
+    return created
+
+def loan_filters(
+    status: str | None = None,
+    branch_id: Id | None = None,
+    appraiser_id: Id | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> dict:
+    return {'status': status, 'branch_id': branch_id, 'appraiser_id': appraiser_id, 'since': since, 'until': until}
+
+@router.get('')
+async def list_loans(response: Response, filters: dict = Depends(loan_filters), cursor: str | None = None, limit: int = Query(50, ge=1, le=500), ctx: dict = Depends(auth_headers), db: Session = Depends(get_db)):
+    items, next_cursor = await run_db(db, service.list, ctx['tenant_id'], filters, cursor, limit)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return success(items)
 
 @router.get('/{loan_id}')
-def get_loan(loan_id: str, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db)):
-    loan = service.get(db, ctx['tenant_id'], loan_id)
+async def get_loan(loan_id: Id, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db)):
+    return await run_db(db, _get_loan, ctx['tenant_id'], loan_id)
+
+def _get_loan(db: Session, tenant_id: str, loan_id: str):
+    loan = service.get(db, tenant_id, loan_id)
     return success({'loan_id': loan.id, 'status': loan.status, 'customer_id': loan.customer_id})
 
 @router.post('/{loan_id}/complete')
-def complete(loan_id: str, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db), idempotency_key: str = Header(..., alias='Idempotency-Key')):
+async def complete(loan_id: Id, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db), idempotency_key: str = Header(..., alias='Idempotency-Key')):
+    return await run_db(db, _complete, ctx['tenant_id'], loan_id, idempotency_key)
+
+def _complete(db: Session, tenant_id: str, loan_id: str, idempotency_key: str):
     endpoint = '/loans/{loan_id}/complete'
     body = {'loan_id': loan_id}
     try:
-        cached = get_cached(db, ctx['tenant_id'], idempotency_key, endpoint, body)
+        cached = get_cached(db, tenant_id, idempotency_key, endpoint, body)
     except ValueError as ex:
         raise HTTPException(status_code=409, detail=str(ex))
     if cached:
         return cached
-    loan = service.get(db, ctx['tenant_id'], loan_id)
-    loan = service.complete(db, loan)
-    audit.log(db, ctx['tenant_id'], 'COMPLETE_LOAN', 'LOAN', loan_id)
+    loan = service.get(db, tenant_id, loan_id)
+    loan = service.complete(db, tenant_id, loan)
+    audit.log(db, tenant_id, 'COMPLETE_LOAN', 'LOAN', loan_id)
     resp = success({'status': 'COMPLETED', 'completed_at': loan.completed_at.isoformat()})
-    store_response(db, ctx['tenant_id'], idempotency_key, endpoint, body, resp)
-    return resp
+    return store_response(db, tenant_id, idempotency_key, endpoint, body, resp)
@@ -1,36 +1,44 @@
 from fastapi import APIRouter, Depends, Header, HTTPException
 from sqlalchemy.orm import Session
 from app.config.security import auth_headers
-from app.core.database import get_db
+from app.core.database import get_db, run_db
 from app.core.exceptions import success
 from app.core.idempotency import get_cached, store_response
 from app.services.loan_service import LoanService
 from app.services.purity_service import PurityService
+from app.schemas.common import Id
 
 router = APIRouter(prefix='/loans', tags=['Purity'])
+jobs_router = APIRouter(prefix='/purity-jobs', tags=['Purity'])
 loan_service = LoanService()
 service = PurityService()
 
 @router.post('/{loan_id}/purity-test')
-def trigger(loan_id: str, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db), idempotency_key: str = Header(..., alias='Idempotency-Key')):
+async def trigger(loan_id: Id, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db), idempotency_key: str = Header(..., alias='Idempotency-Key')):
+    return await run_db(db, _trigger, ctx['tenant_id'], loan_id, idempotency_key)
+
+def _trigger(db: Session, tenant_id: str, loan_id: str, idempotency_key: str):
     endpoint = '/loans/{loan_id}/purity-test'
     body = {'loan_id': loan_id}
     try:
-        cached = get_cached(db, ctx['tenant_id'], idempotency_key, endpoint, body)
+        cached = get_cached(db, tenant_id, idempotency_key, endpoint, body)
     except ValueError as ex:
         raise HTTPException(status_code=409, detail=str(ex))
     if cached:
         return cached
-    loan = loan_service.get(db, ctx['tenant_id'], loan_id)
+    loan = loan_service.get(db, tenant_id, loan_id)
     loan_service.ensure_open(loan)
-    result = service.trigger(db, ctx['tenant_id'], loan_id)
-    loan.status = 'PURITY_TESTED'
-    db.commit()
-    resp = success(result)
-    store_response(db, ctx['tenant_id'], idempotency_key, endpoint, body, resp)
-    return resp
+    resp = success(service.trigger(db, tenant_id, loan_id))
+    return store_response(db, tenant_id, idempotency_key, endpoint, body, resp)
 
 @router.get('/{loan_id}/purity-test')
-def list_purity(loan_id: str, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db)):
-    rows = service.list(db, ctx['tenant_id'], loan_id)
+async def list_purity(loan_id: Id, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db)):
+    return await run_db(db, _list_purity, ctx['tenant_id'], loan_id)
+
+def _list_purity(db: Session, tenant_id: str, loan_id: str):
+    rows = service.list(db, tenant_id, loan_id)
     return success([{'jewel_index': r.jewel_index, 'result': r.result, 'confidence': r.confidence_score} for r in rows])
+
+@jobs_router.get('/{job_id}')
+async def get_job(job_id: Id, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db)):
+    return success(await run_db(db, service.get_job, ctx['tenant_id'], job_id))
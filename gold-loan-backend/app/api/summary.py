@@ -1,28 +1,42 @@
-from fastapi import APIRouter, Depends, Header, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.config.security import auth_headers
-from app.core.database import get_db
-from app.core.exceptions import success
+from app.core.database import get_db, run_db
+from app.core.exceptions import meta, success
 from app.core.idempotency import get_cached, store_response
 from app.services.loan_service import LoanService
 from app.services.summary_service import SummaryService
+from app.schemas.common import Id
 
 router = APIRouter(prefix='/loans', tags=['Summary'])
 loan_service = LoanService()
 service = SummaryService()
 
 @router.post('/{loan_id}/summary')
-def generate(loan_id: str, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db), idempotency_key: str = Header(..., alias='Idempotency-Key')):
+async def generate(loan_id: Id, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db), idempotency_key: str = Header(..., alias='Idempotency-Key')):
+    return await run_db(db, _generate, ctx['tenant_id'], loan_id, idempotency_key)
+
+def _generate(db: Session, tenant_id: str, loan_id: str, idempotency_key: str):
     endpoint = '/loans/{loan_id}/summary'
     body = {'loan_id': loan_id}
     try:
-        cached = get_cached(db, ctx['tenant_id'], idempotency_key, endpoint, body)
+        cached = get_cached(db, tenant_id, idempotency_key, endpoint, body)
     except ValueError as ex:
         raise HTTPException(status_code=409, detail=str(ex))
     if cached:
         return cached
-    loan = loan_service.get(db, ctx['tenant_id'], loan_id)
-    row = service.generate(db, ctx['tenant_id'], loan)
-    resp = success({'summary_id': row.id})
-    store_response(db, ctx['tenant_id'], idempotency_key, endpoint, body, resp)
-    return resp
+    loan = loan_service.get(db, tenant_id, loan_id)
+    summary_id = service.generate(db, tenant_id, loan)
+    resp = success({'summary_id': summary_id})
+    return store_response(db, tenant_id, idempotency_key, endpoint, body, resp)
+
+@router.get('/{loan_id}/summary')
+async def get_summary(loan_id: Id, ctx: dict = Depends(auth_headers), db: Session = Depends(get_db)):
+    summary_id, snapshot = await run_db(db, service.get, ctx['tenant_id'], loan_id)
+    # The snapshot is spliced in as stored, never re-parsed.
+    body = b''.join((
+        b'{"success":true,"data":{"summary_id":', orjson.dumps(summary_id),
+        b',"snapshot":', snapshot, b'},"meta":', orjson.dumps(meta()), b'}',
+    ))
+    return Response(content=body, media_type='application/json')
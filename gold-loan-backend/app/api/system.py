@@ -1,7 +1,13 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core import metrics
 
 router = APIRouter(prefix='/system', tags=['System'])
 
 @router.get('/health')
-def health():
+async def health():
     return {'ok': True}
+
+@router.get('/metrics', response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type='text/plain; version=0.0.4')
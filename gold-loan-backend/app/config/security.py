@@ -1,4 +1,5 @@
 from fastapi import Header, HTTPException
+from app.schemas.common import canonical_id
 
 
 def auth_headers(authorization: str = Header(...), x_tenant_id: str = Header(...)) -> dict:
@@ -6,4 +7,8 @@ def auth_headers(authorization: str = Header(...), x_tenant_id: str = Header(...
         raise HTTPException(status_code=401, detail='Invalid Authorization header')
     if not x_tenant_id:
         raise HTTPException(status_code=400, detail='X-Tenant-ID is required')
-    return {'tenant_id': x_tenant_id, 'token': authorization.split(' ', 1)[1]}
+    try:
+        tenant_id = canonical_id(x_tenant_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail='X-Tenant-ID must be a UUID')
+    return {'tenant_id': tenant_id, 'token': authorization.split(' ', 1)[1]}
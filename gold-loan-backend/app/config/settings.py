@@ -12,6 +12,95 @@ class Settings(BaseSettings):
     # Supabase Postgres DSN only
     supabase_db_url: str = Field(..., alias='SUPABASE_DB_URL')
     jwt_secret: str = Field('change-me', alias='JWT_SECRET')
+    # Request path on AsyncEngine/AsyncSession (psycopg async) instead of the threadpool + sync Session
+    db_async: bool = False
+
+    # Per-request SQL budgets, keyed by "METHOD /route/template"; over budget (or one statement
+    # shape repeated more than query_repeat_limit times) logs a warning, or raises when strict
+    query_budget_default: int = 25
+    query_budgets: dict[str, int] = {}
+    query_repeat_limit: int = 10
+    query_budget_strict: bool = False
+
+    # Tenant routing: SHARED tenants use the SUPABASE_DB_URL pool, DEDICATED tenants get their own
+    tenant_pool_size: dict[str, int] = {'SHARED': 20, 'DEDICATED': 5}
+    tenant_max_overflow: dict[str, int] = {'SHARED': 10, 'DEDICATED': 5}
+    tenant_engine_cache_size: int = 32
+    tenant_engine_idle_seconds: int = 600
+    tenant_metadata_ttl_seconds: int = 60
+    tenant_metadata_cache_size: int = 10000
+    # Pool sizes per tier are above. Without pre-ping a dead connection fails its first
+    # statement instead; the pool is then invalidated and the request gets a 503.
+    db_pool_timeout_seconds: float = 30
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    # Behind PgBouncer transaction pooling: no server-side prepared statements, and
+    # db_null_pool leaves all pooling to PgBouncer
+    db_pgbouncer: bool = False
+    db_null_pool: bool = False
+    # Read replicas of SUPABASE_DB_URL serve GETs of shared tenants; one more than replica_max_lag_seconds
+    # behind leaves the rotation until it catches up. After a write, that client reads from the primary
+    # for replica_max_lag_seconds + replica_lag_check_interval_seconds.
+    replica_db_urls: list[str] = []
+    replica_max_lag_seconds: float = 5.0
+    replica_lag_check_interval_seconds: float = 1.0
+    # python -m app.core.migrations: dedicated tenant databases migrated concurrently
+    migration_parallelism: int = 8
+
+    # How long a duplicate Idempotency-Key waits for the in-flight request before a 409; 0 waits until it finishes
+    idempotency_lock_timeout_ms: int = 0
+    # Per-process replay cache and per-tenant "never seen" filter in front of idempotency_record; the filter is
+    # rotated every longest retention period, so capacity is the keys one tenant stores in that time
+    idempotency_cache_size: int = 10000
+    idempotency_cache_ttl_seconds: int = 300
+    idempotency_filter_capacity: int = 1_000_000
+    idempotency_filter_error_rate: float = 0.01
+    # Tenants with a filter in memory (each about 1.2 bytes per unit of capacity at 1%, twice during rotation)
+    idempotency_filter_tenants: int = 100
+    # Retention of idempotency records; overrides are keyed by endpoint template, e.g. {"/loans/{loan_id}/complete": 168}
+    idempotency_retention_hours: int = 24
+    idempotency_retention_overrides: dict[str, int] = {}
+    idempotency_compaction_batch_size: int = 1000
+    idempotency_compaction_interval_seconds: int = 60
+    # Stored responses at least this large are gzip-compressed
+    idempotency_compress_min_bytes: int = 4096
+
+    # Per-process caches of loan headers and of summaries. Completed headers and summaries are immutable and kept
+    # until evicted; an open loan's header expires after the TTL, which bounds how long another process's status
+    # change can go unseen here
+    loan_cache_size: int = 50000
+    loan_cache_ttl_seconds: int = 5
+    summary_cache_size: int = 20000
+
+    # Purity jobs: claimed in batches by app.workers.purity_worker, jewels scored in a process pool
+    purity_pool_size: int = 4
+    purity_claim_batch_size: int = 8
+    purity_poll_interval_seconds: float = 1.0
+    purity_job_timeout_seconds: int = 600
+    purity_max_attempts: int = 3
+    # Inference micro-batching: up to ai_batch_size jewels per call, waiting at most ai_batch_wait_ms to fill
+    ai_batch_size: int = 32
+    ai_batch_wait_ms: int = 10
+
+    # Image uploads: presigned PUT URLs are signed locally (SigV4); set s3_endpoint_url for S3-compatible storage
+    s3_bucket: str = 'gold-loan-images'
+    s3_region: str = 'ap-south-1'
+    s3_access_key_id: str = ''
+    s3_secret_access_key: str = ''
+    s3_endpoint_url: str = ''
+    s3_upload_url_ttl_seconds: int = 900
+    # Uploads are verified by hashing the stored object in chunks of this size
+    image_hash_chunk_bytes: int = 1024 * 1024
+
+    # Audit log: 'async' batches rows after commit, 'sync' writes every row in the request transaction
+    audit_mode: str = 'async'
+    audit_transactional_actions: list[str] = ['COMPLETE_LOAN']
+    audit_batch_size: int = 500
+    audit_flush_interval_ms: int = 200
+    audit_queue_size: int = 10000
+    # Rows that overflow the queue or keep failing to write are spooled here and retried when the writer is idle
+    audit_spool_dir: str = '/var/lib/gold-loan/audit-spool'
+    audit_spool_retry_seconds: float = 5.0
 
 
 settings = Settings()
@@ -0,0 +1,44 @@
+import threading
+import time
+from collections import OrderedDict
+
+# In-process caches: idempotency replays, loan headers and summaries, tenant metadata.
+# Each uvicorn worker keeps its own; the data caches are only written after a commit.
+
+
+class LRUCache:
+    # LRU + TTL map; put(..., forever=True) keeps an entry until it is evicted, and
+    # put(..., ttl_seconds=...) shortens one entry's TTL below the cache's.
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] is not None and item[0] < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return item[1]
+
+    def put(self, key, value, forever: bool = False, ttl_seconds: float | None = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        expires_at = None if forever else time.monotonic() + ttl
+        with self._lock:
+            self._items[key] = (expires_at, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
@@ -1,20 +1,239 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import itertools
+import logging
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 
+from fastapi import Depends
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, DeclarativeBase
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.config.security import auth_headers
 from app.config.settings import settings
+from app.core import metrics
+from app.core.timing import TimedAsyncQueuePool, TimedNullPool, TimedQueuePool
+
+logger = logging.getLogger(__name__)
 
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(settings.supabase_db_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def engine_options(url, tier: str, queue_pool) -> dict:
+    options = {'pool_pre_ping': settings.db_pool_pre_ping}
+    if settings.db_null_pool:
+        options['poolclass'] = TimedNullPool
+    else:
+        options.update(
+            poolclass=queue_pool,
+            pool_size=settings.tenant_pool_size[tier],
+            max_overflow=settings.tenant_max_overflow[tier],
+            pool_timeout=settings.db_pool_timeout_seconds,
+            pool_recycle=settings.db_pool_recycle_seconds,
+        )
+    # PgBouncer in transaction mode hands each transaction to any server connection,
+    # where a statement prepared by another client may not exist.
+    if settings.db_pgbouncer and url.drivername == 'postgresql+psycopg':
+        options['connect_args'] = {'prepare_threshold': None}
+    return options
+
+
+def make_engine(url, tier: str = 'SHARED'):
+    url = make_url(url)
+    return create_engine(url, **engine_options(url, tier, TimedQueuePool))
+
+
+class RoutingSession(Session):
+    # Reads go to the replica engine a read-only request put in info['replica'];
+    # flushes and INSERT/UPDATE/DELETE statements always go to the primary.
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get('replica')
+        if replica is None or self._flushing or isinstance(clause, UpdateBase):
+            return super().get_bind(mapper, clause=clause, **kw)
+        return replica
+
+
+def make_sessionmaker(bind):
+    return sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=bind)
+
+
+def make_async_engine(url, tier: str = 'SHARED'):
+    url = make_url(url)
+    if url.drivername in ('postgresql', 'postgresql+psycopg2'):
+        url = url.set(drivername='postgresql+psycopg')
+    elif url.drivername == 'sqlite':
+        # Local runs only; aiosqlite uses a NullPool.
+        return create_async_engine(url.set(drivername='sqlite+aiosqlite'), pool_pre_ping=settings.db_pool_pre_ping)
+    return create_async_engine(url, **engine_options(url, tier, TimedAsyncQueuePool))
+
+
+def make_async_sessionmaker(bind):
+    return async_sessionmaker(bind=bind, autoflush=False, sync_session_class=RoutingSession)
+
+
+engine = make_engine(settings.supabase_db_url)
+SessionLocal = make_sessionmaker(engine)
+
+# Workers, streaming responses and startup keep the sync engine in both modes.
+async_engine = make_async_engine(settings.supabase_db_url) if settings.db_async else None
+AsyncSessionLocal = make_async_sessionmaker(async_engine) if settings.db_async else None
+
+REPLICA_LAG_SECONDS = metrics.gauge('db_replica_lag_seconds', 'Replay lag of the most lagged reachable replica')
+REPLICAS_IN_ROTATION = metrics.gauge('db_replicas_in_rotation', 'Replicas currently serving reads')
+# 0 when fully replayed; otherwise the age of the last replayed transaction.
+_LAG_SQL = text(
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END'
+)
+
+# Set by ReadYourWritesMiddleware for GET/HEAD requests that may read from a replica.
+read_only: ContextVar[bool] = ContextVar('read_only', default=False)
+
+
+class ReplicaSet:
+    # Read replicas of the shared database. A monitor thread measures their replay lag
+    # and only replicas within max_lag_seconds are handed out, round robin; with none
+    # configured, reachable or caught up, every read stays on the primary.
+    def __init__(self, urls: list[str], max_lag_seconds: float, interval_seconds: float):
+        self.engines = [make_engine(url) for url in urls]
+        self.async_engines = [make_async_engine(url) for url in urls] if settings.db_async else []
+        self.max_lag_seconds = max_lag_seconds
+        self.interval_seconds = interval_seconds
+        self._in_rotation = ()
+        self._next = itertools.count()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def pick(self, use_async: bool = False):
+        in_rotation = self._in_rotation
+        if not in_rotation:
+            return None
+        index = in_rotation[next(self._next) % len(in_rotation)]
+        return self.async_engines[index].sync_engine if use_async else self.engines[index]
+
+    def update(self, lags: list[float | None]) -> None:
+        # One lag per replica in seconds, None when it could not be measured.
+        self._in_rotation = tuple(i for i, lag in enumerate(lags) if lag is not None and lag <= self.max_lag_seconds)
+        REPLICA_LAG_SECONDS.set(max((lag for lag in lags if lag is not None), default=0))
+        REPLICAS_IN_ROTATION.set(len(self._in_rotation))
+
+    def check(self) -> None:
+        lags = []
+        for engine in self.engines:
+            try:
+                with engine.connect() as conn:
+                    lags.append(float(conn.execute(_LAG_SQL).scalar()))
+            except DBAPIError:
+                logger.warning('replica %s unreachable', engine.url.render_as_string(hide_password=True), exc_info=True)
+                lags.append(None)
+        self.update(lags)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> None:
+        if self.engines and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='replica-lag', daemon=True)
+            self._thread.start()
 
+    async def dispose(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            await run_in_threadpool(self._thread.join)
+        for engine in self.engines:
+            engine.dispose()
+        for engine in self.async_engines:
+            await engine.dispose()
 
-def get_db():
-    db = SessionLocal()
+
+replicas = ReplicaSet(
+    settings.replica_db_urls, settings.replica_max_lag_seconds, settings.replica_lag_check_interval_seconds,
+)
+
+
+@contextmanager
+def unit_of_work(session_factory=None):
+    # One transaction per request/job: repositories only flush, and the domain
+    # rows, audit rows and idempotency record are committed (or rolled back) together.
+    db = (session_factory or SessionLocal)()
     try:
         yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
+
+
+@contextmanager
+def savepoint(db: Session):
+    # A SAVEPOINT inside the unit of work. Rolling it back leaves the transaction usable
+    # and drops what the failed block staged in db.info for after_commit, which only a
+    # rollback of the whole transaction would otherwise discard.
+    staged = {name: len(value) for name, value in db.info.items() if isinstance(value, list)}
+    try:
+        with db.begin_nested():
+            yield db
+    except Exception:
+        for name, value in db.info.items():
+            if isinstance(value, list):
+                del value[staged.get(name, 0):]
+        raise
+
+
+@asynccontextmanager
+async def async_unit_of_work(session_factory=None):
+    db = (session_factory or AsyncSessionLocal)()
+    try:
+        yield db
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+
+def _get_sync_db(ctx: dict = Depends(auth_headers)):
+    # Imported here: the tenant router itself builds on this module.
+    from app.core.tenant_router import tenant_router
+
+    factory = tenant_router.sessionmaker_for(ctx['tenant_id'])
+    with unit_of_work(factory) as db:
+        # Replicas mirror the shared database only.
+        if factory is SessionLocal and read_only.get():
+            db.info['replica'] = replicas.pick()
+        yield db
+
+
+async def _get_async_db(ctx: dict = Depends(auth_headers)):
+    from app.core.tenant_router import tenant_router
+
+    if not tenant_router.is_cached(ctx['tenant_id']):
+        await run_in_threadpool(tenant_router.refresh, ctx['tenant_id'])
+    factory = tenant_router.async_sessionmaker_for(ctx['tenant_id'])
+    async with async_unit_of_work(factory) as db:
+        if factory is AsyncSessionLocal and read_only.get():
+            db.info['replica'] = replicas.pick(use_async=True)
+        yield db
+
+
+get_db = _get_async_db if settings.db_async else _get_sync_db
+
+
+async def run_db(db, fn, *args):
+    # Routes keep one sync body over the repositories and services. On an AsyncSession
+    # it runs on the event loop (driver I/O is awaited via greenlet); on a Session it
+    # runs in the threadpool as before.
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
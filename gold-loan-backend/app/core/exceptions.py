@@ -2,6 +2,9 @@ import uuid
 from datetime import datetime, timezone
 from fastapi import HTTPException, Request
 from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+_FOREIGN_KEY_VIOLATION = '23503'
 
 
 def meta():
@@ -16,10 +19,24 @@ def success(data):
     return {'success': True, 'data': data, 'meta': meta()}
 
 
+def missing_reference(exc: Exception) -> bool:
+    # A well-formed id that names no row (customer, branch, loan, ...): the client's mistake.
+    return isinstance(exc, IntegrityError) and getattr(exc.orig, 'sqlstate', None) == _FOREIGN_KEY_VIOLATION
+
+
 async def http_exception_handler(_: Request, exc: Exception):
     if isinstance(exc, HTTPException):
         status = exc.status_code
         message = str(exc.detail)
+    elif missing_reference(exc):
+        status = 422
+        message = 'Referenced record does not exist'
+    elif isinstance(exc, DBAPIError) and exc.connection_invalidated:
+        # The pool has already been invalidated. A connection lost during COMMIT may still
+        # have committed, so the write is not known to be undone: retries of writes are safe
+        # because they reuse the Idempotency-Key, which replays a committed response.
+        status = 503
+        message = 'Database connection lost, retry the request'
     else:
         status = 500
         message = 'Internal server error'
@@ -1,29 +1,430 @@
 import hashlib
-import json
+import logging
+import math
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import orjson
+from fastapi import Response
+from sqlalchemy import event, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.core import metrics
+from app.core.cache import LRUCache
+from app.core.database import unit_of_work
+from app.core.tenant_router import tenant_router
 from app.models.idempotency import IdempotencyRecord
 
+logger = logging.getLogger(__name__)
+
+CACHE_HITS = metrics.counter('idempotency_cache_hits_total', 'Replays served from the in-process response cache')
+CACHE_MISSES = metrics.counter('idempotency_cache_misses_total', 'Lookups not found in the in-process response cache')
+FILTER_SKIPS = metrics.counter('idempotency_filter_skips_total', 'Lookups skipped because the filter had never seen the key')
+FILTER_FALSE_POSITIVES = metrics.counter('idempotency_filter_false_positives_total', 'Filter said maybe-seen but no row existed')
+FILTER_ROTATIONS = metrics.counter('idempotency_filter_rotations_total', 'Filter generations retired after a retention period')
+FILTER_STALE = metrics.counter('idempotency_filter_stale_total', 'Filter said never-seen but another worker had stored the key')
+
+
+class IdempotencyInProgress(ValueError):
+    pass
+
+
+class _BloomFilter:
+    # Unlocked on purpose: a lost bit under a race is only a false negative, which
+    # the reservation's ON CONFLICT path already handles.
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+# (tenant_id, endpoint, key) -> (request_hash, status_code, response_body, content_encoding)
+_cache = LRUCache(settings.idempotency_cache_size, settings.idempotency_cache_ttl_seconds)
+# tenant_id -> _TenantFilter. Keyed by a client header, so bounded; an evicted tenant
+# is warmed again on its next request.
+_filters = LRUCache(settings.idempotency_filter_tenants, 0)
+_filters_lock = threading.Lock()
+# Warming scans a tenant's keys, so it runs off the request path, one tenant at a time.
+_warming = ThreadPoolExecutor(max_workers=1, thread_name_prefix='idempotency-filter')
+
+
+def _new_filter() -> _BloomFilter:
+    return _BloomFilter(settings.idempotency_filter_capacity, settings.idempotency_filter_error_rate)
+
+
+def _filter_period() -> float:
+    return max([settings.idempotency_retention_hours, *settings.idempotency_retention_overrides.values()]) * 3600
+
+
+class _TenantFilter:
+    # Rotated once per longest retention period: keys go into the current generation,
+    # lookups check it and the previous one. A key is therefore kept at least as long as
+    # its record can live, and dropped once compaction may have removed it. Until the
+    # tenant's stored keys are loaded (ready) every lookup goes to the database.
+    def __init__(self):
+        self.current = _new_filter()
+        self.previous = None
+        self.ready = False
+        self.rotate_at = time.monotonic() + _filter_period()
+
+    def rotate(self) -> None:
+        now = time.monotonic()
+        if now < self.rotate_at:
+            return
+        FILTER_ROTATIONS.inc()
+        # Idle for two periods or more: nothing in either generation can still be live.
+        self.previous = self.current if now < self.rotate_at + _filter_period() else None
+        self.current = _new_filter()
+        self.rotate_at = now + _filter_period()
+
+
+def _filter_key(endpoint: str, key: str) -> str:
+    return f'{endpoint}\x1f{key}'
+
+
+def _stored_keys(tenant_id: str):
+    with unit_of_work(tenant_router.sessionmaker_for(tenant_id)) as db:
+        yield from db.execute(
+            select(IdempotencyRecord.endpoint, IdempotencyRecord.key)
+            .where(IdempotencyRecord.tenant_id == tenant_id, IdempotencyRecord.expires_at > datetime.utcnow())
+            .execution_options(yield_per=5000)
+        )
+
+
+def _warm(tenant_id: str, bloom: _TenantFilter) -> None:
+    try:
+        for endpoint, key in _stored_keys(tenant_id):
+            bloom.rotate()
+            bloom.current.add(_filter_key(endpoint, key))
+    except Exception:
+        logger.exception('could not load the idempotency keys of tenant %s', tenant_id)
+        # Stays on the database path; the next request tries again.
+        _filters.pop(tenant_id)
+        return
+    bloom.ready = True
+
+
+def _tenant_filter(tenant_id: str) -> _TenantFilter:
+    with _filters_lock:
+        bloom = _filters.get(tenant_id)
+        if bloom is None:
+            bloom = _TenantFilter()
+            _filters.put(tenant_id, bloom, forever=True)
+            _warming.submit(_warm, tenant_id, bloom)
+    bloom.rotate()
+    return bloom
+
+
+def _remember(tenant_id: str, endpoint: str, key: str) -> None:
+    # Also while warming: the scan cannot see keys reserved by uncommitted requests.
+    _tenant_filter(tenant_id).current.add(_filter_key(endpoint, key))
+
+
+def _might_exist(tenant_id: str, endpoint: str, key: str) -> bool:
+    bloom = _tenant_filter(tenant_id)
+    if not bloom.ready:
+        return True
+    item = _filter_key(endpoint, key)
+    return item in bloom.current or (bloom.previous is not None and item in bloom.previous)
+
 
 def _hash(payload: dict) -> str:
-    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    return hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
 
 
-def get_cached(db: Session, tenant_id: str, key: str, endpoint: str, payload: dict):
-    row = db.query(IdempotencyRecord).filter_by(tenant_id=tenant_id, key=key, endpoint=endpoint).first()
-    if not row:
-        return None
-    if row.request_hash != _hash(payload):
+def _expires_at(endpoint: str, now: datetime) -> datetime:
+    hours = settings.idempotency_retention_overrides.get(endpoint, settings.idempotency_retention_hours)
+    return now + timedelta(hours=hours)
+
+
+def _insert(db: Session):
+    return postgresql.insert if db.get_bind().dialect.name == 'postgresql' else sqlite.insert
+
+
+def _check(request_hash: str, stored_hash: str, status_code: int, body: bytes | None, content_encoding: str | None):
+    # Replays send the stored bytes as-is; only large compressed bodies are inflated.
+    if stored_hash != request_hash:
         raise ValueError('Idempotency-Key reused with different payload')
-    return json.loads(row.response_payload)
+    if body is None:
+        raise IdempotencyInProgress('Request with this Idempotency-Key is still in progress')
+    if content_encoding == 'gzip':
+        body = zlib.decompress(body, wbits=31)
+    return Response(content=body, status_code=status_code, media_type='application/json')
 
 
-def store_response(db: Session, tenant_id: str, key: str, endpoint: str, payload: dict, response: dict):
-    row = IdempotencyRecord(
+def _encode(body: bytes) -> tuple[bytes, str | None]:
+    if len(body) >= settings.idempotency_compress_min_bytes:
+        return zlib.compress(body, 6, wbits=31), 'gzip'
+    return body, None
+
+
+def _outcome(request_hash: str, stored: tuple):
+    try:
+        return _check(request_hash, *stored)
+    except ValueError as ex:
+        return ex
+
+
+def _load(db: Session, tenant_id: str, key: str, endpoint: str, request_hash: str):
+    row = db.execute(
+        select(
+            IdempotencyRecord.request_hash,
+            IdempotencyRecord.status_code,
+            IdempotencyRecord.response_body,
+            IdempotencyRecord.content_encoding,
+            IdempotencyRecord.expires_at,
+        ).where(
+            IdempotencyRecord.tenant_id == tenant_id,
+            IdempotencyRecord.key == key,
+            IdempotencyRecord.endpoint == endpoint,
+        )
+    ).first()
+    if not row or row.expires_at <= datetime.utcnow():
+        return None
+    stored = (row.request_hash, row.status_code, row.response_body, row.content_encoding)
+    cached = _check(request_hash, *stored)
+    _cache_until((tenant_id, endpoint, key), stored, row.expires_at)
+    return cached
+
+
+def _cache_until(cache_key: tuple, stored: tuple, expires_at: datetime) -> None:
+    # Not replayed from memory once the record has expired and the key may be reused.
+    _cache.put(cache_key, stored, ttl_seconds=(expires_at - datetime.utcnow()).total_seconds())
+
+
+# SQLSTATE lock_not_available: the wait on uq_idempotency outlasted idempotency_lock_timeout_ms.
+_LOCK_NOT_AVAILABLE = '55P03'
+
+
+def _claim(db: Session, stmt) -> list:
+    # Runs a reservation upsert (which RETURNs the rows it claimed) under the lock
+    # timeout. Only the wait for another request's key is limited: the timeout is reset
+    # straight after, and any other database error propagates unchanged.
+    limited = bool(settings.idempotency_lock_timeout_ms) and db.get_bind().dialect.name == 'postgresql'
+    if limited:
+        db.execute(text(f'SET LOCAL lock_timeout = {int(settings.idempotency_lock_timeout_ms)}'))
+    try:
+        rows = db.execute(stmt).all()
+    except OperationalError as ex:
+        if getattr(ex.orig, 'sqlstate', None) != _LOCK_NOT_AVAILABLE:
+            raise
+        raise IdempotencyInProgress('Request with this Idempotency-Key is still in progress') from ex
+    if limited:
+        db.execute(text('SET LOCAL lock_timeout = DEFAULT'))
+    return rows
+
+
+def _reserve(db: Session, tenant_id: str, key: str, endpoint: str, request_hash: str) -> bool:
+    # The pending row lives in the request transaction. A duplicate from any worker
+    # blocks on uq_idempotency until that transaction ends, then sees the stored
+    # response (commit) or a free key (rollback). An expired row not yet compacted
+    # is taken over, so a key past its retention always behaves as a new request.
+    now = datetime.utcnow()
+    stmt = _insert(db)(IdempotencyRecord).values(
         tenant_id=tenant_id,
         key=key,
         endpoint=endpoint,
-        request_hash=_hash(payload),
-        response_payload=json.dumps(response),
+        request_hash=request_hash,
+        response_body=None,
+        created_at=now,
+        expires_at=_expires_at(endpoint, now),
     )
-    db.add(row)
-    db.commit()
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['tenant_id', 'key', 'endpoint'],
+        set_={
+            'request_hash': stmt.excluded.request_hash,
+            'response_body': None,
+            'created_at': stmt.excluded.created_at,
+            'expires_at': stmt.excluded.expires_at,
+        },
+        where=IdempotencyRecord.expires_at <= now,
+    ).returning(IdempotencyRecord.id)
+    # RETURNING rather than rowcount, which psycopg reports as -1 for this INSERT.
+    return len(_claim(db, stmt)) == 1
+
+
+def get_cached(db: Session, tenant_id: str, key: str, endpoint: str, payload: dict):
+    # Returns the stored response for a replay, or None once this request owns the key.
+    request_hash = _hash(payload)
+    db.info.setdefault('idempotency_hashes', {})[(tenant_id, endpoint, key)] = request_hash
+    hit = _cache.get((tenant_id, endpoint, key))
+    if hit is not None:
+        CACHE_HITS.inc()
+        return _check(request_hash, *hit)
+    CACHE_MISSES.inc()
+
+    looked_up = _might_exist(tenant_id, endpoint, key)
+    if looked_up:
+        cached = _load(db, tenant_id, key, endpoint, request_hash)
+        if cached is not None:
+            return cached
+        if _tenant_filter(tenant_id).ready:
+            FILTER_FALSE_POSITIVES.inc()
+    else:
+        FILTER_SKIPS.inc()
+
+    if _reserve(db, tenant_id, key, endpoint, request_hash):
+        _remember(tenant_id, endpoint, key)
+        return None
+    if not looked_up:
+        FILTER_STALE.inc()
+        _remember(tenant_id, endpoint, key)
+    cached = _load(db, tenant_id, key, endpoint, request_hash)
+    if cached is None:
+        raise IdempotencyInProgress('Request with this Idempotency-Key is still in progress')
+    return cached
+
+
+def store_response(db: Session, tenant_id: str, key: str, endpoint: str, payload: dict, response: dict, status_code: int = 200):
+    # Serialized once: the same bytes are stored, cached and sent to this client.
+    body = orjson.dumps(response)
+    stored_body, content_encoding = _encode(body)
+    request_hash = db.info.get('idempotency_hashes', {}).get((tenant_id, endpoint, key)) or _hash(payload)
+    expires_at = db.scalar(
+        update(IdempotencyRecord)
+        .where(
+            IdempotencyRecord.tenant_id == tenant_id,
+            IdempotencyRecord.key == key,
+            IdempotencyRecord.endpoint == endpoint,
+        )
+        .values(status_code=status_code, response_body=stored_body, content_encoding=content_encoding)
+        .returning(IdempotencyRecord.expires_at)
+    )
+    # Only cache once the unit of work commits, so a rolled-back request is never replayed.
+    if expires_at is not None:
+        db.info.setdefault('idempotency_stored', []).append(
+            ((tenant_id, endpoint, key), (request_hash, status_code, stored_body, content_encoding), expires_at)
+        )
+    return Response(content=body, status_code=status_code, media_type='application/json')
+
+
+def get_cached_many(db: Session, tenant_id: str, endpoint: str, payloads: dict[str, dict]) -> dict:
+    # Batch lookup in one IN query: key -> the stored Response to replay, or the
+    # ValueError get_cached would have raised. Keys never used are left out; they are
+    # claimed by store_many.
+    found, lookup = {}, {}
+    for key, payload in payloads.items():
+        request_hash = _hash(payload)
+        hit = _cache.get((tenant_id, endpoint, key))
+        if hit is not None:
+            CACHE_HITS.inc()
+            found[key] = _outcome(request_hash, hit)
+            continue
+        CACHE_MISSES.inc()
+        if _might_exist(tenant_id, endpoint, key):
+            lookup[key] = request_hash
+        else:
+            FILTER_SKIPS.inc()
+    return found | _load_many(db, tenant_id, endpoint, lookup)
+
+
+def load_many(db: Session, tenant_id: str, endpoint: str, payloads: dict[str, dict]) -> dict:
+    # get_cached_many straight from the database, for keys a concurrent request has just
+    # stored: neither this worker's cache nor its filter has seen them yet.
+    found = _load_many(db, tenant_id, endpoint, {key: _hash(payload) for key, payload in payloads.items()})
+    for key in found:
+        _remember(tenant_id, endpoint, key)
+    return found
+
+
+def _load_many(db: Session, tenant_id: str, endpoint: str, lookup: dict[str, str]) -> dict:
+    found = {}
+    if not lookup:
+        return found
+    rows = db.execute(
+        select(
+            IdempotencyRecord.key,
+            IdempotencyRecord.request_hash,
+            IdempotencyRecord.status_code,
+            IdempotencyRecord.response_body,
+            IdempotencyRecord.content_encoding,
+            IdempotencyRecord.expires_at,
+        ).where(
+            IdempotencyRecord.tenant_id == tenant_id,
+            IdempotencyRecord.endpoint == endpoint,
+            IdempotencyRecord.key.in_(lookup),
+        )
+    )
+    now = datetime.utcnow()
+    for row in rows:
+        if row.expires_at <= now:
+            continue
+        stored = (row.request_hash, row.status_code, row.response_body, row.content_encoding)
+        found[row.key] = _outcome(lookup[row.key], stored)
+        if row.response_body is not None and row.request_hash == lookup[row.key]:
+            _cache_until((tenant_id, endpoint, row.key), stored, row.expires_at)
+    return found
+
+
+def store_many(db: Session, tenant_id: str, endpoint: str, responses: dict[str, tuple[dict, dict]]) -> dict:
+    # Reserves and stores in one multi-row upsert: key -> (payload, response). The rows
+    # hold the final responses from the start, since no one sees them before commit;
+    # a key another request holds (or just took) is not returned, and its work must not
+    # be done. Returns key -> Response for the keys this request now owns.
+    now = datetime.utcnow()
+    expires_at = _expires_at(endpoint, now)
+    rows, prepared = [], {}
+    for key, (payload, response) in responses.items():
+        body = orjson.dumps(response)
+        stored_body, content_encoding = _encode(body)
+        request_hash = _hash(payload)
+        rows.append({
+            'tenant_id': tenant_id,
+            'key': key,
+            'endpoint': endpoint,
+            'request_hash': request_hash,
+            'status_code': 200,
+            'response_body': stored_body,
+            'content_encoding': content_encoding,
+            'created_at': now,
+            'expires_at': expires_at,
+        })
+        prepared[key] = (body, (request_hash, 200, stored_body, content_encoding))
+    stmt = _insert(db)(IdempotencyRecord).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['tenant_id', 'key', 'endpoint'],
+        set_={
+            name: stmt.excluded[name]
+            for name in ('request_hash', 'status_code', 'response_body', 'content_encoding', 'created_at', 'expires_at')
+        },
+        where=IdempotencyRecord.expires_at <= now,
+    ).returning(IdempotencyRecord.key)
+    owned = {row.key for row in _claim(db, stmt)}
+    stored = db.info.setdefault('idempotency_stored', [])
+    for key in owned:
+        _remember(tenant_id, endpoint, key)
+        stored.append(((tenant_id, endpoint, key), prepared[key][1], expires_at))
+    return {
+        key: Response(content=prepared[key][0], status_code=200, media_type='application/json')
+        for key in owned
+    }
+
+
+@event.listens_for(Session, 'after_commit')
+def _cache_committed(session: Session) -> None:
+    session.info.pop('idempotency_hashes', None)
+    for cache_key, value, expires_at in session.info.pop('idempotency_stored', ()):
+        _cache_until(cache_key, value, expires_at)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop('idempotency_stored', None)
+    session.info.pop('idempotency_hashes', None)
@@ -0,0 +1,178 @@
+import threading
+from bisect import bisect_left
+
+# Per-process metrics rendered in the Prometheus text exposition format.
+# Each uvicorn worker keeps its own values; Prometheus aggregates across scrapes.
+# Labelled series are created on first use and reused, so the hot path only
+# looks up a child and bumps preallocated slots.
+
+_registry = []
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def render(self) -> list[str]:
+        return [
+            f'# HELP {self.name} {self.help_text}',
+            f'# TYPE {self.name} counter',
+            f'{self.name} {self.value}',
+        ]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(labelnames: tuple, values: tuple) -> str:
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values))
+    return '{' + pairs + '}' if pairs else ''
+
+
+class _Family:
+    # A metric with labels: one child per distinct label tuple.
+    def __init__(self, name: str, help_text: str, labelnames: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _items(self):
+        with self._lock:
+            return list(self._children.items())
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        # Children are only bumped from the event loop, so no lock.
+        self.value += amount
+
+
+class LabeledCounter(_Family):
+    def _new_child(self):
+        return _CounterChild()
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for values, child in self._items():
+            lines.append(f'{self.name}{_label_text(self.labelnames, values)} {child.value}')
+        return lines
+
+
+class Gauge:
+    # Like the labelled counters, inc/dec only from the event loop; set is a plain
+    # assignment, so background threads may use it.
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: int = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def render(self) -> list[str]:
+        return [
+            f'# HELP {self.name} {self.help_text}',
+            f'# TYPE {self.name} gauge',
+            f'{self.name} {self.value}',
+        ]
+
+
+class _HistogramChild:
+    __slots__ = ('counts', 'sum', '_buckets', '_lock')
+
+    def __init__(self, buckets: tuple):
+        self._buckets = buckets
+        # Last slot is the +Inf bucket.
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Family):
+    def __init__(self, name: str, help_text: str, buckets: tuple, labelnames: tuple = ()):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._bounds = [repr(float(b)) for b in self.buckets] + ['+Inf']
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for values, child in self._items():
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self._bounds, counts):
+                cumulative += count
+                labels = _label_text(self.labelnames + ('le',), values + (bound,))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _label_text(self.labelnames, values)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def counter(name: str, help_text: str) -> Counter:
+    return _register(Counter(name, help_text))
+
+
+def labeled_counter(name: str, help_text: str, labelnames: tuple) -> LabeledCounter:
+    return _register(LabeledCounter(name, help_text, labelnames))
+
+
+def gauge(name: str, help_text: str) -> Gauge:
+    return _register(Gauge(name, help_text))
+
+
+def histogram(name: str, help_text: str, buckets: tuple, labelnames: tuple = ()) -> Histogram:
+    return _register(Histogram(name, help_text, buckets, labelnames))
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
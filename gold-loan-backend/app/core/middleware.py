@@ -1,4 +1,61 @@
+import math
+import time
+
 from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import cookie_parser
+
+from app.config.settings import settings
+from app.core import database
+from app.core.timing import TimingMiddleware
+
+PRIMARY_UNTIL_COOKIE = 'gl_primary_until'
+
+
+class ReadYourWritesMiddleware:
+    # GET/HEAD requests may read from a replica unless the client wrote recently. A
+    # successful write sets a cookie with the time until which that client's reads stay
+    # on the primary: max lag plus one check interval, after which every replica still
+    # in rotation has replayed the write.
+    def __init__(self, app):
+        self.app = app
+        self.window_seconds = settings.replica_max_lag_seconds + settings.replica_lag_check_interval_seconds
+
+    def _pinned(self, scope) -> bool:
+        for name, value in scope['headers']:
+            if name == b'cookie':
+                until = cookie_parser(value.decode('latin-1')).get(PRIMARY_UNTIL_COOKIE)
+                try:
+                    return until is not None and float(until) > time.time()
+                except ValueError:
+                    return False
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        if scope['method'] in ('GET', 'HEAD'):
+            token = database.read_only.set(not self._pinned(scope))
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                database.read_only.reset(token)
+            return
+
+        if not database.replicas.engines:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_pinned(message):
+            if message['type'] == 'http.response.start' and message['status'] < 400:
+                cookie = (
+                    f'{PRIMARY_UNTIL_COOKIE}={time.time() + self.window_seconds:.3f}; '
+                    f'Max-Age={math.ceil(self.window_seconds)}; Path=/; HttpOnly; SameSite=Lax'
+                )
+                message['headers'] = list(message.get('headers', [])) + [(b'set-cookie', cookie.encode('latin-1'))]
+            await send(message)
+
+        await self.app(scope, receive, send_pinned)
 
 
 def register_middleware(app):
@@ -9,3 +66,6 @@ def register_middleware(app):
         allow_methods=['*'],
         allow_headers=['*'],
     )
+    app.add_middleware(ReadYourWritesMiddleware)
+    # Added last so it is outermost and times CORS handling too.
+    app.add_middleware(TimingMiddleware)
@@ -0,0 +1,148 @@
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from sqlalchemy import create_engine, select, text, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import NullPool
+
+from app.config.settings import settings
+from app.core.database import Base, SessionLocal
+from app.models.tenant import Tenant
+
+logger = logging.getLogger(__name__)
+
+# Versioned schema: migrations/NNNN_name.sql, applied in order, each version recorded
+# in schema_migrations. Deploys run `python -m app.core.migrations` once, before the new
+# code starts; the app itself only checks that its database is not behind.
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / 'migrations'
+_FILENAME = re.compile(r'^(\d{4})_\w+\.sql$')
+# Serializes concurrent runners (two deploy jobs, a retry) on the same database.
+_LOCK_ID = 0x676C6D67
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def load(directory: Path = MIGRATIONS_DIR) -> list[tuple[str, Path]]:
+    found = []
+    for path in directory.iterdir():
+        match = _FILENAME.match(path.name)
+        if match:
+            found.append((match.group(1), path))
+    return sorted(found)
+
+
+def latest_version(directory: Path = MIGRATIONS_DIR) -> str:
+    migrations = load(directory)
+    return migrations[-1][0] if migrations else ''
+
+
+def current_version(conn) -> str | None:
+    try:
+        return conn.execute(text('SELECT max(version) FROM schema_migrations')).scalar()
+    except DBAPIError:
+        # No schema_migrations yet: never migrated.
+        conn.rollback()
+        return None
+
+
+def check_version(engine, latest: str | None = None) -> str | None:
+    # One query at startup. A database ahead of this build is fine (rolling deploys
+    # migrate first); one behind it is not.
+    latest = latest_version() if latest is None else latest
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if (version or '') < latest:
+        raise SchemaOutOfDate(
+            f'database schema is at {version or "none"}, this build needs {latest}; run python -m app.core.migrations'
+        )
+    return version
+
+
+def migrate_database(url, migrations: list[tuple[str, Path]]) -> list[str]:
+    # All pending files in one transaction: Postgres DDL is transactional, so a failed
+    # file leaves the database at its previous version.
+    engine = create_engine(url, poolclass=NullPool)
+    applied = []
+    try:
+        with engine.begin() as conn:
+            conn.execute(text('SELECT pg_advisory_xact_lock(:id)'), {'id': _LOCK_ID})
+            conn.execute(text(
+                'CREATE TABLE IF NOT EXISTS schema_migrations ('
+                'version VARCHAR(20) PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)'
+            ))
+            done = set(conn.scalars(text('SELECT version FROM schema_migrations')))
+            for version, path in migrations:
+                if version in done:
+                    continue
+                logger.info('applying %s to %s', path.name, engine.url.render_as_string(hide_password=True))
+                # No parameters, so psycopg sends the whole file as one simple query.
+                conn.exec_driver_sql(path.read_text(), execution_options={'no_parameters': True})
+                conn.execute(text('INSERT INTO schema_migrations (version) VALUES (:version)'), {'version': version})
+                applied.append(version)
+    finally:
+        engine.dispose()
+    return applied
+
+
+def _record_versions(version: str, tenant_ids: list[str] | None = None) -> None:
+    with SessionLocal.begin() as db:
+        stmt = update(Tenant).values(schema_version=version)
+        if tenant_ids is None:
+            stmt = stmt.where(Tenant.tenant_type != 'DEDICATED')
+        else:
+            stmt = stmt.where(Tenant.id.in_(tenant_ids))
+        db.execute(stmt)
+
+
+def migrate_all(parallelism: int | None = None) -> dict[str, str]:
+    # Shared database first (it holds the tenant registry), then every DEDICATED
+    # tenant's database in parallel. Returns tenant_id -> error for the ones that failed;
+    # those tenants keep getting 503s from the tenant router until a rerun succeeds.
+    from app.core.tenant_router import tenant_router
+
+    migrations = load()
+    latest = migrations[-1][0]
+    migrate_database(settings.supabase_db_url, migrations)
+    _record_versions(latest)
+
+    with SessionLocal() as db:
+        tenant_ids = list(db.scalars(select(Tenant.id).where(Tenant.tenant_type == 'DEDICATED')))
+    failed, migrated = {}, []
+    with ThreadPoolExecutor(max_workers=parallelism or settings.migration_parallelism) as pool:
+        futures = {
+            pool.submit(migrate_database, tenant_router.database_url(tenant_id), migrations): tenant_id
+            for tenant_id in tenant_ids
+        }
+        for future in as_completed(futures):
+            tenant_id = futures[future]
+            try:
+                future.result()
+                migrated.append(tenant_id)
+            except Exception as ex:
+                logger.exception('migration failed for tenant %s', tenant_id)
+                failed[tenant_id] = str(ex)
+    if migrated:
+        _record_versions(latest, migrated)
+    logger.info('schema at %s: shared database and %d/%d dedicated tenants', latest, len(migrated), len(tenant_ids))
+    return failed
+
+
+def prepare_schema(engine) -> None:
+    # SQLite is for local runs and tests only: the migrations are Postgres DDL, so the
+    # schema comes from the models there.
+    if engine.dialect.name == 'sqlite':
+        Base.metadata.create_all(bind=engine)
+        return
+    check_version(engine)
+
+
+if __name__ == '__main__':
+    from app.config.logging_config import setup_logging
+
+    setup_logging()
+    raise SystemExit(1 if migrate_all() else 0)
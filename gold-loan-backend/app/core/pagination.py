@@ -0,0 +1,39 @@
+import base64
+import binascii
+import uuid
+from datetime import datetime, timezone
+import orjson
+from fastapi import HTTPException
+
+# Opaque keyset cursors: the sort key of the last row returned, base64url-encoded.
+
+
+def encode_cursor(*values) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+    return values
+
+
+def decode_keyset(cursor: str) -> tuple[datetime, str]:
+    # A (timestamp, id) cursor, checked here so a tampered one is a 400 rather than an
+    # error from the query it would go into.
+    timestamp, row_id = decode_cursor(cursor, 2)
+    try:
+        return naive_utc(datetime.fromisoformat(timestamp)), str(uuid.UUID(row_id))
+    except (AttributeError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+
+
+def naive_utc(value: datetime | None) -> datetime | None:
+    # Timestamp columns are naive UTC; aware filter values are converted to match.
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
@@ -1,3 +1,150 @@
-from fastapi import APIRouter
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import APIRouter, HTTPException
+from sqlalchemy import select
+from sqlalchemy.engine import URL
+
+from app.config.settings import settings
+from app.core.cache import LRUCache
+from app.core.database import (
+    AsyncSessionLocal, SessionLocal, make_async_engine, make_async_sessionmaker, make_engine, make_sessionmaker,
+)
+from app.core.migrations import latest_version
+from app.models.tenant import Tenant
 
 router = APIRouter(prefix='/api/v1')
+
+
+class TenantRouter:
+    # Resolves X-Tenant-ID to a data-plane sessionmaker. SHARED (and unregistered)
+    # tenants use the shared SUPABASE_DB_URL pool; each DEDICATED tenant gets its
+    # own engine, kept in a bounded LRU so a worker never holds pools for every bank.
+    def __init__(self, cache_size: int, idle_seconds: float, metadata_ttl_seconds: float, metadata_cache_size: int = 10000):
+        self.cache_size = cache_size
+        self.idle_seconds = idle_seconds
+        # Dedicated databases are migrated one by one; a tenant behind this build is refused.
+        self.schema_version = latest_version()
+        # tenant_id -> (metadata or None,). Keyed by a client header, so bounded: unknown
+        # ids are cached too (they use the shared pool) but cannot grow it without limit.
+        self._tenants = LRUCache(metadata_cache_size, metadata_ttl_seconds)
+        self._engines = OrderedDict()
+        self._async_engines = OrderedDict()
+        self._disposing = set()
+        self._lock = threading.Lock()
+
+    def is_cached(self, tenant_id: str) -> bool:
+        return self._tenants.get(tenant_id) is not None
+
+    def _tenant(self, tenant_id: str):
+        cached = self._tenants.get(tenant_id)
+        if cached is not None:
+            return cached[0]
+        return self.refresh(tenant_id)
+
+    def refresh(self, tenant_id: str):
+        with SessionLocal() as db:
+            row = db.execute(
+                select(
+                    Tenant.tenant_type, Tenant.status, Tenant.db_host,
+                    Tenant.db_port, Tenant.db_name, Tenant.db_user, Tenant.schema_version,
+                ).where(Tenant.id == tenant_id)
+            ).first()
+        tenant = tuple(row) if row else None
+        self._tenants.put(tenant_id, (tenant,))
+        return tenant
+
+    def _url(self, tenant) -> URL:
+        # No password in the URL: libpq reads it from PGPASSFILE for the tenant host/user.
+        _, _, host, port, database, username, _ = tenant
+        return URL.create('postgresql+psycopg', username=username, host=host, port=port, database=database)
+
+    def _evict_idle(self, engines: OrderedDict, now: float) -> list:
+        evicted = []
+        while len(engines) > self.cache_size:
+            evicted.append(engines.popitem(last=False)[1])
+        for tenant_id, entry in list(engines.items()):
+            if entry[2] + self.idle_seconds < now:
+                evicted.append(engines.pop(tenant_id))
+        return evicted
+
+    def _dedicated(self, tenant_id: str):
+        tenant = self._tenant(tenant_id)
+        if tenant is not None and tenant[1] == 'SUSPENDED':
+            raise HTTPException(403, 'Tenant suspended')
+        if tenant is None or tenant[0] != 'DEDICATED':
+            return None
+        if (tenant[6] or '') < self.schema_version:
+            raise HTTPException(503, 'Tenant database migration pending')
+        return tenant
+
+    def database_url(self, tenant_id: str) -> URL:
+        # For the migration runner: always re-read, never refused for being behind.
+        tenant = self.refresh(tenant_id)
+        if tenant is None or tenant[0] != 'DEDICATED':
+            raise ValueError(f'{tenant_id} is not a dedicated tenant')
+        return self._url(tenant)
+
+    def _checkout(self, engines: OrderedDict, tenant_id: str, tenant, build_engine, build_sessionmaker):
+        now = time.monotonic()
+        with self._lock:
+            entry = engines.get(tenant_id)
+            if entry is None:
+                engine = build_engine(self._url(tenant), 'DEDICATED')
+                entry = [engine, build_sessionmaker(engine), now]
+                engines[tenant_id] = entry
+            entry[2] = now
+            engines.move_to_end(tenant_id)
+            return entry[1], self._evict_idle(engines, now)
+
+    def sessionmaker_for(self, tenant_id: str):
+        tenant = self._dedicated(tenant_id)
+        if tenant is None:
+            return SessionLocal
+        factory, evicted = self._checkout(self._engines, tenant_id, tenant, make_engine, make_sessionmaker)
+        # Checked-out connections stay valid; dispose only closes the idle ones.
+        for engine, _, _ in evicted:
+            engine.dispose()
+        return factory
+
+    def async_sessionmaker_for(self, tenant_id: str):
+        # Called on the event loop, so evicted async pools are closed in the background.
+        tenant = self._dedicated(tenant_id)
+        if tenant is None:
+            return AsyncSessionLocal
+        factory, evicted = self._checkout(
+            self._async_engines, tenant_id, tenant, make_async_engine, make_async_sessionmaker,
+        )
+        for engine, _, _ in evicted:
+            task = asyncio.get_running_loop().create_task(engine.dispose())
+            self._disposing.add(task)
+            task.add_done_callback(self._disposing.discard)
+        return factory
+
+    def dedicated_tenant_ids(self) -> list[str]:
+        with SessionLocal() as db:
+            return list(db.scalars(
+                select(Tenant.id).where(Tenant.tenant_type == 'DEDICATED', Tenant.status != 'SUSPENDED')
+            ))
+
+    async def dispose(self) -> None:
+        self._tenants.clear()
+        with self._lock:
+            entries = list(self._engines.values())
+            async_entries = list(self._async_engines.values())
+            self._engines.clear()
+            self._async_engines.clear()
+        for engine, _, _ in entries:
+            engine.dispose()
+        for engine, _, _ in async_entries:
+            await engine.dispose()
+
+
+tenant_router = TenantRouter(
+    settings.tenant_engine_cache_size,
+    settings.tenant_engine_idle_seconds,
+    settings.tenant_metadata_ttl_seconds,
+    settings.tenant_metadata_cache_size,
+)
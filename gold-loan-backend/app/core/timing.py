@@ -0,0 +1,179 @@
+import logging
+from contextvars import ContextVar
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.config.settings import settings
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Per-request timings. The middleware is the only writer of the HTTP series; SQL
+# statements are counted and timed into the request's RequestStats by engine
+# events, which also fire in the threadpool and inside AsyncSession.run_sync
+# (both copy the context).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+REQUEST_SECONDS = metrics.histogram(
+    'http_request_duration_seconds', 'Request latency by route template', LATENCY_BUCKETS, ('route', 'method'),
+)
+REQUESTS = metrics.labeled_counter(
+    'http_requests_total', 'Responses by route template and status', ('route', 'method', 'status'),
+)
+IN_FLIGHT = metrics.gauge('http_requests_in_flight', 'Requests currently being handled')
+REQUEST_DB_SECONDS = metrics.histogram(
+    'http_request_db_seconds', 'Time spent executing SQL per request', LATENCY_BUCKETS, ('route', 'method'),
+)
+REQUEST_STATEMENTS = metrics.histogram(
+    'http_request_db_statements', 'SQL statements executed per request', STATEMENT_BUCKETS, ('route', 'method'),
+)
+QUERY_BUDGET_EXCEEDED = metrics.labeled_counter(
+    'http_query_budget_exceeded_total', 'Requests over their SQL statement budget', ('route', 'method'),
+)
+POOL_WAIT_SECONDS = metrics.histogram(
+    'db_pool_checkout_seconds', 'Time to check a connection out of a pool, including any wait', WAIT_BUCKETS,
+)
+
+_request_stats: ContextVar['RequestStats | None'] = ContextVar('request_stats', default=None)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+class RequestStats:
+    __slots__ = ('status', 'db_seconds', 'statements', 'shapes', 'streaming', 'streamed')
+
+    def __init__(self):
+        self.status = 500
+        self.db_seconds = 0.0
+        self.statements = 0
+        # SQL text -> executions; parameters are bound, so the text is the statement's shape.
+        self.shapes = {}
+        # Set by outside_budget; statements from then on are timed but not budgeted.
+        self.streaming = False
+        self.streamed = 0
+
+    def repeated(self) -> tuple[str | None, int]:
+        if not self.shapes:
+            return None, 0
+        statement = max(self.shapes, key=self.shapes.get)
+        return statement, self.shapes[statement]
+
+
+def current_request() -> RequestStats | None:
+    return _request_stats.get()
+
+
+def outside_budget(body):
+    # For a StreamingResponse body: its statements grow with the size of the stream (a
+    # fixed few per chunk), so only the ones run before streaming count against the
+    # route's budget and repeat limit. Call it last, as the response is returned.
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.streaming = True
+    return body
+
+
+def check_budget(route: str, stats: RequestStats) -> str | None:
+    # Returns a description of the violation, or None when within budget.
+    budget = settings.query_budgets.get(route, settings.query_budget_default)
+    statements = stats.statements - stats.streamed
+    statement, repeats = stats.repeated()
+    if statements <= budget and repeats <= settings.query_repeat_limit:
+        return None
+    return (
+        f'{route} ran {statements} SQL statements (budget {budget}); '
+        f'most repeated ({repeats}x): {statement}'
+    )
+
+
+class TimingMiddleware:
+    # Pure ASGI, so streaming responses pass straight through; duration covers the
+    # whole body. Routes are labelled by template (scope['route'].path), never by raw path.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+
+        async def send_timed(message):
+            if message['type'] == 'http.response.start':
+                stats.status = message['status']
+            await send(message)
+
+        IN_FLIGHT.inc()
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            elapsed = perf_counter() - started
+            IN_FLIGHT.dec()
+            _request_stats.reset(token)
+            route = scope.get('route')
+            template = route.path if route is not None else 'unmatched'
+            method = scope['method']
+            REQUEST_SECONDS.labels(template, method).observe(elapsed)
+            REQUEST_DB_SECONDS.labels(template, method).observe(stats.db_seconds)
+            REQUEST_STATEMENTS.labels(template, method).observe(stats.statements)
+            REQUESTS.labels(template, method, stats.status).inc()
+        # Only for requests that completed; a failure is never masked by a budget error.
+        violation = check_budget(f'{method} {template}', stats)
+        if violation is not None:
+            QUERY_BUDGET_EXCEEDED.labels(template, method).inc()
+            if settings.query_budget_strict:
+                raise QueryBudgetExceeded(violation)
+            logger.warning(violation)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    # One statement at a time per connection; a failed one is simply overwritten.
+    conn.info['statement_started'] = perf_counter()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        if stats.streaming:
+            stats.streamed += 1
+        else:
+            stats.shapes[statement] = stats.shapes.get(statement, 0) + 1
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _statement_finished(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info.pop('statement_started')
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.db_seconds += elapsed
+
+
+class _TimedCheckout:
+    # With NullPool every checkout is a new connection, so this is the connect time.
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT_SECONDS.observe(perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    pass
@@ -1,3 +1,122 @@
+import hashlib
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class StubPurityModel:
+    # Local stand-in for the inference service: deterministic per jewel, with a
+    # per-call overhead plus a per-item cost so batching behaves like the real thing.
+    name = 'stub-purity-v1'
+
+    def __init__(self, call_overhead_ms: float = 0, per_item_ms: float = 0):
+        self.call_overhead_ms = call_overhead_ms
+        self.per_item_ms = per_item_ms
+
+    def __call__(self, items: list[tuple[str, int]]) -> list[dict]:
+        if self.call_overhead_ms or self.per_item_ms:
+            time.sleep((self.call_overhead_ms + self.per_item_ms * len(items)) / 1000)
+        results = []
+        for loan_id, jewel_index in items:
+            digest = hashlib.blake2b(f'{loan_id}:{jewel_index}'.encode(), digest_size=4).digest()
+            acid = digest[0] < 13
+            results.append({
+                'result': 'FAIL' if acid else 'PASS',
+                'confidence': round(0.80 + digest[1] / 255 * 0.19, 2),
+                'rubbing_stone_detected': True,
+                'rubbing_detected': True,
+                'acid_detected': acid,
+            })
+        return results
+
+
 class AIClient:
-    def run_purity(self, _loan_id: str) -> dict:
-        return {'result': 'PASS', 'confidence': 0.92}
+    def __init__(self, model=None):
+        self.model = model or StubPurityModel()
+
+    def run_purity_batch(self, items: list[tuple[str, int]]) -> list[dict]:
+        # One call for many (loan_id, jewel_index) pairs; results come back in the same order.
+        return self.model(items)
+
+    def run_purity(self, loan_id: str, jewel_index: int) -> dict:
+        return self.run_purity_batch([(loan_id, jewel_index)])[0]
+
+
+def run_purity_batch(items: list[tuple[str, int]]) -> list[dict]:
+    # Module-level so a ProcessPoolExecutor can pickle it.
+    return AIClient().run_purity_batch(items)
+
+
+class PurityBatcher:
+    # Collects per-jewel requests from any loan or tenant, sends up to max_batch_size
+    # of them as one batched call once the batch is full or max_wait_ms has passed,
+    # and resolves each caller's Future with its own result.
+    def __init__(self, executor, run_batch=run_purity_batch, max_batch_size: int = 32, max_wait_ms: int = 10):
+        self.executor = executor
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='purity-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, loan_id: str, jewel_index: int) -> Future:
+        future = Future()
+        self._queue.put(((loan_id, jewel_index), future))
+        return future
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            request = self._queue.get()
+            if request is _STOP:
+                return
+            batch = [request]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is _STOP:
+                    stop = True
+                    break
+                batch.append(request)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: list) -> None:
+        waiters = [future for _, future in batch]
+        try:
+            call = self.executor.submit(self.run_batch, [item for item, _ in batch])
+        except Exception as ex:
+            for future in waiters:
+                future.set_exception(ex)
+            return
+        call.add_done_callback(partial(self._route, waiters))
+
+    def _route(self, waiters: list[Future], call: Future) -> None:
+        try:
+            results = call.result()
+            if len(results) != len(waiters):
+                raise RuntimeError(f'batch returned {len(results)} results for {len(waiters)} items')
+        except Exception as ex:
+            logger.exception('purity batch of %s items failed', len(waiters))
+            for future in waiters:
+                future.set_exception(ex)
+            return
+        for future, result in zip(waiters, results):
+            future.set_result(result)
@@ -1,3 +1,79 @@
+import hashlib
+import hmac
+from datetime import datetime, timezone
+from urllib.parse import quote, urlsplit
+from urllib.request import urlopen
+from app.config.settings import settings
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+
 class S3Client:
-    def presigned_upload_url(self, image_id: str) -> str:
-        return f'https://s3-presigned/{image_id}'
+    # Presigned URLs are SigV4 query-string signatures computed locally: issuing one
+    # needs the credentials only, never a network call.
+    def __init__(self, bucket: str | None = None, region: str | None = None, access_key_id: str | None = None,
+                 secret_access_key: str | None = None, endpoint_url: str | None = None):
+        self.bucket = bucket or settings.s3_bucket
+        self.region = region or settings.s3_region
+        self.access_key_id = access_key_id or settings.s3_access_key_id
+        self.secret_access_key = secret_access_key or settings.s3_secret_access_key
+        self.endpoint_url = endpoint_url if endpoint_url is not None else settings.s3_endpoint_url
+        self._signing_keys = {}
+
+    def _signing_key(self, datestamp: str) -> bytes:
+        key = self._signing_keys.get(datestamp)
+        if key is None:
+            key = _hmac(f'AWS4{self.secret_access_key}'.encode(), datestamp)
+            for part in (self.region, 's3', 'aws4_request'):
+                key = _hmac(key, part)
+            self._signing_keys = {datestamp: key}
+        return key
+
+    def _location(self, key: str) -> tuple[str, str, str]:
+        if self.endpoint_url:
+            # S3-compatible endpoints (Supabase Storage, MinIO) use path-style addressing.
+            parts = urlsplit(self.endpoint_url)
+            return parts.scheme, parts.netloc, f'/{self.bucket}/{quote(key, safe="/~")}'
+        return 'https', f'{self.bucket}.s3.{self.region}.amazonaws.com', f'/{quote(key, safe="/~")}'
+
+    def presign(self, method: str, key: str, expires_seconds: int, headers: dict | None = None,
+                now: datetime | None = None) -> str:
+        now = now or datetime.now(timezone.utc)
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        datestamp = amz_date[:8]
+        scheme, host, path = self._location(key)
+        scope = f'{datestamp}/{self.region}/s3/aws4_request'
+        signed = {'host': host} | {name.lower(): value.strip() for name, value in (headers or {}).items()}
+        signed_headers = ';'.join(sorted(signed))
+        query = {
+            'X-Amz-Algorithm': 'AWS4-HMAC-SHA256',
+            'X-Amz-Credential': f'{self.access_key_id}/{scope}',
+            'X-Amz-Date': amz_date,
+            'X-Amz-Expires': str(expires_seconds),
+            'X-Amz-SignedHeaders': signed_headers,
+        }
+        canonical_query = '&'.join(f'{quote(k, safe="~")}={quote(v, safe="~")}' for k, v in sorted(query.items()))
+        canonical_request = '\n'.join([
+            method,
+            path,
+            canonical_query,
+            ''.join(f'{name}:{signed[name]}\n' for name in sorted(signed)),
+            signed_headers,
+            'UNSIGNED-PAYLOAD',
+        ])
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256', amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest(),
+        ])
+        signature = hmac.new(self._signing_key(datestamp), string_to_sign.encode(), hashlib.sha256).hexdigest()
+        return f'{scheme}://{host}{path}?{canonical_query}&X-Amz-Signature={signature}'
+
+    def presigned_upload_url(self, key: str, content_type: str | None = None) -> str:
+        # Content-Type is signed when known, so the upload must match what was declared.
+        headers = {'Content-Type': content_type} if content_type else None
+        return self.presign('PUT', key, settings.s3_upload_url_ttl_seconds, headers)
+
+    def open_object(self, key: str, timeout: float = 30):
+        # A streaming response: callers read it in chunks rather than all at once.
+        return urlopen(self.presign('GET', key, 60), timeout=timeout)
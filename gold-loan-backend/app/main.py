@@ -1,16 +1,31 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from app.api import auth, appraisers, customers, loans, compliance, purity, images, summary, audit, system
+from app.api import auth, appraisers, customers, loans, compliance, purity, images, summary, audit, exports, system
 from app.config.logging_config import setup_logging
 from app.config.settings import settings
-from app.core.database import Base, engine
+from app.core.database import engine, replicas
 from app.core.exceptions import http_exception_handler
 from app.core.middleware import register_middleware
+from app.core.migrations import prepare_schema
+from app.core.tenant_router import tenant_router
+from app.workers.audit_worker import writer as audit_writer
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    audit_writer.start()
+    replicas.start()
+    yield
+    audit_writer.close()
+    await replicas.dispose()
+    await tenant_router.dispose()
 
 
 def create_app() -> FastAPI:
     setup_logging()
-    app = FastAPI(title=settings.app_name, version='v1')
+    app = FastAPI(title=settings.app_name, version='v1', lifespan=lifespan)
     register_middleware(app)
     app.add_exception_handler(Exception, http_exception_handler)
 
@@ -20,12 +35,14 @@ def create_app() -> FastAPI:
     app.include_router(loans.router, prefix=settings.api_prefix)
     app.include_router(compliance.router, prefix=settings.api_prefix)
     app.include_router(purity.router, prefix=settings.api_prefix)
+    app.include_router(purity.jobs_router, prefix=settings.api_prefix)
     app.include_router(images.router, prefix=settings.api_prefix)
     app.include_router(summary.router, prefix=settings.api_prefix)
     app.include_router(audit.router, prefix=settings.api_prefix)
+    app.include_router(exports.router, prefix=settings.api_prefix)
     app.include_router(system.router, prefix=settings.api_prefix)
 
-    Base.metadata.create_all(bind=engine)
+    prepare_schema(engine)
     return app
 
 
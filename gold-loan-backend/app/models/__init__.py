@@ -1,3 +1,4 @@
+from app.models.tenant import Tenant
 from app.models.bank import Bank
 from app.models.branch import Branch
 from app.models.user import UserAccount
@@ -5,14 +6,14 @@ from app.models.appraiser import Appraiser
 from app.models.customer import Customer
 from app.models.loan import Loan
 from app.models.compliance import RbiCompliance, RbiComplianceItem
-from app.models.purity import PurityTest
+from app.models.purity import PurityTest, PurityJob
 from app.models.image import Image
 from app.models.summary import LoanSummary
 from app.models.audit import AuditLog
 from app.models.idempotency import IdempotencyRecord
 
 __all__ = [
-    'Bank', 'Branch', 'UserAccount', 'Appraiser', 'Customer', 'Loan',
-    'RbiCompliance', 'RbiComplianceItem', 'PurityTest', 'Image', 'LoanSummary',
+    'Tenant', 'Bank', 'Branch', 'UserAccount', 'Appraiser', 'Customer', 'Loan',
+    'RbiCompliance', 'RbiComplianceItem', 'PurityTest', 'PurityJob', 'Image', 'LoanSummary',
     'AuditLog', 'IdempotencyRecord'
 ]
@@ -1,18 +1,18 @@
 import uuid
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, DateTime
+from sqlalchemy import String, DateTime, ForeignKey, Uuid
 from app.core.database import Base
 
 class Appraiser(Base):
     __tablename__ = 'appraiser'
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id: Mapped[str] = mapped_column(String, index=True)
+    id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), index=True)
     name: Mapped[str] = mapped_column(String)
     email: Mapped[str] = mapped_column(String)
     phone: Mapped[str] = mapped_column(String)
-    branch_id: Mapped[str] = mapped_column(String)
+    branch_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), ForeignKey('branch.id'))
     appraiser_code: Mapped[str] = mapped_column(String, unique=True)
-    face_image_id: Mapped[str] = mapped_column(String)
+    face_image_id: Mapped[str] = mapped_column(Uuid(as_uuid=False))
     status: Mapped[str] = mapped_column(String, default='ACTIVE')
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
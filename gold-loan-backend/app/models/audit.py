@@ -1,15 +1,20 @@
 import uuid
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, DateTime, Text
+from sqlalchemy import String, DateTime, Index, JSON, Uuid
+from sqlalchemy.dialects.postgresql import JSONB
 from app.core.database import Base
 
 class AuditLog(Base):
     __tablename__ = 'audit_log'
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id: Mapped[str] = mapped_column(String, index=True)
+    __table_args__ = (
+        Index('idx_audit_entity', 'tenant_id', 'entity_type', 'entity_id', 'created_at', 'id'),
+        Index('idx_audit_tenant_created', 'tenant_id', 'created_at', 'id'),
+    )
+    id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(Uuid(as_uuid=False))
     action: Mapped[str] = mapped_column(String)
     entity_type: Mapped[str] = mapped_column(String)
-    entity_id: Mapped[str] = mapped_column(String)
-    metadata: Mapped[str] = mapped_column(Text, default='{}')
+    entity_id: Mapped[str] = mapped_column(Uuid(as_uuid=False))
+    metadata_json: Mapped[dict] = mapped_column('metadata', JSON().with_variant(JSONB(), 'postgresql'), default=dict)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -1,14 +1,14 @@
 import uuid
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, DateTime
+from sqlalchemy import String, DateTime, ForeignKey, Uuid
 from app.core.database import Base
 
 class Branch(Base):
     __tablename__ = 'branch'
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id: Mapped[str] = mapped_column(String, index=True)
-    bank_id: Mapped[str] = mapped_column(String)
+    id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), index=True)
+    bank_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), ForeignKey('bank.id'))
     branch_code: Mapped[str] = mapped_column(String)
     branch_name: Mapped[str] = mapped_column(String)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -1,22 +1,33 @@
 import uuid
 from datetime import datetime
-from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Integer, DateTime
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import Integer, DateTime, Index, ForeignKey, Uuid
 from app.core.database import Base
 
 class RbiCompliance(Base):
     __tablename__ = 'rbi_compliance'
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id: Mapped[str] = mapped_column(String, index=True)
-    loan_id: Mapped[str] = mapped_column(String)
+    __table_args__ = (
+        Index('idx_compliance_loan', 'tenant_id', 'loan_id', 'created_at'),
+    )
+    id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), index=True)
+    loan_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), ForeignKey('loan.id'))
     total_jewel_count: Mapped[int] = mapped_column(Integer)
-    overall_image_id: Mapped[str] = mapped_column(String)
+    overall_image_id: Mapped[str] = mapped_column(Uuid(as_uuid=False))
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    items = relationship(
+        'RbiComplianceItem', primaryjoin='RbiCompliance.id == foreign(RbiComplianceItem.compliance_id)',
+        order_by='RbiComplianceItem.jewel_index', viewonly=True, lazy='raise',
+    )
 
 class RbiComplianceItem(Base):
     __tablename__ = 'rbi_compliance_item'
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id: Mapped[str] = mapped_column(String, index=True)
-    compliance_id: Mapped[str] = mapped_column(String)
+    __table_args__ = (
+        # Also serves the deferred item-count trigger as an index-only lookup.
+        Index('uq_compliance_item_jewel', 'compliance_id', 'jewel_index', unique=True),
+    )
+    id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), index=True)
+    compliance_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), ForeignKey('rbi_compliance.id'))
     jewel_index: Mapped[int] = mapped_column(Integer)
-    jewel_image_id: Mapped[str] = mapped_column(String)
+    jewel_image_id: Mapped[str] = mapped_column(Uuid(as_uuid=False))
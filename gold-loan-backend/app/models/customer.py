@@ -1,14 +1,14 @@
 import uuid
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, DateTime
+from sqlalchemy import String, DateTime, Uuid
 from app.core.database import Base
 
 class Customer(Base):
     __tablename__ = 'customer'
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id: Mapped[str] = mapped_column(String, index=True)
+    id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), index=True)
     customer_code: Mapped[str] = mapped_column(String)
     name: Mapped[str] = mapped_column(String)
-    face_image_id: Mapped[str] = mapped_column(String)
+    face_image_id: Mapped[str] = mapped_column(Uuid(as_uuid=False))
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
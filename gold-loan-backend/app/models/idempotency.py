@@ -1,17 +1,21 @@
 import uuid
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, DateTime, Text, UniqueConstraint
+from sqlalchemy import String, DateTime, Integer, LargeBinary, UniqueConstraint, Uuid
 from app.core.database import Base
 
 class IdempotencyRecord(Base):
     __tablename__ = 'idempotency_record'
     __table_args__ = (UniqueConstraint('tenant_id', 'key', 'endpoint', name='uq_idempotency'),)
 
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id: Mapped[str] = mapped_column(String, index=True)
+    id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), index=True)
     key: Mapped[str] = mapped_column(String)
     endpoint: Mapped[str] = mapped_column(String)
     request_hash: Mapped[str] = mapped_column(String)
-    response_payload: Mapped[str] = mapped_column(Text)
+    status_code: Mapped[int] = mapped_column(Integer, default=200)
+    # Exact response bytes (gzip when content_encoding is set); NULL while the first request is still running
+    response_body: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    content_encoding: Mapped[str | None] = mapped_column(String, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True)
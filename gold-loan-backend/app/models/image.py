@@ -1,14 +1,23 @@
 import uuid
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, DateTime
+from sqlalchemy import String, BigInteger, DateTime, Index, text, Uuid
 from app.core.database import Base
 
 class Image(Base):
     __tablename__ = 'image'
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id: Mapped[str] = mapped_column(String, index=True)
+    __table_args__ = (
+        # Content-addressed lookup; only verified objects may be reused.
+        Index('idx_image_content', 'tenant_id', 'file_hash', 'file_size',
+              postgresql_where=text('verified_at IS NOT NULL'), sqlite_where=text('verified_at IS NOT NULL')),
+    )
+    id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), index=True)
     s3_bucket: Mapped[str] = mapped_column(String)
     s3_key: Mapped[str] = mapped_column(String)
+    file_hash: Mapped[str | None] = mapped_column(String, nullable=True)
+    file_size: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    mime_type: Mapped[str | None] = mapped_column(String, nullable=True)
     image_type: Mapped[str] = mapped_column(String)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    verified_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -1,17 +1,51 @@
 import uuid
 from datetime import datetime
-from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import String, DateTime, Index, text, ForeignKey, Uuid
 from app.core.database import Base
 
+
+def new_loan_number() -> str:
+    # Customer-facing reference, e.g. GL-20250301-3F9A0C12B4E7; the id stays the key.
+    return f'GL-{datetime.utcnow():%Y%m%d}-{uuid.uuid4().hex[:12].upper()}'
+
 class Loan(Base):
     __tablename__ = 'loan'
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id: Mapped[str] = mapped_column(String, index=True)
-    customer_id: Mapped[str] = mapped_column(String)
-    appraiser_id: Mapped[str] = mapped_column(String)
-    bank_id: Mapped[str] = mapped_column(String)
-    branch_id: Mapped[str] = mapped_column(String)
+    # Covering keyset indexes for GET /loans: the listed columns ride in INCLUDE so a page is index-only.
+    __table_args__ = (
+        Index('idx_loan_tenant_created', 'tenant_id', 'created_at', 'id',
+              postgresql_include=['status', 'branch_id', 'appraiser_id', 'customer_id', 'completed_at']),
+        Index('idx_loan_branch_created', 'tenant_id', 'branch_id', 'created_at', 'id',
+              postgresql_include=['status', 'appraiser_id', 'customer_id', 'completed_at']),
+        # Regulatory export walks completed loans by completion time.
+        Index('idx_loan_tenant_completed', 'tenant_id', 'completed_at', 'id',
+              postgresql_where=text("status = 'COMPLETED'"), sqlite_where=text("status = 'COMPLETED'")),
+    )
+    id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(Uuid(as_uuid=False))
+    loan_number: Mapped[str] = mapped_column(String, unique=True, default=new_loan_number)
+    customer_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), ForeignKey('customer.id'))
+    appraiser_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), ForeignKey('appraiser.id'))
+    bank_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), ForeignKey('bank.id'))
+    branch_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), ForeignKey('branch.id'))
     status: Mapped[str] = mapped_column(String, default='CREATED')
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     completed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    # Read-only joins for the completion summary; lazy='raise' keeps them out of hot paths.
+    customer = relationship(
+        'Customer', primaryjoin='and_(foreign(Loan.customer_id) == Customer.id, foreign(Loan.tenant_id) == Customer.tenant_id)',
+        viewonly=True, lazy='raise',
+    )
+    appraiser = relationship(
+        'Appraiser', primaryjoin='and_(foreign(Loan.appraiser_id) == Appraiser.id, foreign(Loan.tenant_id) == Appraiser.tenant_id)',
+        viewonly=True, lazy='raise',
+    )
+    compliances = relationship(
+        'RbiCompliance', primaryjoin='and_(Loan.id == foreign(RbiCompliance.loan_id), Loan.tenant_id == foreign(RbiCompliance.tenant_id))',
+        order_by='RbiCompliance.created_at', viewonly=True, lazy='raise',
+    )
+    purity_tests = relationship(
+        'PurityTest', primaryjoin='and_(Loan.id == foreign(PurityTest.loan_id), Loan.tenant_id == foreign(PurityTest.tenant_id))',
+        order_by='[PurityTest.jewel_index, PurityTest.created_at]', viewonly=True, lazy='raise',
+    )
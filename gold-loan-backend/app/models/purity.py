@@ -1,15 +1,42 @@
 import uuid
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Integer, Float, DateTime
+from sqlalchemy import String, Integer, Float, Boolean, DateTime, Text, Index, ForeignKey, Uuid, text
 from app.core.database import Base
 
 class PurityTest(Base):
     __tablename__ = 'purity_test'
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id: Mapped[str] = mapped_column(String, index=True)
-    loan_id: Mapped[str] = mapped_column(String)
+    __table_args__ = (
+        # One result per jewel of a loan; also serves the per-loan reads.
+        Index('uq_purity_test_jewel', 'tenant_id', 'loan_id', 'jewel_index', unique=True),
+    )
+    id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), index=True)
+    loan_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), ForeignKey('loan.id'))
     jewel_index: Mapped[int] = mapped_column(Integer)
+    rubbing_stone_detected: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    rubbing_detected: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    acid_detected: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
     result: Mapped[str] = mapped_column(String)
     confidence_score: Mapped[float] = mapped_column(Float)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class PurityJob(Base):
+    __tablename__ = 'purity_job'
+    __table_args__ = (
+        Index('idx_purity_job_claim', 'status', 'created_at'),
+        Index('idx_purity_job_loan', 'tenant_id', 'loan_id'),
+        # At most one live job per loan, however many triggers race.
+        Index('uq_purity_job_active', 'tenant_id', 'loan_id', unique=True,
+              postgresql_where=text("status <> 'FAILED'"), sqlite_where=text("status <> 'FAILED'")),
+    )
+    id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(Uuid(as_uuid=False))
+    loan_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), ForeignKey('loan.id'))
+    jewel_count: Mapped[int] = mapped_column(Integer)
+    status: Mapped[str] = mapped_column(String, default='QUEUED')
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -1,13 +1,14 @@
 import uuid
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, DateTime, Text
+from sqlalchemy import DateTime, JSON, ForeignKey, Uuid
+from sqlalchemy.dialects.postgresql import JSONB
 from app.core.database import Base
 
 class LoanSummary(Base):
     __tablename__ = 'loan_summary'
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id: Mapped[str] = mapped_column(String, index=True)
-    loan_id: Mapped[str] = mapped_column(String, unique=True)
-    snapshot_json: Mapped[str] = mapped_column(Text)
+    id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), index=True)
+    loan_id: Mapped[str] = mapped_column(Uuid(as_uuid=False), ForeignKey('loan.id'), unique=True)
+    snapshot_json: Mapped[dict] = mapped_column(JSON().with_variant(JSONB(), 'postgresql'))
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
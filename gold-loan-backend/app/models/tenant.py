@@ -0,0 +1,20 @@
+import uuid
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, DateTime, Text, Uuid
+from app.core.database import Base
+
+class Tenant(Base):
+    # Control-plane registry; lives only in the shared (SUPABASE_DB_URL) database.
+    __tablename__ = 'tenant'
+    id: Mapped[str] = mapped_column(Uuid(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    bank_name: Mapped[str] = mapped_column(String)
+    tenant_type: Mapped[str] = mapped_column(String, default='SHARED')
+    db_host: Mapped[str | None] = mapped_column(String, nullable=True)
+    db_port: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    db_name: Mapped[str | None] = mapped_column(String, nullable=True)
+    db_user: Mapped[str | None] = mapped_column(String, nullable=True)
+    db_password_enc: Mapped[str | None] = mapped_column(Text, nullable=True)
+    schema_version: Mapped[str | None] = mapped_column(String, nullable=True)
+    status: Mapped[str] = mapped_column(String, default='ACTIVE')
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
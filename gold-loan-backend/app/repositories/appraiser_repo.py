@@ -5,8 +5,7 @@ class AppraiserRepository:
     def create(self, db: Session, tenant_id: str, payload: dict) -> Appraiser:
         rec = Appraiser(tenant_id=tenant_id, **payload)
         db.add(rec)
-        db.commit()
-        db.refresh(rec)
+        db.flush()
         return rec
 
     def list(self, db: Session, tenant_id: str):
@@ -1,11 +1,46 @@
-import json
+from sqlalchemy import Text, and_, cast, insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from app.models.audit import AuditLog
 
+_COLUMNS = (AuditLog.id, AuditLog.action, AuditLog.entity_type, AuditLog.entity_id, AuditLog.metadata_json, AuditLog.created_at)
+# The stream writes metadata out verbatim, so it is read as JSON text rather than decoded.
+_STREAM_COLUMNS = _COLUMNS[:4] + (cast(AuditLog.metadata_json, Text).label('metadata_json'), AuditLog.created_at)
+
 class AuditRepository:
     def write(self, db: Session, tenant_id: str, action: str, entity_type: str, entity_id: str, metadata: dict | None = None):
-        db.add(AuditLog(tenant_id=tenant_id, action=action, entity_type=entity_type, entity_id=entity_id, metadata=json.dumps(metadata or {})))
-        db.commit()
+        db.add(AuditLog(tenant_id=tenant_id, action=action, entity_type=entity_type, entity_id=entity_id, metadata_json=metadata or {}))
+
+    def write_many(self, db: Session, rows: list[dict], skip_existing: bool = False):
+        # One multi-row INSERT (insertmanyvalues) for the whole batch; skip_existing
+        # ignores rows whose id is already stored.
+        stmt = insert(AuditLog)
+        if skip_existing:
+            dialect = postgresql if db.get_bind().dialect.name == 'postgresql' else sqlite
+            stmt = dialect.insert(AuditLog).on_conflict_do_nothing(index_elements=[AuditLog.id])
+        db.execute(stmt, rows)
+
+    def query(self, tenant_id: str, filters: dict, after: tuple | None = None, columns: tuple = _COLUMNS):
+        # Ordered by (created_at, id) so it walks idx_audit_entity / idx_audit_tenant_created.
+        stmt = select(*columns).where(AuditLog.tenant_id == tenant_id)
+        for name in ('entity_type', 'entity_id', 'action'):
+            if filters.get(name) is not None:
+                stmt = stmt.where(getattr(AuditLog, name) == filters[name])
+        if filters.get('since') is not None:
+            stmt = stmt.where(AuditLog.created_at >= filters['since'])
+        if filters.get('until') is not None:
+            stmt = stmt.where(AuditLog.created_at < filters['until'])
+        if after is not None:
+            created_at, row_id = after
+            stmt = stmt.where(or_(
+                AuditLog.created_at > created_at,
+                and_(AuditLog.created_at == created_at, AuditLog.id > row_id),
+            ))
+        return stmt.order_by(AuditLog.created_at, AuditLog.id)
+
+    def page(self, db: Session, tenant_id: str, filters: dict, after: tuple | None, limit: int):
+        return db.execute(self.query(tenant_id, filters, after).limit(limit)).all()
 
-    def list(self, db: Session, tenant_id: str, entity_type: str, entity_id: str):
-        return db.query(AuditLog).filter_by(tenant_id=tenant_id, entity_type=entity_type, entity_id=entity_id).all()
+    def stream(self, db: Session, tenant_id: str, filters: dict, after: tuple | None, chunk_size: int):
+        # Server-side cursor: rows arrive chunk_size at a time instead of all at once.
+        return db.execute(self.query(tenant_id, filters, after, _STREAM_COLUMNS).execution_options(yield_per=chunk_size))
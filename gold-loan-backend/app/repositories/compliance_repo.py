@@ -1,5 +1,7 @@
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 from app.models.compliance import RbiCompliance, RbiComplianceItem
+from app.models.image import Image
 
 class ComplianceRepository:
     def create(self, db: Session, tenant_id: str, loan_id: str, payload: dict):
@@ -11,12 +13,28 @@ class ComplianceRepository:
         )
         db.add(rec)
         db.flush()
-        for item in payload['jewel_images']:
-            db.add(RbiComplianceItem(
-                tenant_id=tenant_id,
-                compliance_id=rec.id,
-                jewel_index=item['index'],
-                jewel_image_id=item['image_id'],
-            ))
-        db.commit()
+        # One multi-row INSERT (insertmanyvalues) instead of an ORM object per jewel.
+        db.execute(insert(RbiComplianceItem), [
+            {
+                'tenant_id': tenant_id,
+                'compliance_id': rec.id,
+                'jewel_index': item['index'],
+                'jewel_image_id': item['image_id'],
+            }
+            for item in payload['jewel_images']
+        ])
         return rec
+
+    def items_for_loans(self, db: Session, tenant_id: str, loan_ids: list[str]):
+        # Every capture's items for a chunk of loans, latest capture last per loan.
+        return db.execute(
+            select(
+                RbiCompliance.loan_id, RbiCompliance.id.label('compliance_id'), RbiCompliance.total_jewel_count,
+                RbiCompliance.overall_image_id, RbiComplianceItem.jewel_index, RbiComplianceItem.jewel_image_id,
+                Image.s3_key,
+            )
+            .join(RbiComplianceItem, RbiComplianceItem.compliance_id == RbiCompliance.id)
+            .outerjoin(Image, Image.id == RbiComplianceItem.jewel_image_id)
+            .where(RbiCompliance.tenant_id == tenant_id, RbiCompliance.loan_id.in_(loan_ids))
+            .order_by(RbiCompliance.loan_id, RbiCompliance.created_at, RbiComplianceItem.jewel_index)
+        ).all()
@@ -1 +1,35 @@
-# Placeholder repository for future extension
+from datetime import datetime
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.orm import Session
+from app.models.image import Image
+
+class ImageRepository:
+    def create_many(self, db: Session, rows: list[dict]):
+        # One multi-row INSERT for every image of the request.
+        db.execute(insert(Image), rows)
+
+    def get(self, db: Session, tenant_id: str, image_id: str):
+        return db.execute(
+            select(Image.id, Image.s3_key, Image.file_hash, Image.file_size, Image.verified_at)
+            .where(Image.tenant_id == tenant_id, Image.id == image_id)
+        ).first()
+
+    def find_verified(self, db: Session, tenant_id: str, contents: list[tuple[str, int]]) -> dict:
+        # (file_hash, file_size) -> image_id for already verified uploads, via idx_image_content.
+        rows = db.execute(
+            select(Image.file_hash, Image.file_size, Image.id)
+            .where(
+                Image.tenant_id == tenant_id,
+                Image.verified_at.is_not(None),
+                tuple_(Image.file_hash, Image.file_size).in_(contents),
+            )
+        )
+        return {(file_hash, file_size): image_id for file_hash, file_size, image_id in rows}
+
+    def mark_verified(self, db: Session, tenant_id: str, image_id: str, file_hash: str, file_size: int):
+        db.execute(
+            update(Image)
+            .where(Image.tenant_id == tenant_id, Image.id == image_id)
+            .values(file_hash=file_hash, file_size=file_size, verified_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
@@ -1,13 +1,99 @@
+import uuid
+from datetime import datetime
+from typing import NamedTuple
+from sqlalchemy import and_, insert, or_, select, update
 from sqlalchemy.orm import Session
-from app.models.loan import Loan
+from app.models.loan import Loan, new_loan_number
+
+
+class LoanHeader(NamedTuple):
+    id: str
+    status: str
+    customer_id: str
+    appraiser_id: str
+    completed_at: datetime | None
+
+
+_HEADER_COLUMNS = (Loan.id, Loan.status, Loan.customer_id, Loan.appraiser_id, Loan.completed_at)
+_COLUMNS = (Loan.id, Loan.status, Loan.customer_id, Loan.appraiser_id, Loan.branch_id, Loan.created_at, Loan.completed_at)
+_EXPORT_COLUMNS = (
+    Loan.id, Loan.customer_id, Loan.appraiser_id, Loan.bank_id, Loan.branch_id, Loan.created_at, Loan.completed_at,
+)
 
 class LoanRepository:
     def create(self, db: Session, tenant_id: str, payload: dict) -> Loan:
         rec = Loan(tenant_id=tenant_id, **payload)
         db.add(rec)
-        db.commit()
-        db.refresh(rec)
+        db.flush()
         return rec
 
-    def get(self, db: Session, tenant_id: str, loan_id: str):
-        return db.query(Loan).filter_by(tenant_id=tenant_id, id=loan_id).first()
+    def new_row(self, tenant_id: str, payload: dict) -> dict:
+        # Column defaults applied up front, so a batch knows every id before it inserts.
+        return {
+            'id': str(uuid.uuid4()),
+            'tenant_id': tenant_id,
+            'loan_number': new_loan_number(),
+            'status': 'CREATED',
+            'created_at': datetime.utcnow(),
+            **payload,
+        }
+
+    def create_many(self, db: Session, rows: list[dict]) -> None:
+        # One multi-row INSERT (insertmanyvalues) for the whole batch.
+        db.execute(insert(Loan), rows)
+
+    def get_header(self, db: Session, tenant_id: str, loan_id: str) -> LoanHeader | None:
+        row = db.execute(
+            select(*_HEADER_COLUMNS)
+            .where(Loan.tenant_id == tenant_id, Loan.id == loan_id)
+        ).first()
+        return LoanHeader(*row) if row else None
+
+    def transition(self, db: Session, tenant_id: str, loan_id: str, values: dict) -> bool:
+        # Guarded so a completed loan never changes, whatever a cached header said;
+        # trg_prevent_completed_loan_update enforces the same in the database.
+        result = db.execute(
+            update(Loan)
+            .where(Loan.tenant_id == tenant_id, Loan.id == loan_id, Loan.status != 'COMPLETED')
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    def query(self, tenant_id: str, filters: dict, after: tuple | None = None):
+        # Newest first on (created_at, id) so it walks idx_loan_branch_created / idx_loan_tenant_created backwards.
+        stmt = select(*_COLUMNS).where(Loan.tenant_id == tenant_id)
+        for name in ('status', 'branch_id', 'appraiser_id'):
+            if filters.get(name) is not None:
+                stmt = stmt.where(getattr(Loan, name) == filters[name])
+        if filters.get('since') is not None:
+            stmt = stmt.where(Loan.created_at >= filters['since'])
+        if filters.get('until') is not None:
+            stmt = stmt.where(Loan.created_at < filters['until'])
+        if after is not None:
+            created_at, row_id = after
+            stmt = stmt.where(or_(
+                Loan.created_at < created_at,
+                and_(Loan.created_at == created_at, Loan.id < row_id),
+            ))
+        return stmt.order_by(Loan.created_at.desc(), Loan.id.desc())
+
+    def page(self, db: Session, tenant_id: str, filters: dict, after: tuple | None, limit: int):
+        return db.execute(self.query(tenant_id, filters, after).limit(limit)).all()
+
+    def stream_completed(self, db: Session, tenant_id: str, filters: dict, after: tuple | None, chunk_size: int):
+        # Oldest completion first on (completed_at, id) via idx_loan_tenant_completed;
+        # server-side cursor, so rows arrive chunk_size at a time.
+        stmt = select(*_EXPORT_COLUMNS).where(Loan.tenant_id == tenant_id, Loan.status == 'COMPLETED')
+        if filters.get('since') is not None:
+            stmt = stmt.where(Loan.completed_at >= filters['since'])
+        if filters.get('until') is not None:
+            stmt = stmt.where(Loan.completed_at < filters['until'])
+        if after is not None:
+            completed_at, row_id = after
+            stmt = stmt.where(or_(
+                Loan.completed_at > completed_at,
+                and_(Loan.completed_at == completed_at, Loan.id > row_id),
+            ))
+        stmt = stmt.order_by(Loan.completed_at, Loan.id).execution_options(yield_per=chunk_size)
+        return db.execute(stmt)
@@ -1,16 +1,84 @@
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from app.models.purity import PurityTest
+from app.models.compliance import RbiCompliance
+from app.models.purity import PurityJob, PurityTest
 
 class PurityRepository:
-    def upsert_default(self, db: Session, tenant_id: str, loan_id: str):
-        row = db.query(PurityTest).filter_by(tenant_id=tenant_id, loan_id=loan_id).first()
-        if row:
-            return row
-        row = PurityTest(tenant_id=tenant_id, loan_id=loan_id, jewel_index=1, result='PASS', confidence_score=0.92)
-        db.add(row)
-        db.commit()
-        db.refresh(row)
-        return row
+    def jewel_count(self, db: Session, tenant_id: str, loan_id: str) -> int | None:
+        return db.scalar(
+            select(RbiCompliance.total_jewel_count)
+            .where(RbiCompliance.tenant_id == tenant_id, RbiCompliance.loan_id == loan_id)
+            .order_by(RbiCompliance.created_at.desc())
+            .limit(1)
+        )
+
+    def active_job(self, db: Session, tenant_id: str, loan_id: str):
+        return db.query(PurityJob).filter(
+            PurityJob.tenant_id == tenant_id,
+            PurityJob.loan_id == loan_id,
+            PurityJob.status != 'FAILED',
+        ).first()
+
+    def create_job(self, db: Session, tenant_id: str, loan_id: str, jewel_count: int):
+        # Returns the new job id, or None when the loan already has a live job (uq_purity_job_active).
+        insert = postgresql.insert if db.get_bind().dialect.name == 'postgresql' else sqlite.insert
+        return db.scalar(
+            insert(PurityJob)
+            .values(id=str(uuid.uuid4()), tenant_id=tenant_id, loan_id=loan_id, jewel_count=jewel_count,
+                    status='QUEUED', attempts=0, created_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=[PurityJob.tenant_id, PurityJob.loan_id],
+                                    index_where=PurityJob.status != 'FAILED')
+            .returning(PurityJob.id)
+        )
+
+    def get_job(self, db: Session, tenant_id: str, job_id: str):
+        return db.query(PurityJob).filter_by(tenant_id=tenant_id, id=job_id).first()
+
+    def claim_jobs(self, db: Session, batch_size: int, timeout_seconds: int):
+        # SKIP LOCKED lets any number of workers claim disjoint batches; a job left
+        # PROCESSING past the timeout (worker died) is claimed again.
+        now = datetime.utcnow()
+        claimable = (
+            select(PurityJob.id)
+            .where(or_(
+                PurityJob.status == 'QUEUED',
+                (PurityJob.status == 'PROCESSING') & (PurityJob.started_at < now - timedelta(seconds=timeout_seconds)),
+            ))
+            .order_by(PurityJob.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        return db.execute(
+            update(PurityJob)
+            .where(PurityJob.id.in_(claimable.scalar_subquery()))
+            .values(status='PROCESSING', started_at=now, attempts=PurityJob.attempts + 1)
+            .returning(PurityJob.id, PurityJob.tenant_id, PurityJob.loan_id, PurityJob.jewel_count, PurityJob.attempts)
+            .execution_options(synchronize_session=False)
+        ).all()
+
+    def finish_job(self, db: Session, job, status: str, error: str | None = None) -> bool:
+        # Only while this claim still owns the job: once it is reclaimed after the timeout
+        # (attempts moved on) or finished, the update matches nothing and returns False.
+        result = db.execute(
+            update(PurityJob)
+            .where(PurityJob.id == job.id, PurityJob.attempts == job.attempts, PurityJob.status == 'PROCESSING')
+            .values(status=status, error=error, finished_at=datetime.utcnow() if status != 'QUEUED' else None)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    def write_results(self, db: Session, rows: list[dict]):
+        db.execute(insert(PurityTest), rows)
 
     def list_by_loan(self, db: Session, tenant_id: str, loan_id: str):
         return db.query(PurityTest).filter_by(tenant_id=tenant_id, loan_id=loan_id).all()
+
+    def results_for_loans(self, db: Session, tenant_id: str, loan_ids: list[str]):
+        return db.execute(
+            select(PurityTest.loan_id, PurityTest.jewel_index, PurityTest.result, PurityTest.confidence_score)
+            .where(PurityTest.tenant_id == tenant_id, PurityTest.loan_id.in_(loan_ids))
+            .order_by(PurityTest.loan_id, PurityTest.jewel_index, PurityTest.created_at)
+        ).all()
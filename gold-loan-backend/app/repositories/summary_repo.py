@@ -1,13 +1,45 @@
-from sqlalchemy.orm import Session
+import uuid
+from sqlalchemy import Text, cast, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
+from app.models.appraiser import Appraiser
+from app.models.compliance import RbiCompliance
+from app.models.customer import Customer
+from app.models.loan import Loan
 from app.models.summary import LoanSummary
 
 class SummaryRepository:
     def get_by_loan(self, db: Session, tenant_id: str, loan_id: str):
         return db.query(LoanSummary).filter_by(tenant_id=tenant_id, loan_id=loan_id).first()
 
-    def create(self, db: Session, tenant_id: str, loan_id: str, snapshot_json: str):
-        rec = LoanSummary(tenant_id=tenant_id, loan_id=loan_id, snapshot_json=snapshot_json)
-        db.add(rec)
-        db.commit()
-        db.refresh(rec)
-        return rec
+    def get_snapshot(self, db: Session, tenant_id: str, loan_id: str):
+        # As JSON text: the snapshot is served verbatim, never decoded.
+        return db.execute(
+            select(LoanSummary.id, cast(LoanSummary.snapshot_json, Text).label('snapshot_json'))
+            .where(LoanSummary.tenant_id == tenant_id, LoanSummary.loan_id == loan_id)
+        ).first()
+
+    def load_loan(self, db: Session, tenant_id: str, loan_id: str):
+        # Names join onto the loan row; compliance (with items) and purity results
+        # follow as IN-list selects (items nested under compliance): four round trips in all.
+        return db.scalars(
+            select(Loan)
+            .where(Loan.tenant_id == tenant_id, Loan.id == loan_id)
+            .options(
+                joinedload(Loan.customer).options(load_only(Customer.name)),
+                joinedload(Loan.appraiser).options(load_only(Appraiser.name)),
+                selectinload(Loan.compliances).selectinload(RbiCompliance.items),
+                selectinload(Loan.purity_tests),
+            )
+            .execution_options(populate_existing=True)
+        ).first()
+
+    def create(self, db: Session, tenant_id: str, loan_id: str, snapshot_json: dict):
+        # Returns the new summary id, or None when the loan already has one.
+        insert = postgresql.insert if db.get_bind().dialect.name == 'postgresql' else sqlite.insert
+        return db.scalar(
+            insert(LoanSummary)
+            .values(id=str(uuid.uuid4()), tenant_id=tenant_id, loan_id=loan_id, snapshot_json=snapshot_json)
+            .on_conflict_do_nothing(index_elements=[LoanSummary.loan_id])
+            .returning(LoanSummary.id)
+        )
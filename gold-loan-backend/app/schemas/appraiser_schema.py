@@ -1,9 +1,10 @@
 from pydantic import BaseModel, EmailStr
+from app.schemas.common import Id
 
 class CreateAppraiserRequest(BaseModel):
     name: str
     email: EmailStr
     phone: str
-    branch_id: str
+    branch_id: Id
     appraiser_code: str
-    face_image_id: str
+    face_image_id: Id
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, EmailStr
+from app.schemas.common import Id
 
 class LoginRequest(BaseModel):
     email: EmailStr
@@ -7,5 +8,5 @@ class LoginRequest(BaseModel):
     branch_code: str
 
 class FaceVerifyRequest(BaseModel):
-    appraiser_id: str
-    image_id: str
+    appraiser_id: Id
+    image_id: Id
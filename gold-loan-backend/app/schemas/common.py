@@ -1,5 +1,14 @@
+import uuid
 from datetime import datetime
-from pydantic import BaseModel
+from typing import Annotated
+from pydantic import AfterValidator, BaseModel
+
+
+def canonical_id(value: str) -> str:
+    # Ids are UUID columns; anything else is rejected here instead of by the database.
+    return str(uuid.UUID(value))
+
+Id = Annotated[str, AfterValidator(canonical_id)]
 
 class Meta(BaseModel):
     request_id: str
@@ -1,10 +1,11 @@
 from pydantic import BaseModel
+from app.schemas.common import Id
 
 class JewelImage(BaseModel):
     index: int
-    image_id: str
+    image_id: Id
 
 class ComplianceRequest(BaseModel):
     total_jewel_count: int
-    overall_image_id: str
+    overall_image_id: Id
     jewel_images: list[JewelImage]
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
+from app.schemas.common import Id
 
 class CreateCustomerRequest(BaseModel):
     customer_code: str
     name: str
-    face_image_id: str
+    face_image_id: Id
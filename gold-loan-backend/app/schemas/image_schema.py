@@ -1,5 +1,19 @@
-from pydantic import BaseModel
+from typing import Literal
+from pydantic import BaseModel, Field
+from app.schemas.common import Id
+
+ImageType = Literal['APPRAISER_FACE', 'CUSTOMER_FACE', 'JEWEL', 'OVERALL']
 
 class UploadUrlRequest(BaseModel):
-    image_type: str
-    loan_id: str
+    image_type: ImageType
+    loan_id: Id
+
+class ImageSpec(BaseModel):
+    image_type: ImageType
+    mime_type: str = Field(pattern=r'^image/[\w.+-]+$')
+    file_size: int = Field(gt=0)
+    file_hash: str | None = Field(None, pattern=r'^[0-9a-f]{64}$')
+
+class UploadUrlsRequest(BaseModel):
+    loan_id: Id
+    images: list[ImageSpec] = Field(min_length=1, max_length=100)
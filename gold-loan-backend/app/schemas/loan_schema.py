@@ -1,7 +1,14 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from app.schemas.common import Id
 
 class CreateLoanRequest(BaseModel):
-    customer_id: str
-    appraiser_id: str
-    bank_id: str
-    branch_id: str
+    customer_id: Id
+    appraiser_id: Id
+    bank_id: Id
+    branch_id: Id
+
+class BatchLoanItem(CreateLoanRequest):
+    idempotency_key: str = Field(min_length=1, max_length=255)
+
+class BatchCreateLoansRequest(BaseModel):
+    loans: list[BatchLoanItem] = Field(min_length=1, max_length=100)
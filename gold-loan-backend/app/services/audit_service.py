@@ -1,23 +1,114 @@
-import json
+import uuid
+from datetime import datetime
+import orjson
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.core.database import unit_of_work
+from app.core.tenant_router import tenant_router
+from app.core.pagination import decode_keyset, encode_cursor, naive_utc
 from app.repositories.audit_repo import AuditRepository
+from app.workers.audit_worker import writer
+
+STREAM_CHUNK_SIZE = 1000
+
 
 class AuditService:
     def __init__(self):
         self.repo = AuditRepository()
 
     def log(self, db, tenant_id, action, entity_type, entity_id, metadata=None):
-        self.repo.write(db, tenant_id, action, entity_type, entity_id, metadata)
+        # Regulator-critical actions are written in the request transaction; the rest
+        # are handed to the batch writer once that transaction commits.
+        if settings.audit_mode == 'sync' or action in settings.audit_transactional_actions:
+            self.repo.write(db, tenant_id, action, entity_type, entity_id, metadata)
+            return
+        db.info.setdefault('audit_pending', []).append({
+            'id': str(uuid.uuid4()),
+            'tenant_id': tenant_id,
+            'action': action,
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'metadata_json': metadata or {},
+            'created_at': datetime.utcnow(),
+        })
+
+    def log_many(self, db, tenant_id, action, entity_type, entity_ids):
+        rows = [
+            {
+                'id': str(uuid.uuid4()),
+                'tenant_id': tenant_id,
+                'action': action,
+                'entity_type': entity_type,
+                'entity_id': entity_id,
+                'metadata_json': {},
+                'created_at': datetime.utcnow(),
+            }
+            for entity_id in entity_ids
+        ]
+        if settings.audit_mode == 'sync' or action in settings.audit_transactional_actions:
+            if rows:
+                self.repo.write_many(db, rows)
+            return
+        db.info.setdefault('audit_pending', []).extend(rows)
 
-    def list(self, db, tenant_id, entity_type, entity_id):
-        rows = self.repo.list(db, tenant_id, entity_type, entity_id)
+    def list(self, db, tenant_id, filters, cursor=None, limit=100):
+        rows = self.repo.page(db, tenant_id, self._filters(filters), self._after(cursor), limit + 1)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at.isoformat(), rows[-1].id)
         return [
             {
                 'id': r.id,
                 'action': r.action,
                 'entity_type': r.entity_type,
                 'entity_id': r.entity_id,
-                'metadata': json.loads(r.metadata),
+                'metadata': r.metadata_json,
                 'created_at': r.created_at.isoformat(),
             }
             for r in rows
-        ]
+        ], next_cursor
+
+    def stream(self, tenant_id, filters, cursor=None):
+        # Resolved up front so a bad cursor or suspended tenant fails before streaming starts.
+        session_factory = tenant_router.sessionmaker_for(tenant_id)
+        return self._stream(session_factory, tenant_id, self._filters(filters), self._after(cursor))
+
+    def _stream(self, session_factory, tenant_id, filters, after):
+        # Runs after the request's session is closed, so it opens its own.
+        with unit_of_work(session_factory) as db:
+            for r in self.repo.stream(db, tenant_id, filters, after, STREAM_CHUNK_SIZE):
+                yield self._ndjson_line(r)
+
+    def _ndjson_line(self, r) -> bytes:
+        # The stream selects metadata as JSON text; splice it in rather than parse and re-encode.
+        created_at = r.created_at.isoformat()
+        head = orjson.dumps({
+            'id': r.id,
+            'action': r.action,
+            'entity_type': r.entity_type,
+            'entity_id': r.entity_id,
+            'created_at': created_at,
+            # Pass the last cursor received back as ?cursor= to resume after a dropped connection.
+            'cursor': encode_cursor(created_at, r.id),
+        })
+        return head[:-1] + b',"metadata":' + r.metadata_json.encode() + b'}\n'
+
+    def _filters(self, filters):
+        return filters | {'since': naive_utc(filters.get('since')), 'until': naive_utc(filters.get('until'))}
+
+    def _after(self, cursor):
+        return decode_keyset(cursor) if cursor is not None else None
+
+
+@event.listens_for(Session, 'after_commit')
+def _enqueue_committed(session: Session) -> None:
+    rows = session.info.pop('audit_pending', None)
+    if rows:
+        writer.submit(rows)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop('audit_pending', None)
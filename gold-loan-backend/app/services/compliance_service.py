@@ -6,6 +6,17 @@ class ComplianceService:
         self.repo = ComplianceRepository()
 
     def create(self, db, tenant_id, loan_id, payload):
-        if len(payload['jewel_images']) != payload['total_jewel_count']:
-            raise HTTPException(status_code=400, detail='jewel_images count must match total_jewel_count')
+        self.validate_indices(payload)
         return self.repo.create(db, tenant_id, loan_id, payload)
+
+    def validate_indices(self, payload):
+        # Checked as whole sets before any write, so the deferred count trigger never fires on bad input.
+        total = payload['total_jewel_count']
+        indices = [item['index'] for item in payload['jewel_images']]
+        if len(indices) != total:
+            raise HTTPException(status_code=400, detail='jewel_images count must match total_jewel_count')
+        seen = set(indices)
+        if len(seen) != total:
+            raise HTTPException(status_code=400, detail='jewel_images indices must be unique')
+        if seen != set(range(1, total + 1)):
+            raise HTTPException(status_code=400, detail=f'jewel_images indices must be 1..{total}')
@@ -0,0 +1,104 @@
+import csv
+import io
+import orjson
+from app.core.database import unit_of_work
+from app.core.pagination import decode_keyset, encode_cursor, naive_utc
+from app.core.tenant_router import tenant_router
+from app.repositories.compliance_repo import ComplianceRepository
+from app.repositories.loan_repo import LoanRepository
+from app.repositories.purity_repo import PurityRepository
+
+EXPORT_CHUNK_SIZE = 1000
+CSV_COLUMNS = (
+    'loan_id', 'customer_id', 'appraiser_id', 'bank_id', 'branch_id', 'created_at', 'completed_at',
+    'jewel_count', 'overall_image_id', 'jewel_image_ids', 'jewel_image_keys',
+    'purity_results', 'confidence_scores', 'cursor',
+)
+
+
+class ExportService:
+    def __init__(self):
+        self.loans = LoanRepository()
+        self.compliance = ComplianceRepository()
+        self.purity = PurityRepository()
+
+    def stream_loans(self, tenant_id, filters, cursor=None, fmt='ndjson'):
+        # Resolved up front so a bad cursor or suspended tenant fails before streaming starts.
+        session_factory = tenant_router.sessionmaker_for(tenant_id)
+        filters = filters | {'since': naive_utc(filters.get('since')), 'until': naive_utc(filters.get('until'))}
+        after = decode_keyset(cursor) if cursor is not None else None
+        records = self._records(session_factory, tenant_id, filters, after)
+        return self._csv(records) if fmt == 'csv' else self._ndjson(records)
+
+    def _records(self, session_factory, tenant_id, filters, after):
+        # Runs after the request's session is closed, so it opens its own. Loans come off
+        # a server-side cursor; their children are fetched with one IN query per table
+        # per chunk, so memory is bounded by EXPORT_CHUNK_SIZE whatever the export size.
+        with unit_of_work(session_factory) as db:
+            rows = self.loans.stream_completed(db, tenant_id, filters, after, EXPORT_CHUNK_SIZE)
+            for chunk in rows.partitions():
+                loan_ids = [r.id for r in chunk]
+                compliance = {}
+                for item in self.compliance.items_for_loans(db, tenant_id, loan_ids):
+                    entry = compliance.get(item.loan_id)
+                    if entry is None or entry['compliance_id'] != item.compliance_id:
+                        # Later captures replace earlier ones; only the latest is reported.
+                        entry = compliance[item.loan_id] = {
+                            'compliance_id': item.compliance_id,
+                            'jewel_count': item.total_jewel_count,
+                            'overall_image_id': item.overall_image_id,
+                            'images': [],
+                        }
+                    entry['images'].append({
+                        'jewel_index': item.jewel_index, 'image_id': item.jewel_image_id, 's3_key': item.s3_key,
+                    })
+                purity = {}
+                for result in self.purity.results_for_loans(db, tenant_id, loan_ids):
+                    purity.setdefault(result.loan_id, []).append({
+                        'jewel_index': result.jewel_index,
+                        'result': result.result,
+                        'confidence_score': result.confidence_score,
+                    })
+                yield [self._record(r, compliance.get(r.id), purity.get(r.id, [])) for r in chunk]
+
+    def _record(self, loan, compliance, purity):
+        return {
+            'loan_id': loan.id,
+            'customer_id': loan.customer_id,
+            'appraiser_id': loan.appraiser_id,
+            'bank_id': loan.bank_id,
+            'branch_id': loan.branch_id,
+            'created_at': loan.created_at.isoformat(),
+            'completed_at': loan.completed_at.isoformat(),
+            'jewel_count': compliance['jewel_count'] if compliance else 0,
+            'overall_image_id': compliance['overall_image_id'] if compliance else None,
+            'images': compliance['images'] if compliance else [],
+            'purity': purity,
+            # Pass the last cursor received back as ?cursor= to resume after a dropped connection.
+            'cursor': encode_cursor(loan.completed_at.isoformat(), loan.id),
+        }
+
+    def _ndjson(self, records):
+        for chunk in records:
+            yield b''.join(orjson.dumps(record) + b'\n' for record in chunk)
+
+    def _csv(self, records):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_COLUMNS)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        for chunk in records:
+            for record in chunk:
+                writer.writerow((
+                    *(record[name] for name in CSV_COLUMNS[:9]),
+                    '|'.join(image['image_id'] for image in record['images']),
+                    '|'.join(image['s3_key'] or '' for image in record['images']),
+                    '|'.join(result['result'] for result in record['purity']),
+                    '|'.join(str(result['confidence_score']) for result in record['purity']),
+                    record['cursor'],
+                ))
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
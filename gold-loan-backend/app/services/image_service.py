@@ -1,6 +1,83 @@
+import hashlib
 import uuid
+from urllib.error import HTTPError, URLError
+from fastapi import HTTPException
+from app.config.settings import settings
+from app.integrations.s3_client import S3Client
+from app.repositories.image_repo import ImageRepository
+
+
+def hash_stream(stream, chunk_size: int) -> tuple[str, int]:
+    # Fixed-size reads: memory stays at one chunk whatever the object size.
+    digest, size = hashlib.sha256(), 0
+    while chunk := stream.read(chunk_size):
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
 
 class ImageService:
-    def upload_url(self):
-        image_id = str(uuid.uuid4())
-        return {'image_id': image_id, 'upload_url': f'https://s3-presigned/{image_id}'}
+    def __init__(self):
+        self.repo = ImageRepository()
+        self.s3 = S3Client()
+
+    def upload_url(self, db, tenant_id, payload):
+        return self.upload_urls(db, tenant_id, {'loan_id': payload['loan_id'], 'images': [
+            {'image_type': payload['image_type'], 'mime_type': None, 'file_size': None, 'file_hash': None},
+        ]})[0]
+
+    def upload_urls(self, db, tenant_id, payload):
+        # A spec whose (hash, size) matches a verified upload, or an earlier spec of the
+        # same request, gets that image_id back and no upload URL.
+        contents = {(spec['file_hash'], spec['file_size']) for spec in payload['images'] if spec['file_hash']}
+        known = self.repo.find_verified(db, tenant_id, list(contents)) if contents else {}
+        rows, results = [], []
+        for spec in payload['images']:
+            content = (spec['file_hash'], spec['file_size']) if spec['file_hash'] else None
+            if content in known:
+                results.append({'image_id': known[content], 'upload_url': None, 'deduplicated': True})
+                continue
+            image_id = str(uuid.uuid4())
+            row = {
+                'id': image_id,
+                'tenant_id': tenant_id,
+                's3_bucket': settings.s3_bucket,
+                's3_key': f"{tenant_id}/{payload['loan_id']}/{image_id}",
+                'file_hash': spec['file_hash'],
+                'file_size': spec['file_size'],
+                'mime_type': spec['mime_type'],
+                'image_type': spec['image_type'],
+            }
+            rows.append(row)
+            if content:
+                known[content] = image_id
+            results.append({
+                'image_id': image_id,
+                'upload_url': self.s3.presigned_upload_url(row['s3_key'], row['mime_type']),
+                'deduplicated': False,
+            })
+        if rows:
+            self.repo.create_many(db, rows)
+        return results
+
+    def get(self, db, tenant_id, image_id):
+        image = self.repo.get(db, tenant_id, image_id)
+        if not image:
+            raise HTTPException(status_code=404, detail='Image not found')
+        return image
+
+    def hash_object(self, s3_key):
+        try:
+            with self.s3.open_object(s3_key) as body:
+                return hash_stream(body, settings.image_hash_chunk_bytes)
+        except HTTPError as ex:
+            raise HTTPException(status_code=409, detail=f'Uploaded object not readable ({ex.code})')
+        except (URLError, TimeoutError, ConnectionError) as ex:
+            # Storage unreachable or the read stalled: nothing is known about the object, so retry later.
+            raise HTTPException(status_code=502, detail=f'Object storage unavailable ({type(ex).__name__})')
+
+    def mark_verified(self, db, tenant_id, image, file_hash, file_size):
+        if (image.file_hash and image.file_hash != file_hash) or (image.file_size and image.file_size != file_size):
+            raise HTTPException(status_code=422, detail='Uploaded object does not match the declared hash and size')
+        self.repo.mark_verified(db, tenant_id, image.id, file_hash, file_size)
+        return {'image_id': image.id, 'file_hash': file_hash, 'file_size': file_size, 'verified': True}
@@ -1,28 +1,114 @@
 from datetime import datetime, timezone
 from fastapi import HTTPException
-from app.repositories.loan_repo import LoanRepository
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.core import metrics
+from app.core.cache import LRUCache
+from app.core.pagination import decode_keyset, encode_cursor, naive_utc
+from app.repositories.loan_repo import LoanHeader, LoanRepository
+from app.services.summary_service import SummaryService
+
+CACHE_HITS = metrics.counter('loan_cache_hits_total', 'Loan headers served from the in-process cache')
+CACHE_MISSES = metrics.counter('loan_cache_misses_total', 'Loan headers loaded from the database')
+
+# (tenant_id, loan_id) -> LoanHeader, written through when a transition commits and
+# evicted when one rolls back. Completed loans never change, so their headers are kept;
+# an open loan's expires after the TTL, since another process may move it on. Status
+# changes are guarded in SQL, so a stale header can at worst fail a request with 403.
+_headers = LRUCache(settings.loan_cache_size, settings.loan_cache_ttl_seconds)
+
 
 class LoanService:
     def __init__(self):
         self.repo = LoanRepository()
+        self.summaries = SummaryService()
 
     def create(self, db, tenant_id, payload):
-        return self.repo.create(db, tenant_id, payload)
+        rec = self.repo.create(db, tenant_id, payload)
+        self._stage(db, tenant_id, LoanHeader(rec.id, rec.status, rec.customer_id, rec.appraiser_id, rec.completed_at))
+        return rec
+
+    def create_many(self, db, tenant_id, rows):
+        self.repo.create_many(db, rows)
+        for row in rows:
+            self._stage(db, tenant_id, LoanHeader(row['id'], row['status'], row['customer_id'], row['appraiser_id'], None))
 
     def get(self, db, tenant_id, loan_id):
-        loan = self.repo.get(db, tenant_id, loan_id)
+        loan = _headers.get((tenant_id, loan_id))
+        if loan is not None:
+            CACHE_HITS.inc()
+            return loan
+        CACHE_MISSES.inc()
+        loan = self.repo.get_header(db, tenant_id, loan_id)
         if not loan:
             raise HTTPException(status_code=404, detail='Loan not found')
+        # A lagging replica may still show an earlier status.
+        if db.info.get('replica') is None or loan.status == 'COMPLETED':
+            self._stage(db, tenant_id, loan)
+        return loan
+
+    def set_status(self, db, tenant_id, loan, status):
+        if not self.repo.transition(db, tenant_id, loan.id, {'status': status}):
+            # Completed elsewhere, so a cached open header is stale.
+            _headers.pop((tenant_id, loan.id))
+            raise HTTPException(status_code=403, detail='Loan already completed')
+        loan = loan._replace(status=status)
+        self._stage(db, tenant_id, loan)
         return loan
 
+    def _stage(self, db, tenant_id, loan):
+        # Applied to the cache only when the unit of work commits.
+        db.info.setdefault('loan_headers', []).append(((tenant_id, loan.id), loan))
+
+    def list(self, db, tenant_id, filters, cursor=None, limit=50):
+        filters = filters | {'since': naive_utc(filters.get('since')), 'until': naive_utc(filters.get('until'))}
+        after = decode_keyset(cursor) if cursor is not None else None
+        rows = self.repo.page(db, tenant_id, filters, after, limit + 1)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at.isoformat(), rows[-1].id)
+        return [
+            {
+                'loan_id': r.id,
+                'status': r.status,
+                'customer_id': r.customer_id,
+                'appraiser_id': r.appraiser_id,
+                'branch_id': r.branch_id,
+                'created_at': r.created_at.isoformat(),
+                'completed_at': r.completed_at.isoformat() if r.completed_at else None,
+            }
+            for r in rows
+        ], next_cursor
+
     def ensure_open(self, loan):
         if loan.status == 'COMPLETED':
             raise HTTPException(status_code=403, detail='Loan already completed')
 
-    def complete(self, db, loan):
-        if loan.status != 'COMPLETED':
-            loan.status = 'COMPLETED'
-            loan.completed_at = datetime.now(timezone.utc)
-            db.commit()
-            db.refresh(loan)
+    def complete(self, db, tenant_id, loan):
+        if loan.status == 'COMPLETED':
+            return loan
+        completed_at = datetime.now(timezone.utc)
+        if self.repo.transition(db, tenant_id, loan.id, {'status': 'COMPLETED', 'completed_at': completed_at}):
+            loan = loan._replace(status='COMPLETED', completed_at=completed_at)
+            # Materialized in the completing transaction; nothing can change the loan afterwards.
+            self.summaries.build(db, tenant_id, loan.id)
+        else:
+            # Completed concurrently (or the cached header was stale): report the stored completion.
+            loan = self.repo.get_header(db, tenant_id, loan.id)
+        self._stage(db, tenant_id, loan)
         return loan
+
+
+@event.listens_for(Session, 'after_commit')
+def _cache_committed(session: Session) -> None:
+    for cache_key, loan in session.info.pop('loan_headers', ()):
+        _headers.put(cache_key, loan, forever=loan.status == 'COMPLETED')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back(session: Session) -> None:
+    # The rolled-back transaction may have seen a status other workers never will.
+    for cache_key, _ in session.info.pop('loan_headers', ()):
+        _headers.pop(cache_key)
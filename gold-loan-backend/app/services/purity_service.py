@@ -1,4 +1,4 @@
-import uuid
+from fastapi import HTTPException
 from app.repositories.purity_repo import PurityRepository
 
 class PurityService:
@@ -6,8 +6,33 @@ class PurityService:
         self.repo = PurityRepository()
 
     def trigger(self, db, tenant_id, loan_id):
-        self.repo.upsert_default(db, tenant_id, loan_id)
-        return {'job_id': str(uuid.uuid4()), 'status': 'PROCESSING'}
+        # Only enqueues; app.workers.purity_worker scores the jewels and records the results.
+        job = self.repo.active_job(db, tenant_id, loan_id)
+        if job is None:
+            jewel_count = self.repo.jewel_count(db, tenant_id, loan_id)
+            if not jewel_count:
+                raise HTTPException(status_code=400, detail='Capture compliance before the purity test')
+            job_id = self.repo.create_job(db, tenant_id, loan_id, jewel_count)
+            if job_id is not None:
+                return {'job_id': job_id, 'status': 'QUEUED'}
+            # A concurrent trigger queued it first; its job is committed by now.
+            job = self.repo.active_job(db, tenant_id, loan_id)
+        return {'job_id': job.id, 'status': job.status}
+
+    def get_job(self, db, tenant_id, job_id):
+        job = self.repo.get_job(db, tenant_id, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail='Purity job not found')
+        return {
+            'job_id': job.id,
+            'loan_id': job.loan_id,
+            'status': job.status,
+            'jewel_count': job.jewel_count,
+            'attempts': job.attempts,
+            'error': job.error,
+            'created_at': job.created_at.isoformat(),
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        }
 
     def list(self, db, tenant_id, loan_id):
         return self.repo.list_by_loan(db, tenant_id, loan_id)
@@ -1,6 +1,20 @@
-import json
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.core import metrics
+from app.core.cache import LRUCache
 from app.repositories.summary_repo import SummaryRepository
 
+CACHE_HITS = metrics.counter('summary_cache_hits_total', 'Loan summaries served from the in-process cache')
+CACHE_MISSES = metrics.counter('summary_cache_misses_total', 'Loan summaries loaded from the database')
+
+# (tenant_id, loan_id) -> (summary_id, snapshot bytes). loan_summary is append-only,
+# so entries are kept until evicted and the TTL is never used.
+_snapshots = LRUCache(settings.summary_cache_size, 0)
+
+
 class SummaryService:
     def __init__(self):
         self.repo = SummaryRepository()
@@ -8,11 +22,80 @@ class SummaryService:
     def generate(self, db, tenant_id, loan):
         row = self.repo.get_by_loan(db, tenant_id, loan.id)
         if row:
-            return row
-        snapshot = json.dumps({
+            return row.id
+        if loan.status != 'COMPLETED':
+            raise HTTPException(status_code=409, detail='Summary is created when the loan is completed')
+        return self.build(db, tenant_id, loan.id)
+
+    def build(self, db, tenant_id, loan_id):
+        loan = self.repo.load_loan(db, tenant_id, loan_id)
+        if loan is None:
+            raise HTTPException(status_code=404, detail='Loan not found')
+        compliance = loan.compliances[-1] if loan.compliances else None
+        snapshot = orjson.dumps({
             'loan_id': loan.id,
+            'loan_number': loan.loan_number,
             'status': loan.status,
-            'customer_id': loan.customer_id,
-            'appraiser_id': loan.appraiser_id,
+            'bank_id': loan.bank_id,
+            'branch_id': loan.branch_id,
+            'created_at': loan.created_at,
+            'completed_at': loan.completed_at,
+            'customer': {'id': loan.customer_id, 'name': loan.customer.name if loan.customer else None},
+            'appraiser': {'id': loan.appraiser_id, 'name': loan.appraiser.name if loan.appraiser else None},
+            'compliance': compliance and {
+                'compliance_id': compliance.id,
+                'total_jewel_count': compliance.total_jewel_count,
+                'overall_image_id': compliance.overall_image_id,
+                'captured_at': compliance.created_at,
+                'items': [
+                    {'jewel_index': item.jewel_index, 'jewel_image_id': item.jewel_image_id}
+                    for item in compliance.items
+                ],
+            },
+            'purity': [
+                {
+                    'jewel_index': test.jewel_index,
+                    'result': test.result,
+                    'confidence_score': test.confidence_score,
+                    'rubbing_stone_detected': test.rubbing_stone_detected,
+                    'rubbing_detected': test.rubbing_detected,
+                    'acid_detected': test.acid_detected,
+                }
+                for test in loan.purity_tests
+            ],
         })
-        return self.repo.create(db, tenant_id, loan.id, snapshot)
+        # Stored as a JSON document, so the datetimes go in as the ISO strings orjson wrote.
+        summary_id = self.repo.create(db, tenant_id, loan_id, orjson.loads(snapshot))
+        if summary_id is None:
+            # Already summarized (a concurrent build); loan_summary is append-only, so the stored one stands.
+            summary_id, stored = self.repo.get_snapshot(db, tenant_id, loan_id)
+            snapshot = stored.encode()
+        self._stage(db, tenant_id, loan_id, (summary_id, snapshot))
+        return summary_id
+
+    def get(self, db, tenant_id, loan_id):
+        summary = _snapshots.get((tenant_id, loan_id))
+        if summary is not None:
+            CACHE_HITS.inc()
+            return summary
+        CACHE_MISSES.inc()
+        row = self.repo.get_snapshot(db, tenant_id, loan_id)
+        if not row:
+            raise HTTPException(status_code=404, detail='Summary not found')
+        summary = (row.id, row.snapshot_json.encode())
+        self._stage(db, tenant_id, loan_id, summary)
+        return summary
+
+    def _stage(self, db, tenant_id, loan_id, summary):
+        db.info.setdefault('loan_summaries', []).append(((tenant_id, loan_id), summary))
+
+
+@event.listens_for(Session, 'after_commit')
+def _cache_committed(session: Session) -> None:
+    for cache_key, summary in session.info.pop('loan_summaries', ()):
+        _snapshots.put(cache_key, summary, forever=True)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop('loan_summaries', None)
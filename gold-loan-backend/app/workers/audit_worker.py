@@ -0,0 +1,172 @@
+import atexit
+import fcntl
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+import orjson
+from app.config.settings import settings
+from app.core.database import unit_of_work
+from app.core.tenant_router import tenant_router
+from app.repositories.audit_repo import AuditRepository
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AuditBatchWriter:
+    # Buffers committed audit rows in-process and writes them in multi-row batches,
+    # flushing when batch_size rows are queued or flush_interval has passed. Rows that
+    # do not fit in the queue, or whose batch keeps failing, are spooled to files in
+    # spool_dir and written again from there; audit rows are never dropped.
+    def __init__(self, batch_size: int, flush_interval_ms: int, queue_size: int, spool_dir: str, spool_retry_seconds: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.spool_dir = Path(spool_dir)
+        self.spool_retry_seconds = spool_retry_seconds
+        self.repo = AuditRepository()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, rows: list[dict]) -> None:
+        # Called from after_commit, possibly on the event loop: never waits for the database.
+        self.start()
+        for i, row in enumerate(rows):
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                logger.warning('audit queue full; spooling %s rows', len(rows) - i)
+                self._spool(rows[i:])
+                return
+
+    def close(self) -> None:
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join()
+        # Anything submitted after the thread stopped is flushed here.
+        pending = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not _STOP:
+                pending.append(row)
+        if pending:
+            self._write(pending)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                row = self._queue.get(timeout=self.spool_retry_seconds)
+            except queue.Empty:
+                # Idle: retry what was spooled (by this process or an earlier one).
+                self._replay()
+                continue
+            if row is _STOP:
+                return
+            batch = [row]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stop = True
+                    break
+                batch.append(row)
+            self._write(batch)
+            if stop:
+                return
+
+    def _write(self, rows: list[dict]) -> None:
+        by_tenant = {}
+        for row in rows:
+            by_tenant.setdefault(row['tenant_id'], []).append(row)
+        for tenant_id, tenant_rows in by_tenant.items():
+            self._write_tenant(tenant_id, tenant_rows)
+
+    def _write_tenant(self, tenant_id: str, rows: list[dict], replay: bool = False) -> bool:
+        for attempt in range(1, 4):
+            try:
+                with unit_of_work(tenant_router.sessionmaker_for(tenant_id)) as db:
+                    # A replayed file may have been written before its process died.
+                    self.repo.write_many(db, rows, skip_existing=replay)
+                return True
+            except Exception:
+                logger.exception('audit batch write failed (attempt %s, %s rows)', attempt, len(rows))
+                time.sleep(0.1 * attempt)
+        if not replay:
+            logger.error('spooling %s audit rows after retries', len(rows))
+            self._spool(rows)
+        return False
+
+    def _spool(self, rows: list[dict]) -> None:
+        # One file per spill, written under a temporary name and renamed, so a file that
+        # _replay can see is always complete.
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        name = f'{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        tmp = self.spool_dir / f'{name}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(b''.join(orjson.dumps(row) + b'\n' for row in rows))
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.rename(self.spool_dir / f'{name}.ndjson')
+
+    def _replay(self) -> None:
+        if not self.spool_dir.is_dir():
+            return
+        for path in sorted(self.spool_dir.glob('*.ndjson')):
+            try:
+                f = open(path, 'rb')
+            except FileNotFoundError:
+                continue
+            with f:
+                try:
+                    # Held until the file is gone, so processes sharing the directory take
+                    # turns; a process that dies releases it.
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                if not path.exists():
+                    continue
+                rows = [orjson.loads(line) for line in f if line.strip()]
+                by_tenant = {}
+                for row in rows:
+                    row['created_at'] = datetime.fromisoformat(row['created_at'])
+                    by_tenant.setdefault(row['tenant_id'], []).append(row)
+                written = [self._write_tenant(tenant_id, tenant_rows, replay=True) for tenant_id, tenant_rows in by_tenant.items()]
+                if all(written):
+                    path.unlink()
+                    logger.info('replayed %s spooled audit rows from %s', len(rows), path.name)
+
+
+writer = AuditBatchWriter(
+    settings.audit_batch_size,
+    settings.audit_flush_interval_ms,
+    settings.audit_queue_size,
+    settings.audit_spool_dir,
+    settings.audit_spool_retry_seconds,
+)
+# Shutdown normally flushes via the app lifespan; this covers scripts and workers.
+atexit.register(writer.close)
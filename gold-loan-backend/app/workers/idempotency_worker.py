@@ -0,0 +1,66 @@
+import logging
+import time
+from datetime import datetime
+from sqlalchemy import delete, select
+from app.config.settings import settings
+from app.core.database import SessionLocal, unit_of_work
+from app.core.tenant_router import tenant_router
+from app.models.idempotency import IdempotencyRecord
+
+logger = logging.getLogger(__name__)
+
+
+def compact(db, batch_size: int) -> int:
+    # Small keyed batches: each one locks at most batch_size rows and skips rows
+    # a concurrent retry is currently taking over.
+    expired = (
+        select(IdempotencyRecord.id)
+        .where(IdempotencyRecord.expires_at <= datetime.utcnow())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    result = db.execute(
+        delete(IdempotencyRecord)
+        .where(IdempotencyRecord.id.in_(expired.scalar_subquery()))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def compact_all(session_factory, batch_size: int) -> int:
+    total = 0
+    while True:
+        with unit_of_work(session_factory) as db:
+            deleted = compact(db, batch_size)
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def run(once: bool = False) -> int:
+    batch_size = settings.idempotency_compaction_batch_size
+    while True:
+        # The shared database plus every dedicated tenant database.
+        total = 0
+        try:
+            total += compact_all(SessionLocal, batch_size)
+        except Exception:
+            logger.exception('idempotency compaction of the shared database failed')
+        for tenant_id in tenant_router.dedicated_tenant_ids():
+            try:
+                total += compact_all(tenant_router.sessionmaker_for(tenant_id), batch_size)
+            except Exception:
+                # One unreachable bank database must not stop compaction for every other tenant.
+                logger.exception('idempotency compaction for tenant %s failed', tenant_id)
+        if total:
+            logger.info('idempotency compaction removed %s expired records', total)
+        if once:
+            return total
+        time.sleep(settings.idempotency_compaction_interval_seconds)
+
+
+if __name__ == '__main__':
+    from app.config.logging_config import setup_logging
+
+    setup_logging()
+    run()
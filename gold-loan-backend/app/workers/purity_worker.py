@@ -1,2 +1,112 @@
-def run():
-    return 'purity worker stub'
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
+from app.config.settings import settings
+from app.core.database import SessionLocal, unit_of_work
+from app.core.tenant_router import tenant_router
+from app.integrations.ai_client import PurityBatcher
+from app.repositories.purity_repo import PurityRepository
+from app.services.loan_service import LoanService
+
+logger = logging.getLogger(__name__)
+
+repo = PurityRepository()
+loan_service = LoanService()
+
+
+def _finish(session_factory, job, results: list[dict]) -> None:
+    try:
+        with unit_of_work(session_factory) as db:
+            # Finished first: the row lock holds off a reclaim until this commits, and a
+            # claim that was reclaimed already records nothing.
+            if not repo.finish_job(db, job, 'COMPLETED'):
+                logger.warning('purity job %s was reclaimed; attempt %s discarded', job.id, job.attempts)
+                return
+            repo.write_results(db, [
+                {
+                    'tenant_id': job.tenant_id,
+                    'loan_id': job.loan_id,
+                    'jewel_index': index,
+                    'result': result['result'],
+                    'confidence_score': result['confidence'],
+                    'rubbing_stone_detected': result['rubbing_stone_detected'],
+                    'rubbing_detected': result['rubbing_detected'],
+                    'acid_detected': result['acid_detected'],
+                }
+                for index, result in enumerate(results, start=1)
+            ])
+            loan = loan_service.get(db, job.tenant_id, job.loan_id)
+            loan_service.set_status(db, job.tenant_id, loan, 'PURITY_TESTED')
+    except HTTPException as ex:
+        # The loan was completed or removed while the job ran; nothing is recorded.
+        with unit_of_work(session_factory) as db:
+            repo.finish_job(db, job, 'FAILED', ex.detail)
+
+
+def _fail(session_factory, job, status: str, error: Exception) -> None:
+    try:
+        with unit_of_work(session_factory) as db:
+            repo.finish_job(db, job, status, str(error))
+    except Exception:
+        # Left PROCESSING; reclaimed after the timeout with attempts counted.
+        logger.exception('could not record the failure of purity job %s', job.id)
+
+
+def process(session_factory, batcher: PurityBatcher, batch_size: int) -> int:
+    # The claim commits first, so scoring holds no row locks or connections.
+    with unit_of_work(session_factory) as db:
+        jobs = repo.claim_jobs(db, batch_size, settings.purity_job_timeout_seconds)
+    # Every jewel of every claimed job goes through the batcher, so inference batches span loans.
+    futures = {
+        job.id: [batcher.submit(job.loan_id, index) for index in range(1, job.jewel_count + 1)]
+        for job in jobs
+    }
+    for job in jobs:
+        try:
+            results = [future.result() for future in futures[job.id]]
+        except Exception as ex:
+            logger.exception('purity job %s failed (attempt %s)', job.id, job.attempts)
+            _fail(session_factory, job, 'FAILED' if job.attempts >= settings.purity_max_attempts else 'QUEUED', ex)
+            continue
+        try:
+            _finish(session_factory, job, results)
+        except Exception as ex:
+            # Not an inference error, so retrying would fail the same way on every reclaim;
+            # the claim already counted this attempt.
+            logger.exception('purity job %s could not be recorded (attempt %s)', job.id, job.attempts)
+            _fail(session_factory, job, 'FAILED', ex)
+    return len(jobs)
+
+
+def run(once: bool = False) -> int:
+    batch_size = settings.purity_claim_batch_size
+    with ProcessPoolExecutor(max_workers=settings.purity_pool_size) as pool:
+        batcher = PurityBatcher(pool, max_batch_size=settings.ai_batch_size, max_wait_ms=settings.ai_batch_wait_ms)
+        try:
+            while True:
+                # The shared database plus every dedicated tenant database.
+                claimed = 0
+                try:
+                    claimed += process(SessionLocal, batcher, batch_size)
+                except Exception:
+                    logger.exception('purity jobs for the shared database failed')
+                for tenant_id in tenant_router.dedicated_tenant_ids():
+                    try:
+                        claimed += process(tenant_router.sessionmaker_for(tenant_id), batcher, batch_size)
+                    except Exception:
+                        # One unreachable bank database must not stall every other tenant's jobs.
+                        logger.exception('purity jobs for tenant %s failed', tenant_id)
+                if once:
+                    return claimed
+                if not claimed:
+                    time.sleep(settings.purity_poll_interval_seconds)
+        finally:
+            batcher.close()
+
+
+if __name__ == '__main__':
+    from app.config.logging_config import setup_logging
+
+    setup_logging()
+    run()
@@ -0,0 +1,56 @@
+# Throughput and latency of the purity micro-batcher against batch size, using the
+# local stub model with a fixed per-call overhead and a small per-item cost:
+#
+#   python -m benchmarks.ai_batching --requests 4000 --callers 64 --overhead-ms 20 --per-item-ms 0.5
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.integrations.ai_client import AIClient, PurityBatcher, StubPurityModel
+
+
+def _measure(batch_size: int, args) -> dict:
+    client = AIClient(StubPurityModel(args.overhead_ms, args.per_item_ms))
+    latencies = []
+    with ThreadPoolExecutor(args.model_workers) as model_pool:
+        batcher = PurityBatcher(model_pool, client.run_purity_batch, batch_size, args.wait_ms)
+
+        def caller(offset: int):
+            for i in range(offset, args.requests, args.callers):
+                start = time.perf_counter()
+                batcher.submit(f'loan-{i // 40}', i % 40 + 1).result()
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.callers) as callers:
+            list(callers.map(caller, range(args.callers)))
+        elapsed = time.perf_counter() - started
+        batcher.close()
+    latencies.sort()
+    return {
+        'per_s': args.requests / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--callers', type=int, default=64)
+    parser.add_argument('--model-workers', type=int, default=4)
+    parser.add_argument('--overhead-ms', type=float, default=20)
+    parser.add_argument('--per-item-ms', type=float, default=0.5)
+    parser.add_argument('--wait-ms', type=int, default=10)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 16, 32, 64])
+    args = parser.parse_args()
+
+    for batch_size in args.batch_sizes:
+        result = _measure(batch_size, args)
+        print(f"batch {batch_size:>3}: {result['per_s']:8.1f} jewels/s  p50 {result['p50_ms']:7.1f} ms  "
+              f"p99 {result['p99_ms']:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
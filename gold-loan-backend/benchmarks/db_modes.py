@@ -0,0 +1,123 @@
+# Throughput of the sync (threadpool) and async (DB_ASYNC) request paths. Starts one
+# uvicorn worker per mode against SUPABASE_DB_URL and drives a 3:1 mix of
+# GET /loans/{id} and POST /customers at a fixed concurrency:
+#
+#   SUPABASE_DB_URL=postgresql+psycopg://... python -m benchmarks.db_modes --concurrency 200 --seconds 20
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+TENANT = str(uuid.uuid4())
+HEADERS = {'Authorization': 'Bearer bench', 'X-Tenant-ID': TENANT}
+
+
+def _headers(idempotent: bool = False) -> dict:
+    return HEADERS | ({'Idempotency-Key': str(uuid.uuid4())} if idempotent else {})
+
+
+def _reference_rows() -> tuple[str, str]:
+    # No API creates banks or branches, and loans keep foreign keys to both.
+    from app.core.database import unit_of_work
+    from app.models import Bank, Branch
+
+    bank_id, branch_id, code = str(uuid.uuid4()), str(uuid.uuid4()), f'BENCH-{uuid.uuid4().hex[:12]}'
+    with unit_of_work() as db:
+        db.add(Bank(id=bank_id, tenant_id=TENANT, bank_code=code, bank_name='Bench'))
+        db.flush()
+        db.add(Branch(id=branch_id, tenant_id=TENANT, bank_id=bank_id, branch_code=code, branch_name='Bench'))
+    return bank_id, branch_id
+
+
+async def _seed(client: httpx.AsyncClient) -> str:
+    bank_id, branch_id = _reference_rows()
+    appraiser = await client.post('/api/v1/appraisers', headers=_headers(True), json={
+        'name': 'Bench', 'email': f'{uuid.uuid4().hex[:8]}@example.com', 'phone': '0',
+        'branch_id': branch_id, 'appraiser_code': f'B-{uuid.uuid4()}', 'face_image_id': str(uuid.uuid4()),
+    })
+    customer = await client.post('/api/v1/customers', headers=_headers(True), json={
+        'customer_code': f'BENCH-{uuid.uuid4()}', 'name': 'Bench', 'face_image_id': str(uuid.uuid4()),
+    })
+    loan = await client.post('/api/v1/loans', headers=_headers(True), json={
+        'customer_id': customer.json()['data']['customer_id'],
+        'appraiser_id': appraiser.json()['data']['appraiser_id'],
+        'bank_id': bank_id, 'branch_id': branch_id,
+    })
+    return loan.json()['data']['loan_id']
+
+
+async def _drive(base_url: str, concurrency: int, seconds: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        loan_id = await _seed(client)
+        latencies, errors = [], 0
+        deadline = time.perf_counter() + seconds
+
+        async def worker(i: int):
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                if i % 4:
+                    r = await client.get(f'/api/v1/loans/{loan_id}', headers=_headers())
+                else:
+                    r = await client.post('/api/v1/customers', headers=_headers(True), json={
+                        'customer_code': f'BENCH-{uuid.uuid4()}', 'name': 'Bench', 'face_image_id': str(uuid.uuid4()),
+                    })
+                latencies.append(time.perf_counter() - start)
+                errors += r.status_code >= 400
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'errors': errors,
+    }
+
+
+def _serve(db_async: bool, port: int) -> subprocess.Popen:
+    env = os.environ | {'DB_ASYNC': str(db_async).lower()}
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port), '--log-level', 'warning'],
+        env=env,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/api/v1/system/health')
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError('uvicorn did not start')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    for db_async in (False, True):
+        proc = _serve(db_async, args.port)
+        try:
+            result = asyncio.run(_drive(f'http://127.0.0.1:{args.port}', args.concurrency, args.seconds))
+        finally:
+            proc.terminate()
+            proc.wait()
+        mode = 'async' if db_async else 'sync'
+        print(f"{mode:>5}: {result['rps']:8.1f} req/s  p50 {result['p50_ms']:7.1f} ms  "
+              f"p99 {result['p99_ms']:7.1f} ms  errors {result['errors']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# Per-request cost of TimingMiddleware. Drives a bare ASGI endpoint directly (no
+# server, no routing) with and without the middleware and reports the added time
+# and the memory allocated per request, as traced by tracemalloc:
+#
+#   python -m benchmarks.metrics_overhead --requests 200000
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from app.core.timing import TimingMiddleware
+
+
+class _Route:
+    path = '/api/v1/loans/{loan_id}'
+
+
+async def _endpoint(scope, receive, send):
+    scope['route'] = _Route
+    await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b'{}'})
+
+
+async def _receive():
+    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+
+async def _send(message):
+    pass
+
+
+async def _drive(app, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app({'type': 'http', 'method': 'GET', 'path': '/api/v1/loans/1'}, _receive, _send)
+    return time.perf_counter() - started
+
+
+def _allocated(app, requests: int) -> tuple[float, int]:
+    tracemalloc.start()
+    asyncio.run(_drive(app, requests))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / requests, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200000)
+    args = parser.parse_args()
+
+    timed = TimingMiddleware(_endpoint)
+    asyncio.run(_drive(timed, 1000))  # create the label children up front
+    bare = asyncio.run(_drive(_endpoint, args.requests))
+    with_metrics = asyncio.run(_drive(timed, args.requests))
+    overhead_us = (with_metrics - bare) / args.requests * 1e6
+    print(f'bare      {bare / args.requests * 1e6:6.2f} us/request')
+    print(f'metrics   {with_metrics / args.requests * 1e6:6.2f} us/request  (+{overhead_us:.2f} us)')
+
+    retained, peak = _allocated(timed, args.requests // 10)
+    print(f'retained  {retained:6.2f} bytes/request  peak {peak / 1024:.1f} KiB')
+
+
+if __name__ == '__main__':
+    main()
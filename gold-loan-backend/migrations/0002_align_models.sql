@@ -0,0 +1,17 @@
+-- Columns the service writes that the baseline never declared
+ALTER TABLE appraiser ADD COLUMN IF NOT EXISTS name VARCHAR(255);
+ALTER TABLE appraiser ADD COLUMN IF NOT EXISTS email VARCHAR(255);
+ALTER TABLE appraiser ADD COLUMN IF NOT EXISTS phone VARCHAR(20);
+ALTER TABLE appraiser ADD COLUMN IF NOT EXISTS branch_id UUID REFERENCES branch(id);
+ALTER TABLE appraiser ADD COLUMN IF NOT EXISTS status VARCHAR(20) DEFAULT 'ACTIVE';
+
+-- idempotency_record stores the hash of the request body, not of the response
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_schema = current_schema() AND table_name = 'idempotency_record' AND column_name = 'response_hash'
+  ) THEN
+    ALTER TABLE idempotency_record RENAME COLUMN response_hash TO request_hash;
+  END IF;
+END $$;
@@ -0,0 +1,54 @@
+-- Ids are UUIDs and the JSON columns JSONB, as the baseline declares them; the models map
+-- them as such and the API rejects a malformed id before it reaches the database.
+--
+-- An earlier draft of this version turned the ids into VARCHAR, the JSON columns into TEXT
+-- and dropped the foreign keys to reference data. It was withdrawn before release. On a
+-- database migrated from the baseline this file changes nothing; a database that ran the
+-- draft is converted back once its 0003 row is removed from schema_migrations.
+
+DO $$
+DECLARE
+  col record;
+BEGIN
+  IF (SELECT data_type FROM information_schema.columns
+      WHERE table_schema = current_schema() AND table_name = 'loan' AND column_name = 'id') = 'uuid' THEN
+    RETURN;
+  END IF;
+
+  -- Re-added below once both sides are UUID
+  ALTER TABLE rbi_compliance DROP CONSTRAINT IF EXISTS rbi_compliance_loan_id_fkey;
+  ALTER TABLE rbi_compliance_item DROP CONSTRAINT IF EXISTS rbi_compliance_item_compliance_id_fkey;
+  ALTER TABLE purity_test DROP CONSTRAINT IF EXISTS purity_test_loan_id_fkey;
+  ALTER TABLE purity_job DROP CONSTRAINT IF EXISTS purity_job_loan_id_fkey;
+  ALTER TABLE loan_summary DROP CONSTRAINT IF EXISTS loan_summary_loan_id_fkey;
+
+  FOR col IN
+    SELECT table_name, column_name FROM information_schema.columns
+    WHERE table_schema = current_schema()
+      AND data_type = 'character varying'
+      AND (column_name = 'id' OR column_name LIKE '%\_id')
+      AND table_name IN (
+        'tenant', 'bank', 'branch', 'user_account', 'appraiser', 'customer', 'loan', 'rbi_compliance',
+        'rbi_compliance_item', 'purity_test', 'purity_job', 'image', 'loan_summary', 'audit_log', 'idempotency_record'
+      )
+  LOOP
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN %I TYPE UUID USING %I::uuid', col.table_name, col.column_name, col.column_name);
+  END LOOP;
+
+  ALTER TABLE loan_summary ALTER COLUMN snapshot_json TYPE JSONB USING snapshot_json::jsonb;
+  ALTER TABLE audit_log ALTER COLUMN metadata TYPE JSONB USING metadata::jsonb;
+
+  ALTER TABLE branch ADD CONSTRAINT branch_bank_id_fkey FOREIGN KEY (bank_id) REFERENCES bank(id);
+  ALTER TABLE appraiser ADD CONSTRAINT appraiser_user_id_fkey FOREIGN KEY (user_id) REFERENCES user_account(id);
+  ALTER TABLE appraiser ADD CONSTRAINT appraiser_branch_id_fkey FOREIGN KEY (branch_id) REFERENCES branch(id);
+  ALTER TABLE loan ADD CONSTRAINT loan_customer_id_fkey FOREIGN KEY (customer_id) REFERENCES customer(id);
+  ALTER TABLE loan ADD CONSTRAINT loan_appraiser_id_fkey FOREIGN KEY (appraiser_id) REFERENCES appraiser(id);
+  ALTER TABLE loan ADD CONSTRAINT loan_bank_id_fkey FOREIGN KEY (bank_id) REFERENCES bank(id);
+  ALTER TABLE loan ADD CONSTRAINT loan_branch_id_fkey FOREIGN KEY (branch_id) REFERENCES branch(id);
+  ALTER TABLE rbi_compliance ADD CONSTRAINT rbi_compliance_loan_id_fkey FOREIGN KEY (loan_id) REFERENCES loan(id);
+  ALTER TABLE rbi_compliance_item ADD CONSTRAINT rbi_compliance_item_compliance_id_fkey
+    FOREIGN KEY (compliance_id) REFERENCES rbi_compliance(id);
+  ALTER TABLE purity_test ADD CONSTRAINT purity_test_loan_id_fkey FOREIGN KEY (loan_id) REFERENCES loan(id);
+  ALTER TABLE purity_job ADD CONSTRAINT purity_job_loan_id_fkey FOREIGN KEY (loan_id) REFERENCES loan(id);
+  ALTER TABLE loan_summary ADD CONSTRAINT loan_summary_loan_id_fkey FOREIGN KEY (loan_id) REFERENCES loan(id);
+END $$;
@@ -0,0 +1,13 @@
+-- Summaries are now built when a loan completes, and loan_id is UNIQUE. Rows made earlier
+-- by POST /summary for loans that are still open are partial snapshots of a state that no
+-- longer holds, and they would stand in for the summary taken at completion. Remove them;
+-- those loans get a full summary when they complete. Earlier snapshots of loans that were
+-- already completed are kept: they describe the final loan, and the table is append-only.
+
+ALTER TABLE loan_summary DISABLE TRIGGER trg_no_update_delete_loan_summary;
+
+DELETE FROM loan_summary s
+USING loan l
+WHERE l.id = s.loan_id AND l.status <> 'COMPLETED';
+
+ALTER TABLE loan_summary ENABLE TRIGGER trg_no_update_delete_loan_summary;
@@ -0,0 +1,16 @@
+-- One purity result per jewel of a loan. A worker that lost its claim to a reclaim could
+-- record a second set of results for the same loan; keep the first one recorded.
+
+ALTER TABLE purity_test DISABLE TRIGGER trg_no_update_delete_purity_test;
+
+DELETE FROM purity_test p
+USING purity_test first
+WHERE first.tenant_id = p.tenant_id
+  AND first.loan_id = p.loan_id
+  AND first.jewel_index = p.jewel_index
+  AND (first.created_at, first.id) < (p.created_at, p.id);
+
+ALTER TABLE purity_test ENABLE TRIGGER trg_no_update_delete_purity_test;
+
+DROP INDEX IF EXISTS idx_purity_loan;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_purity_test_jewel ON purity_test(tenant_id, loan_id, jewel_index);
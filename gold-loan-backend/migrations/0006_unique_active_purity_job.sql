@@ -0,0 +1,14 @@
+-- One live (not FAILED) purity job per loan. Two concurrent triggers could each queue a
+-- job; the second one's results then conflicted with uq_purity_test_jewel on every
+-- reclaim. Keep the earliest live job and fail the rest.
+
+UPDATE purity_job p
+SET status = 'FAILED', error = 'Duplicate job', finished_at = CURRENT_TIMESTAMP
+FROM purity_job first
+WHERE first.tenant_id = p.tenant_id
+  AND first.loan_id = p.loan_id
+  AND first.status <> 'FAILED'
+  AND p.status <> 'FAILED'
+  AND (first.created_at, first.id) < (p.created_at, p.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_purity_job_active ON purity_job(tenant_id, loan_id) WHERE status <> 'FAILED';
@@ -0,0 +1,62 @@
+import os
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# A request over its SQL budget fails the test instead of only logging.
+os.environ.setdefault('QUERY_BUDGET_STRICT', 'true')
+
+
+@pytest.fixture
+def count_queries():
+    # with count_queries() as statements: ... collects the SQL statements of requests
+    # made through TestClient inside the block; background writers, and statements a
+    # streaming body runs outside the budget, are ignored.
+    from app.core.timing import current_request
+
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            stats = current_request()
+            if stats is not None and not stats.streaming:
+                statements.append(statement)
+
+        event.listen(Engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, 'before_cursor_execute', record)
+
+    return counting
+
+
+@pytest.fixture
+def loan_refs():
+    # loan_refs(tenant_id) stores the bank, branch, customer and appraiser a loan refers
+    # to (the foreign keys hold on Postgres) and returns their ids as a loan payload.
+    from app.core.database import SessionLocal
+    from app.models import Appraiser, Bank, Branch, Customer
+
+    def make(tenant_id: str) -> dict:
+        code = uuid.uuid4().hex[:12]
+        refs = {name: str(uuid.uuid4()) for name in ('customer_id', 'appraiser_id', 'bank_id', 'branch_id')}
+        with SessionLocal() as db:
+            # Flushed parent first: the models carry no relationships to order the inserts by.
+            db.add(Bank(id=refs['bank_id'], tenant_id=tenant_id, bank_code=code, bank_name='Bank'))
+            db.flush()
+            db.add(Branch(id=refs['branch_id'], tenant_id=tenant_id, bank_id=refs['bank_id'], branch_code=code, branch_name='Branch'))
+            db.flush()
+            db.add_all([
+                Customer(id=refs['customer_id'], tenant_id=tenant_id, customer_code=code, name='Asha', face_image_id=str(uuid.uuid4())),
+                Appraiser(id=refs['appraiser_id'], tenant_id=tenant_id, name='Ravi', email=f'{code}@example.com', phone='1',
+                          branch_id=refs['branch_id'], appraiser_code=code, face_image_id=str(uuid.uuid4())),
+            ])
+            db.commit()
+        return refs
+
+    return make
@@ -0,0 +1,64 @@
+import uuid
+from datetime import datetime
+from app.main import app  # noqa: F401  (creates tables)
+from app.core.database import unit_of_work
+from app.models.audit import AuditLog
+from app.workers.audit_worker import AuditBatchWriter
+
+TENANT = str(uuid.uuid4())
+
+
+def _rows(entity_id, count):
+    return [
+        {
+            'id': str(uuid.uuid4()), 'tenant_id': TENANT, 'action': 'CREATE_LOAN', 'entity_type': 'LOAN',
+            'entity_id': entity_id, 'metadata_json': {}, 'created_at': datetime.utcnow(),
+        }
+        for _ in range(count)
+    ]
+
+
+def _stored(entity_id):
+    with unit_of_work() as db:
+        return db.query(AuditLog).filter_by(entity_id=entity_id).count()
+
+
+def test_buffered_rows_are_flushed_on_close(tmp_path):
+    entity_id = str(uuid.uuid4())
+    writer = AuditBatchWriter(batch_size=2, flush_interval_ms=10_000, queue_size=100,
+                              spool_dir=tmp_path, spool_retry_seconds=60)
+    writer.submit(_rows(entity_id, 5))
+    writer.close()
+    assert _stored(entity_id) == 5
+
+
+def test_overflow_is_spooled_and_replayed(tmp_path, monkeypatch):
+    entity_id = str(uuid.uuid4())
+    writer = AuditBatchWriter(batch_size=100, flush_interval_ms=10_000, queue_size=2,
+                              spool_dir=tmp_path, spool_retry_seconds=60)
+    monkeypatch.setattr(writer, 'start', lambda: None)  # nothing drains the queue
+    writer.submit(_rows(entity_id, 5))
+    assert list(tmp_path.glob('*.ndjson'))
+    writer.close()
+    writer._replay()
+    assert _stored(entity_id) == 5
+    assert not list(tmp_path.iterdir())
+
+
+def test_failed_batch_is_spooled_not_dropped(tmp_path, monkeypatch):
+    entity_id = str(uuid.uuid4())
+    writer = AuditBatchWriter(batch_size=100, flush_interval_ms=10, queue_size=100,
+                              spool_dir=tmp_path, spool_retry_seconds=60)
+    write_many = writer.repo.write_many
+
+    def unavailable(*_, **__):
+        raise ConnectionError('database unavailable')
+
+    monkeypatch.setattr(writer.repo, 'write_many', unavailable)
+    assert not writer._write_tenant(TENANT, _rows(entity_id, 3))
+    assert _stored(entity_id) == 0
+
+    monkeypatch.setattr(writer.repo, 'write_many', write_many)
+    writer._replay()
+    writer._replay()
+    assert _stored(entity_id) == 3
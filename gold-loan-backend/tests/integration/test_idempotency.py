@@ -2,25 +2,110 @@ import uuid
 from app.main import app
 from fastapi.testclient import TestClient
 
+TENANT = str(uuid.uuid4())
 
-def test_idempotent_appraiser_create():
+
+def test_idempotent_appraiser_create(loan_refs):
     c = TestClient(app)
     key = str(uuid.uuid4())
     headers = {
         'Authorization': 'Bearer token',
-        'X-Tenant-ID': 'tenant-1',
+        'X-Tenant-ID': TENANT,
         'Idempotency-Key': key,
     }
     payload = {
         'name': 'Ravi',
         'email': f'ravi-{uuid.uuid4()}@bank.com',
         'phone': '9999999999',
-        'branch_id': 'b1',
+        'branch_id': loan_refs(TENANT)['branch_id'],
         'appraiser_code': f'APP-{uuid.uuid4()}',
-        'face_image_id': 'img1',
+        'face_image_id': str(uuid.uuid4()),
     }
     r1 = c.post('/api/v1/appraisers', json=payload, headers=headers)
     r2 = c.post('/api/v1/appraisers', json=payload, headers=headers)
     assert r1.status_code == 200
     assert r2.status_code == 200
     assert r1.json()['data']['appraiser_id'] == r2.json()['data']['appraiser_id']
+
+
+def test_in_flight_key_is_rejected_with_409():
+    from datetime import datetime, timedelta
+    from app.core.database import unit_of_work
+    from app.models.idempotency import IdempotencyRecord
+    from app.core.idempotency import _hash
+
+    c = TestClient(app)
+    key = str(uuid.uuid4())
+    payload = {'customer_code': 'CUST-1', 'name': 'Suresh', 'face_image_id': str(uuid.uuid4())}
+    with unit_of_work() as db:
+        db.add(IdempotencyRecord(tenant_id=TENANT, key=key, endpoint='/customers', request_hash=_hash(payload), expires_at=datetime.utcnow() + timedelta(hours=1)))
+    headers = {'Authorization': 'Bearer token', 'X-Tenant-ID': TENANT, 'Idempotency-Key': key}
+    r = c.post('/api/v1/customers', json=payload, headers=headers)
+    assert r.status_code == 409
+
+
+def test_expired_key_is_compacted_and_treated_as_new():
+    from datetime import datetime, timedelta
+    from app.core.database import unit_of_work
+    from app.models.idempotency import IdempotencyRecord
+    from app.core.idempotency import _hash
+    from app.workers.idempotency_worker import compact
+
+    key = str(uuid.uuid4())
+    payload = {'customer_code': 'CUST-2', 'name': 'Suresh', 'face_image_id': str(uuid.uuid4())}
+    with unit_of_work() as db:
+        db.add(IdempotencyRecord(
+            tenant_id=TENANT, key=key, endpoint='/customers', request_hash=_hash(payload),
+            response_body=b'{"data": {"customer_id": "old"}}', expires_at=datetime.utcnow() - timedelta(seconds=1),
+        ))
+    c = TestClient(app)
+    headers = {'Authorization': 'Bearer token', 'X-Tenant-ID': TENANT, 'Idempotency-Key': key}
+    r = c.post('/api/v1/customers', json=payload, headers=headers)
+    assert r.status_code == 200
+    assert r.json()['data']['customer_id'] != 'old'
+
+    with unit_of_work() as db:
+        db.query(IdempotencyRecord).filter_by(key=key).update({'expires_at': datetime.utcnow() - timedelta(seconds=1)})
+    with unit_of_work() as db:
+        assert compact(db, 1000) >= 1
+        assert db.query(IdempotencyRecord).filter_by(key=key).count() == 0
+
+
+def test_replay_is_not_cached_past_the_record_expiry():
+    import time
+    from datetime import datetime, timedelta
+    from app.core.database import unit_of_work
+    from app.models.idempotency import IdempotencyRecord
+    from app.core.idempotency import _hash
+
+    key = str(uuid.uuid4())
+    payload = {'customer_code': 'CUST-3', 'name': 'Meena', 'face_image_id': str(uuid.uuid4())}
+    with unit_of_work() as db:
+        db.add(IdempotencyRecord(
+            tenant_id=TENANT, key=key, endpoint='/customers', request_hash=_hash(payload),
+            response_body=b'{"data": {"customer_id": "old"}}', expires_at=datetime.utcnow() + timedelta(seconds=0.5),
+        ))
+    c = TestClient(app)
+    headers = {'Authorization': 'Bearer token', 'X-Tenant-ID': TENANT, 'Idempotency-Key': key}
+    assert c.post('/api/v1/customers', json=payload, headers=headers).json()['data']['customer_id'] == 'old'
+    time.sleep(0.6)
+    assert c.post('/api/v1/customers', json=payload, headers=headers).json()['data']['customer_id'] != 'old'
+
+
+def test_compaction_continues_past_a_failing_tenant(monkeypatch):
+    from app.core.database import SessionLocal
+    from app.core.tenant_router import tenant_router
+    from app.workers import idempotency_worker
+
+    def sessionmaker_for(tenant_id):
+        if tenant_id == 'down':
+            raise ConnectionError('bank database unreachable')
+        return SessionLocal
+
+    calls = []
+    compact_all = idempotency_worker.compact_all
+    monkeypatch.setattr(tenant_router, 'dedicated_tenant_ids', lambda: ['down', 'up'])
+    monkeypatch.setattr(tenant_router, 'sessionmaker_for', sessionmaker_for)
+    monkeypatch.setattr(idempotency_worker, 'compact_all', lambda *args: calls.append(args) or compact_all(*args))
+    idempotency_worker.run(once=True)
+    assert len(calls) == 2
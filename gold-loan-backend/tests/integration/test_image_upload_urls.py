@@ -0,0 +1,103 @@
+import hashlib
+import io
+import uuid
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.core.database import async_engine, engine, unit_of_work
+from app.models.image import Image
+
+TENANT = str(uuid.uuid4())
+HEADERS = {'Authorization': 'Bearer token', 'X-Tenant-ID': TENANT}
+
+
+def test_batch_issues_urls_and_persists_images():
+    loan_id = str(uuid.uuid4())
+    specs = [{'image_type': 'JEWEL', 'mime_type': 'image/jpeg', 'file_size': 1000 + i} for i in range(40)]
+    r = TestClient(app).post('/api/v1/images/upload-urls', headers=HEADERS | {'Idempotency-Key': str(uuid.uuid4())},
+                             json={'loan_id': loan_id, 'images': specs})
+    assert r.status_code == 200
+    data = r.json()['data']
+    assert len(data) == 40 and all('X-Amz-Signature=' in item['upload_url'] for item in data)
+    with unit_of_work() as db:
+        rows = db.query(Image).filter(Image.id.in_([item['image_id'] for item in data])).all()
+        assert len(rows) == 40
+        assert all(row.s3_key.startswith(f'{TENANT}/{loan_id}/') for row in rows)
+
+
+def _issue(c, specs):
+    r = c.post('/api/v1/images/upload-urls', headers=HEADERS | {'Idempotency-Key': str(uuid.uuid4())},
+               json={'loan_id': str(uuid.uuid4()), 'images': specs})
+    assert r.status_code == 200
+    return r.json()['data']
+
+
+def test_verified_content_is_deduplicated(monkeypatch):
+    from app.api import images
+
+    content = uuid.uuid4().bytes * 1000
+    spec = {'image_type': 'JEWEL', 'mime_type': 'image/jpeg', 'file_size': len(content),
+            'file_hash': hashlib.sha256(content).hexdigest()}
+    c = TestClient(app)
+    first, repeat = _issue(c, [spec, spec])
+    assert first['upload_url'] and repeat == {'image_id': first['image_id'], 'upload_url': None, 'deduplicated': True}
+    # Not verified yet, so a later request still gets its own upload.
+    assert _issue(c, [spec])[0]['deduplicated'] is False
+
+    monkeypatch.setattr(images.service.s3, 'open_object', lambda key: io.BytesIO(content))
+    r = c.post(f"/api/v1/images/{first['image_id']}/verify", headers=HEADERS)
+    assert r.status_code == 200 and r.json()['data']['verified'] is True
+    assert _issue(c, [spec])[0] == {'image_id': first['image_id'], 'upload_url': None, 'deduplicated': True}
+
+
+def test_verify_rejects_mismatched_object(monkeypatch):
+    from app.api import images
+
+    spec = {'image_type': 'JEWEL', 'mime_type': 'image/jpeg', 'file_size': 3, 'file_hash': 'a' * 64}
+    c = TestClient(app)
+    image_id = _issue(c, [spec])[0]['image_id']
+    monkeypatch.setattr(images.service.s3, 'open_object', lambda key: io.BytesIO(b'abc'))
+    assert c.post(f'/api/v1/images/{image_id}/verify', headers=HEADERS).status_code == 422
+
+
+def test_verify_reports_unreachable_storage(monkeypatch):
+    from app.api import images
+
+    def timed_out(key):
+        raise TimeoutError('timed out')
+
+    spec = {'image_type': 'JEWEL', 'mime_type': 'image/jpeg', 'file_size': 3, 'file_hash': 'a' * 64}
+    c = TestClient(app)
+    image_id = _issue(c, [spec])[0]['image_id']
+    monkeypatch.setattr(images.service.s3, 'open_object', timed_out)
+    assert c.post(f'/api/v1/images/{image_id}/verify', headers=HEADERS).status_code == 502
+
+
+def test_verify_downloads_without_holding_a_connection(monkeypatch):
+    from app.api import images
+
+    pool = (async_engine.sync_engine if async_engine is not None else engine).pool
+    held, during_download = [], []
+
+    def checkout(*args):
+        held.append(1)
+
+    def checkin(*args):
+        held.pop()
+
+    def download(key):
+        during_download.append(len(held))
+        return io.BytesIO(b'abc')
+
+    spec = {'image_type': 'JEWEL', 'mime_type': 'image/jpeg', 'file_size': 3, 'file_hash': hashlib.sha256(b'abc').hexdigest()}
+    c = TestClient(app)
+    image_id = _issue(c, [spec])[0]['image_id']
+    monkeypatch.setattr(images.service.s3, 'open_object', download)
+    event.listen(pool, 'checkout', checkout)
+    event.listen(pool, 'checkin', checkin)
+    try:
+        assert c.post(f'/api/v1/images/{image_id}/verify', headers=HEADERS).json()['data']['verified'] is True
+    finally:
+        event.remove(pool, 'checkout', checkout)
+        event.remove(pool, 'checkin', checkin)
+    assert during_download == [0]
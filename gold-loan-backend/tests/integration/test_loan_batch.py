@@ -0,0 +1,120 @@
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.main import app
+from app.config.settings import settings
+from app.api import loans
+from app.core import idempotency
+from app.core.database import engine, unit_of_work
+from app.models.idempotency import IdempotencyRecord
+from app.repositories import loan_repo
+
+TENANT = str(uuid.uuid4())
+HEADERS = {'Authorization': 'Bearer token', 'X-Tenant-ID': TENANT}
+
+
+def _item(refs, key=None, **changes):
+    return {'idempotency_key': key or str(uuid.uuid4())} | refs | changes
+
+
+def test_batch_creates_loans_in_constant_statements(count_queries, loan_refs):
+    refs = loan_refs(TENANT)
+    c = TestClient(app)
+    items = [_item(refs) for _ in range(20)]
+    with count_queries() as statements:
+        r = c.post('/api/v1/loans:batch', json={'loans': items}, headers=HEADERS)
+    assert r.status_code == 200
+    results = r.json()['data']
+    assert [res['status_code'] for res in results] == [200] * 20
+    assert [res['idempotency_key'] for res in results] == [item['idempotency_key'] for item in items]
+    # Tenant lookup (first request), key lookup, then idempotency upsert and loan insert in a savepoint.
+    assert len(statements) <= 6
+
+    replay = c.post('/api/v1/loans:batch', json={'loans': items}, headers=HEADERS).json()['data']
+    assert replay == results
+    loan_id = results[0]['data']['loan_id']
+    assert c.get(f'/api/v1/loans/{loan_id}', headers=HEADERS).json()['data']['status'] == 'CREATED'
+
+
+def test_batch_items_fail_alone_and_share_keys_with_single_create(loan_refs):
+    refs = loan_refs(TENANT)
+    c = TestClient(app)
+    single_key = str(uuid.uuid4())
+    single = c.post('/api/v1/loans', json=refs, headers=HEADERS | {'Idempotency-Key': single_key}).json()['data']
+
+    fresh = _item(refs)
+    items = [
+        _item(refs, single_key),
+        _item(refs, single_key, branch_id=str(uuid.uuid4())),
+        fresh,
+        fresh,
+    ]
+    results = c.post('/api/v1/loans:batch', json={'loans': items}, headers=HEADERS).json()['data']
+    assert results[0]['status_code'] == 200 and results[0]['data'] == single
+    assert results[1]['status_code'] == 409
+    assert results[2]['status_code'] == 200
+    assert results[3] == {'idempotency_key': fresh['idempotency_key'], 'status_code': 409,
+                          'error': 'Idempotency-Key repeated in batch'}
+
+    retry = c.post('/api/v1/loans', json={k: v for k, v in fresh.items() if k != 'idempotency_key'},
+                   headers=HEADERS | {'Idempotency-Key': fresh['idempotency_key']})
+    assert retry.json()['data'] == results[2]['data']
+
+
+def test_rejected_item_fails_alone(monkeypatch, loan_refs):
+    refs = loan_refs(TENANT)
+    c = TestClient(app)
+    taken = c.post('/api/v1/loans', json=refs,
+                   headers=HEADERS | {'Idempotency-Key': str(uuid.uuid4())}).json()['data']['loan_number']
+    numbers = iter(['GL-BATCH-1', taken, 'GL-BATCH-3'])
+    monkeypatch.setattr(loan_repo, 'new_loan_number', lambda: next(numbers))
+
+    items = [_item(refs) for _ in range(3)]
+    results = c.post('/api/v1/loans:batch', json={'loans': items}, headers=HEADERS).json()['data']
+    assert [res['status_code'] for res in results] == [200, 409, 200]
+    assert [results[0]['data']['loan_number'], results[2]['data']['loan_number']] == ['GL-BATCH-1', 'GL-BATCH-3']
+
+    # Nothing was kept for the rejected item, so its key can be retried.
+    monkeypatch.setattr(loan_repo, 'new_loan_number', lambda: 'GL-BATCH-4')
+    retry = c.post('/api/v1/loans:batch', json={'loans': [items[1]]}, headers=HEADERS).json()['data']
+    assert retry[0]['status_code'] == 200
+
+
+def test_batch_whose_keys_were_all_taken_meanwhile(monkeypatch, loan_refs):
+    refs = loan_refs(TENANT)
+    c = TestClient(app)
+    done, pending = _item(refs), _item(refs)
+    stored = c.post('/api/v1/loans', json=refs, headers=HEADERS | {'Idempotency-Key': done['idempotency_key']}).json()['data']
+    with unit_of_work() as db:
+        # Reserved by a request still running on another worker.
+        db.add(IdempotencyRecord(tenant_id=TENANT, key=pending['idempotency_key'], endpoint='/loans',
+                                 request_hash=idempotency._hash(refs), created_at=datetime.utcnow(),
+                                 expires_at=datetime.utcnow() + timedelta(hours=1)))
+    # Both keys were stored elsewhere after this worker looked, and its filter has not seen them.
+    monkeypatch.setattr(loans, 'get_cached_many', lambda *args: {})
+    monkeypatch.setattr(idempotency, '_might_exist', lambda *args: False)
+
+    results = c.post('/api/v1/loans:batch', json={'loans': [done, pending]}, headers=HEADERS).json()['data']
+    assert results[0] == {'idempotency_key': done['idempotency_key'], 'status_code': 200, 'data': stored}
+    assert results[1] == {'idempotency_key': pending['idempotency_key'], 'status_code': 409,
+                          'error': 'Request with this Idempotency-Key is still in progress'}
+
+
+@pytest.mark.skipif(engine.dialect.name != 'postgresql', reason='needs row locks')
+def test_key_held_by_open_transaction_fails_alone(monkeypatch, loan_refs):
+    monkeypatch.setattr(settings, 'idempotency_lock_timeout_ms', 200)
+    refs = loan_refs(TENANT)
+    held, fresh = _item(refs), _item(refs)
+    with engine.connect() as other:
+        # Another request that has reserved the key and not committed yet.
+        other.execute(text(
+            "INSERT INTO idempotency_record (id, tenant_id, key, endpoint, request_hash, status_code, created_at, expires_at) "
+            "VALUES (:id, :tenant, :key, '/loans', 'x', 0, now(), now() + interval '1 hour')"
+        ), {'id': str(uuid.uuid4()), 'tenant': TENANT, 'key': held['idempotency_key']})
+        results = TestClient(app).post('/api/v1/loans:batch', json={'loans': [held, fresh]}, headers=HEADERS).json()['data']
+        other.rollback()
+    assert results[0] == {'idempotency_key': held['idempotency_key'], 'status_code': 409,
+                          'error': 'Request with this Idempotency-Key is still in progress'}
+    assert results[1]['status_code'] == 200
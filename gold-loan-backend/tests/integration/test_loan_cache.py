@@ -0,0 +1,59 @@
+import uuid
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+from app.main import app  # noqa: F401  (creates tables)
+from app.core.database import unit_of_work
+from app.models.loan import Loan
+from app.services.loan_service import CACHE_HITS, CACHE_MISSES, LoanService
+
+TENANT = str(uuid.uuid4())
+
+
+def _loan(service, refs):
+    with unit_of_work() as db:
+        rec = service.create(db, TENANT, refs)
+        return rec.id
+
+
+def test_header_cached_after_commit_and_written_through(loan_refs):
+    service = LoanService()
+    loan_id = _loan(service, loan_refs(TENANT))
+    hits = CACHE_HITS.value
+    with unit_of_work() as db:
+        loan = service.set_status(db, TENANT, service.get(db, TENANT, loan_id), 'COMPLIANCE_CAPTURED')
+    with unit_of_work() as db:
+        assert service.get(db, TENANT, loan_id).status == 'COMPLIANCE_CAPTURED'
+        service.complete(db, TENANT, loan)
+    with unit_of_work() as db:
+        assert service.get(db, TENANT, loan_id).status == 'COMPLETED'
+    assert CACHE_HITS.value == hits + 3
+
+
+def test_rolled_back_transition_evicts_the_header(loan_refs):
+    service = LoanService()
+    loan_id = _loan(service, loan_refs(TENANT))
+    with pytest.raises(RuntimeError):
+        with unit_of_work() as db:
+            service.set_status(db, TENANT, service.get(db, TENANT, loan_id), 'COMPLIANCE_CAPTURED')
+            raise RuntimeError('failed after the transition')
+    misses = CACHE_MISSES.value
+    with unit_of_work() as db:
+        assert service.get(db, TENANT, loan_id).status == 'CREATED'
+    assert CACHE_MISSES.value == misses + 1
+
+
+def test_stale_open_header_cannot_reopen_completed_loan(loan_refs):
+    service = LoanService()
+    loan_id = _loan(service, loan_refs(TENANT))
+    with unit_of_work() as db:
+        # Completed behind this worker's back, e.g. by another process.
+        db.execute(update(Loan).where(Loan.id == loan_id).values(status='COMPLETED'))
+    with pytest.raises(HTTPException) as ex:
+        with unit_of_work() as db:
+            loan = service.get(db, TENANT, loan_id)
+            assert loan.status == 'CREATED'
+            service.set_status(db, TENANT, loan, 'PURITY_TESTED')
+    assert ex.value.status_code == 403
+    with unit_of_work() as db:
+        assert service.get(db, TENANT, loan_id).status == 'COMPLETED'
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.database import unit_of_work
+from app.models.loan import Loan
+from app.repositories.compliance_repo import ComplianceRepository
+from app.repositories.purity_repo import PurityRepository
+
+HEADERS = {'Authorization': 'Bearer token'}
+
+
+def _seed(tenant_id: str, refs: dict, count: int) -> list[str]:
+    start = datetime.utcnow() - timedelta(days=1)
+    loan_ids = [str(uuid.uuid4()) for _ in range(count)]
+    with unit_of_work() as db:
+        db.add_all(
+            Loan(id=loan_id, tenant_id=tenant_id, **refs, status='COMPLETED', completed_at=start + timedelta(seconds=i))
+            for i, loan_id in enumerate(loan_ids)
+        )
+        db.add(Loan(tenant_id=tenant_id, **refs))
+        db.flush()
+        for loan_id in loan_ids:
+            ComplianceRepository().create(db, tenant_id, loan_id, {
+                'total_jewel_count': 2,
+                'overall_image_id': str(uuid.uuid4()),
+                'jewel_images': [{'index': i, 'image_id': str(uuid.uuid4())} for i in (1, 2)],
+            })
+            PurityRepository().write_results(db, [
+                {'tenant_id': tenant_id, 'loan_id': loan_id, 'jewel_index': j, 'result': 'PASS', 'confidence_score': 0.9}
+                for j in (1, 2)
+            ])
+    return loan_ids
+
+
+def test_ndjson_export_resumes_from_cursor(loan_refs):
+    tenant_id = str(uuid.uuid4())
+    headers = HEADERS | {'X-Tenant-ID': tenant_id}
+    loan_ids = _seed(tenant_id, loan_refs(tenant_id), 5)
+    c = TestClient(app)
+    r = c.get('/api/v1/exports/loans', headers=headers)
+    assert r.status_code == 200
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [line['loan_id'] for line in lines] == loan_ids
+    assert lines[0]['jewel_count'] == 2 and len(lines[0]['images']) == 2 and len(lines[0]['purity']) == 2
+
+    r = c.get('/api/v1/exports/loans', params={'cursor': lines[1]['cursor']}, headers=headers)
+    assert [json.loads(line)['loan_id'] for line in r.text.splitlines()] == loan_ids[2:]
+
+
+def test_csv_export_has_one_row_per_loan(loan_refs):
+    tenant_id = str(uuid.uuid4())
+    headers = HEADERS | {'X-Tenant-ID': tenant_id}
+    loan_ids = _seed(tenant_id, loan_refs(tenant_id), 3)
+    r = TestClient(app).get('/api/v1/exports/loans', params={'format': 'csv'}, headers=headers)
+    assert r.headers['content-type'].startswith('text/csv')
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert [row['loan_id'] for row in rows] == loan_ids
+    assert rows[0]['purity_results'] == 'PASS|PASS'
@@ -0,0 +1,70 @@
+import threading
+import uuid
+import orjson
+from sqlalchemy import event
+from app.main import app  # noqa: F401  (creates tables)
+from app.core.database import engine, unit_of_work
+from app.repositories.compliance_repo import ComplianceRepository
+from app.repositories.purity_repo import PurityRepository
+from app.services.loan_service import LoanService
+from app.services.summary_service import CACHE_HITS, SummaryService
+
+TENANT = str(uuid.uuid4())
+
+
+def test_summary_built_on_completion_and_cached(loan_refs):
+    loans = LoanService()
+    images = [str(uuid.uuid4()) for _ in range(3)]
+    with unit_of_work() as db:
+        loan_id = loans.create(db, TENANT, loan_refs(TENANT)).id
+    with unit_of_work() as db:
+        ComplianceRepository().create(db, TENANT, loan_id, {
+            'total_jewel_count': 2,
+            'overall_image_id': images[0],
+            'jewel_images': [{'index': 2, 'image_id': images[2]}, {'index': 1, 'image_id': images[1]}],
+        })
+        PurityRepository().write_results(db, [
+            {'tenant_id': TENANT, 'loan_id': loan_id, 'jewel_index': j, 'result': r, 'confidence_score': c}
+            for j, r, c in ((2, 'PASS', 0.9), (1, 'FAIL', 0.8))
+        ])
+
+    statements = []
+    thread = threading.get_ident()
+    def count(*_):
+        # Only this test's statements, not a background writer's.
+        if threading.get_ident() == thread:
+            statements.append(1)
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        with unit_of_work() as db:
+            loans.complete(db, TENANT, loans.get(db, TENANT, loan_id))
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    summaries = SummaryService()
+    hits = CACHE_HITS.value
+    with unit_of_work() as db:
+        summary_id, snapshot = summaries.get(db, TENANT, loan_id)
+    assert CACHE_HITS.value == hits + 1
+    data = orjson.loads(snapshot)
+    assert data['status'] == 'COMPLETED'
+    assert data['customer']['name'] == 'Asha' and data['appraiser']['name'] == 'Ravi'
+    assert [i['jewel_image_id'] for i in data['compliance']['items']] == images[1:]
+    assert [p['jewel_index'] for p in data['purity']] == [1, 2]
+    # Header read, guarded update, the four summary selects and the insert.
+    assert len(statements) <= 7
+
+
+def test_completion_keeps_an_existing_summary(loan_refs):
+    loans = LoanService()
+    summaries = SummaryService()
+    with unit_of_work() as db:
+        loan = loans.create(db, TENANT, loan_refs(TENANT))
+        loan_id = loan.id
+        # As left by a concurrent completion, or a snapshot taken before completion.
+        earlier_id = summaries.repo.create(db, TENANT, loan_id, {'loan_id': loan_id})
+    with unit_of_work() as db:
+        completed = loans.complete(db, TENANT, loans.get(db, TENANT, loan_id))
+    assert completed.status == 'COMPLETED'
+    with unit_of_work() as db:
+        assert summaries.get(db, TENANT, loan_id)[0] == earlier_id
@@ -0,0 +1,107 @@
+import uuid
+from concurrent.futures import Future
+from datetime import datetime
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select, update
+from app.main import app
+from app.core.database import SessionLocal, unit_of_work
+from app.models.purity import PurityJob, PurityTest
+from app.services.purity_service import PurityService
+from app.workers import purity_worker
+
+TENANT = str(uuid.uuid4())
+HEADERS = {'Authorization': 'Bearer token', 'X-Tenant-ID': TENANT}
+
+
+def _headers():
+    return HEADERS | {'Idempotency-Key': str(uuid.uuid4())}
+
+
+def _loan_with_jewels(c, refs, count):
+    loan_id = c.post('/api/v1/loans', headers=_headers(), json=refs).json()['data']['loan_id']
+    c.post(f'/api/v1/loans/{loan_id}/compliance', headers=_headers(), json={
+        'total_jewel_count': count, 'overall_image_id': str(uuid.uuid4()),
+        'jewel_images': [{'index': i, 'image_id': str(uuid.uuid4())} for i in range(1, count + 1)],
+    })
+    return loan_id
+
+
+def test_trigger_enqueues_and_worker_records_every_jewel(loan_refs):
+    c = TestClient(app)
+    loan_id = _loan_with_jewels(c, loan_refs(TENANT), 3)
+    job = c.post(f'/api/v1/loans/{loan_id}/purity-test', headers=_headers()).json()['data']
+    assert job['status'] == 'QUEUED'
+    # A second trigger returns the same job instead of queueing another.
+    assert c.post(f'/api/v1/loans/{loan_id}/purity-test', headers=_headers()).json()['data']['job_id'] == job['job_id']
+
+    purity_worker.run(once=True)
+
+    r = c.get(f"/api/v1/purity-jobs/{job['job_id']}", headers=HEADERS)
+    assert r.json()['data']['status'] == 'COMPLETED'
+    results = c.get(f'/api/v1/loans/{loan_id}/purity-test', headers=HEADERS).json()['data']
+    assert sorted(row['jewel_index'] for row in results) == [1, 2, 3]
+
+
+def test_unknown_job_is_404():
+    assert TestClient(app).get(f'/api/v1/purity-jobs/{uuid.uuid4()}', headers=HEADERS).status_code == 404
+
+
+def test_reclaimed_job_records_results_once(loan_refs):
+    c = TestClient(app)
+    loan_id = _loan_with_jewels(c, loan_refs(TENANT), 1)
+    job_id = c.post(f'/api/v1/loans/{loan_id}/purity-test', headers=_headers()).json()['data']['job_id']
+    # Claimed by one worker, then reclaimed by another after the timeout.
+    first = SimpleNamespace(id=job_id, tenant_id=TENANT, loan_id=loan_id, jewel_count=1, attempts=1)
+    second = SimpleNamespace(**vars(first) | {'attempts': 2})
+    with unit_of_work() as db:
+        db.execute(update(PurityJob).where(PurityJob.id == job_id)
+                   .values(status='PROCESSING', attempts=2, started_at=datetime.utcnow()))
+    result = [{'result': 'PASS', 'confidence': 0.9, 'rubbing_stone_detected': False,
+               'rubbing_detected': False, 'acid_detected': False}]
+
+    purity_worker._finish(SessionLocal, first, result)
+    purity_worker._finish(SessionLocal, second, result)
+    purity_worker._finish(SessionLocal, second, result)
+
+    with unit_of_work() as db:
+        assert db.scalar(select(func.count()).where(PurityTest.loan_id == loan_id)) == 1
+    assert c.get(f'/api/v1/purity-jobs/{job_id}', headers=HEADERS).json()['data']['status'] == 'COMPLETED'
+
+
+def test_racing_trigger_returns_the_queued_job(loan_refs, monkeypatch):
+    c = TestClient(app)
+    loan_id = _loan_with_jewels(c, loan_refs(TENANT), 1)
+    job_id = c.post(f'/api/v1/loans/{loan_id}/purity-test', headers=_headers()).json()['data']['job_id']
+    # The second trigger looked before the first one committed, so it tries to queue its own.
+    service = PurityService()
+    active_job, lookups = service.repo.active_job, []
+
+    def stale_then_fresh(*args):
+        lookups.append(args)
+        return active_job(*args) if len(lookups) > 1 else None
+
+    monkeypatch.setattr(service.repo, 'active_job', stale_then_fresh)
+
+    with unit_of_work() as db:
+        assert service.trigger(db, TENANT, loan_id)['job_id'] == job_id
+    with unit_of_work() as db:
+        assert db.scalar(select(func.count()).where(PurityJob.loan_id == loan_id)) == 1
+
+
+def test_unexpected_error_fails_the_job_without_stopping_the_worker(loan_refs, monkeypatch):
+    c = TestClient(app)
+    loan_id = _loan_with_jewels(c, loan_refs(TENANT), 1)
+    job_id = c.post(f'/api/v1/loans/{loan_id}/purity-test', headers=_headers()).json()['data']['job_id']
+    done = Future()
+    done.set_result({})
+
+    def broken_finish(*args):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(purity_worker, '_finish', broken_finish)
+
+    assert purity_worker.process(SessionLocal, SimpleNamespace(submit=lambda *args: done), 10) >= 1
+
+    job = c.get(f'/api/v1/purity-jobs/{job_id}', headers=HEADERS).json()['data']
+    assert job['status'] == 'FAILED'
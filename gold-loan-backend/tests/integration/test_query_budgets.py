@@ -0,0 +1,134 @@
+import hashlib
+import io
+import uuid
+import pytest
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api import images
+from app.config.settings import settings
+from app.core import idempotency
+from app.core.timing import QUERY_BUDGET_EXCEEDED, QueryBudgetExceeded
+from app.services import export_service
+
+TENANT = str(uuid.uuid4())
+
+# Statements per request once the tenant's idempotency filter is warm, so a new key
+# skips the replay lookup. Every route has one; a new route fails until it is added.
+BUDGETS = {
+    'POST /auth/login': 0,
+    'POST /auth/face-verify': 2,
+    'GET /system/health': 0,
+    'GET /system/metrics': 0,
+    'POST /customers': 3,
+    'POST /appraisers': 3,
+    'GET /appraisers': 1,
+    'POST /loans': 3,
+    'POST /loans:batch': 4,
+    'GET /loans/{loan_id}': 0,  # header cached when the create commits
+    'GET /loans': 1,
+    'POST /images/upload-url': 3,
+    'POST /images/upload-urls': 4,
+    'POST /images/{image_id}/verify': 2,
+    'POST /loans/{loan_id}/compliance': 5,
+    'POST /loans/{loan_id}/purity-test': 5,
+    'GET /purity-jobs/{job_id}': 1,
+    'GET /loans/{loan_id}/purity-test': 1,
+    'POST /loans/{loan_id}/complete': 9,  # includes the summary build and its insert
+    'POST /loans/{loan_id}/summary': 3,
+    'GET /loans/{loan_id}/summary': 0,  # cached when the completing transaction commits
+    'GET /audit': 1,
+    'GET /audit/stream': 0,  # everything runs while streaming, outside the budget
+    'GET /exports/loans': 0,  # likewise
+}
+
+
+def _headers() -> dict:
+    return {'Authorization': 'Bearer token', 'X-Tenant-ID': TENANT, 'Idempotency-Key': str(uuid.uuid4())}
+
+
+def test_every_route_has_a_budget():
+    routes = {
+        f'{method} {route.path.removeprefix(settings.api_prefix)}'
+        for route in app.routes if isinstance(route, APIRoute) for method in route.methods
+    }
+    assert routes == set(BUDGETS)
+
+
+def test_every_route_stays_within_its_query_budget(monkeypatch, count_queries, loan_refs):
+    refs = loan_refs(TENANT)
+    c = TestClient(app)
+    c.get('/api/v1/loans', headers=_headers())  # tenant metadata lookup
+    # Warmed in the background on the tenant's first idempotent request; wait for it here.
+    idempotency._tenant_filter(TENANT)
+    idempotency._warming.submit(lambda: None).result()
+    counts = {}
+
+    def call(route, path, **kwargs):
+        method = route.split()[0]
+        with count_queries() as statements:
+            r = c.request(method, f'{settings.api_prefix}{path}', headers=_headers(), **kwargs)
+        assert r.status_code == 200, (route, r.text)
+        counts[route] = len(statements)
+        return r.json().get('data') if r.headers['content-type'].startswith('application/json') else None
+
+    call('POST /auth/login', '/auth/login',
+         json={'email': 'a@example.com', 'password': 'p', 'bank_code': 'B', 'branch_code': 'B'})
+    call('GET /system/health', '/system/health')
+    call('GET /system/metrics', '/system/metrics')
+    customer = call('POST /customers', '/customers',
+                    json={'customer_code': 'C', 'name': 'S', 'face_image_id': str(uuid.uuid4())})['customer_id']
+    appraiser = call('POST /appraisers', '/appraisers', json={
+        'name': 'R', 'email': 'r@example.com', 'phone': '1', 'branch_id': refs['branch_id'],
+        'appraiser_code': 'A', 'face_image_id': str(uuid.uuid4()),
+    })['appraiser_id']
+    call('GET /appraisers', '/appraisers')
+    call('POST /auth/face-verify', '/auth/face-verify', json={'appraiser_id': appraiser, 'image_id': str(uuid.uuid4())})
+    loan = call('POST /loans', '/loans', json=refs | {'customer_id': customer})['loan_id']
+    call('POST /loans:batch', '/loans:batch', json={'loans': [refs | {'idempotency_key': str(uuid.uuid4())} for _ in range(5)]})
+    call('GET /loans/{loan_id}', f'/loans/{loan}')
+    call('GET /loans', '/loans')
+
+    content = b'jewel'
+    call('POST /images/upload-url', '/images/upload-url', json={'image_type': 'OVERALL', 'loan_id': loan})
+    image = call('POST /images/upload-urls', '/images/upload-urls', json={'loan_id': loan, 'images': [
+        {'image_type': 'JEWEL', 'mime_type': 'image/jpeg', 'file_size': len(content), 'file_hash': hashlib.sha256(content).hexdigest()},
+    ]})[0]['image_id']
+    monkeypatch.setattr(images.service.s3, 'open_object', lambda key: io.BytesIO(content))
+    call('POST /images/{image_id}/verify', f'/images/{image}/verify')
+
+    call('POST /loans/{loan_id}/compliance', f'/loans/{loan}/compliance', json={
+        'total_jewel_count': 2, 'overall_image_id': str(uuid.uuid4()),
+        'jewel_images': [{'index': 1, 'image_id': str(uuid.uuid4())}, {'index': 2, 'image_id': str(uuid.uuid4())}],
+    })
+    job = call('POST /loans/{loan_id}/purity-test', f'/loans/{loan}/purity-test')['job_id']
+    call('GET /purity-jobs/{job_id}', f'/purity-jobs/{job}')
+    call('GET /loans/{loan_id}/purity-test', f'/loans/{loan}/purity-test')
+    call('POST /loans/{loan_id}/complete', f'/loans/{loan}/complete')
+    call('POST /loans/{loan_id}/summary', f'/loans/{loan}/summary')
+    call('GET /loans/{loan_id}/summary', f'/loans/{loan}/summary')
+    call('GET /audit', '/audit')
+    call('GET /audit/stream', '/audit/stream')
+    call('GET /exports/loans', '/exports/loans')
+
+    assert counts == BUDGETS
+
+
+def test_request_over_budget_fails_in_strict_mode(monkeypatch):
+    monkeypatch.setitem(settings.query_budgets, 'GET /api/v1/loans', 0)
+    with pytest.raises(QueryBudgetExceeded):
+        TestClient(app).get('/api/v1/loans', headers=_headers())
+
+
+def test_long_export_is_not_an_n_plus_one(monkeypatch, loan_refs):
+    # Two IN queries per chunk: past the repeat limit after a few chunks, yet bounded per chunk.
+    monkeypatch.setattr(export_service, 'EXPORT_CHUNK_SIZE', 1)
+    refs = loan_refs(TENANT)
+    c = TestClient(app)
+    for _ in range(settings.query_repeat_limit + 1):
+        loan = c.post('/api/v1/loans', headers=_headers(), json=refs).json()['data']
+        c.post(f"/api/v1/loans/{loan['loan_id']}/complete", headers=_headers())
+    exceeded = QUERY_BUDGET_EXCEEDED.labels('/api/v1/exports/loans', 'GET').value
+    r = c.get('/api/v1/exports/loans', headers=_headers())
+    assert len(r.text.splitlines()) > settings.query_repeat_limit
+    assert QUERY_BUDGET_EXCEEDED.labels('/api/v1/exports/loans', 'GET').value == exceeded
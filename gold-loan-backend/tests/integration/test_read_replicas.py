@@ -0,0 +1,33 @@
+import uuid
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core import database
+from app.core.database import Base, ReplicaSet
+
+TENANT = str(uuid.uuid4())
+HEADERS = {'Authorization': 'Bearer token', 'X-Tenant-ID': TENANT}
+
+
+def _appraiser(branch_id):
+    return {'name': 'Ravi', 'email': 'r@example.com', 'phone': '1', 'branch_id': branch_id,
+            'appraiser_code': f'A-{uuid.uuid4().hex[:8]}', 'face_image_id': str(uuid.uuid4())}
+
+
+def test_reads_use_replica_except_right_after_a_write(tmp_path, monkeypatch, loan_refs):
+    # The "replica" is an empty copy of the schema, so what a GET returns shows where it read.
+    replicas = ReplicaSet([f'sqlite:///{tmp_path / "replica.db"}'], max_lag_seconds=5, interval_seconds=1)
+    Base.metadata.create_all(replicas.engines[0])
+    replicas.update([0.2])
+    monkeypatch.setattr(database, 'replicas', replicas)
+
+    branch_id = loan_refs(TENANT)['branch_id']  # with the refs' own appraiser, two in all
+    writer = TestClient(app)
+    r = writer.post('/api/v1/appraisers', json=_appraiser(branch_id), headers=HEADERS | {'Idempotency-Key': str(uuid.uuid4())})
+    assert r.status_code == 200
+    assert 'gl_primary_until' in r.cookies
+
+    assert len(writer.get('/api/v1/appraisers', headers=HEADERS).json()['data']) == 2
+    assert TestClient(app).get('/api/v1/appraisers', headers=HEADERS).json()['data'] == []
+
+    replicas.update([30.0])
+    assert len(TestClient(app).get('/api/v1/appraisers', headers=HEADERS).json()['data']) == 2
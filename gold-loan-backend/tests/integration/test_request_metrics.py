@@ -0,0 +1,16 @@
+import uuid
+from fastapi.testclient import TestClient
+from app.main import app
+
+HEADERS = {'Authorization': 'Bearer token', 'X-Tenant-ID': str(uuid.uuid4())}
+
+
+def test_requests_are_timed_by_route_template():
+    c = TestClient(app)
+    assert c.get(f'/api/v1/loans/{uuid.uuid4()}', headers=HEADERS).status_code == 404
+    body = c.get('/api/v1/system/metrics').text
+    assert 'http_request_duration_seconds_count{route="/api/v1/loans/{loan_id}",method="GET"}' in body
+    assert 'http_requests_total{route="/api/v1/loans/{loan_id}",method="GET",status="404"}' in body
+    assert 'http_request_db_seconds_sum{route="/api/v1/loans/{loan_id}",method="GET"}' in body
+    assert 'http_requests_in_flight 1' in body
+    assert 'db_pool_checkout_seconds_count ' in body
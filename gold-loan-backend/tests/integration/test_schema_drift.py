@@ -0,0 +1,41 @@
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Uuid, inspect
+
+import app.main  # noqa: F401  (registers every model)
+from app.core.database import Base, engine
+
+# The models are the contract the API writes to; on Postgres the schema comes from
+# migrations/, so check that the two agree (SQLite builds its schema from the models).
+pytestmark = pytest.mark.skipif(engine.dialect.name != 'postgresql', reason='schema comes from the models on SQLite')
+
+_NUMBERS = (int, float, Decimal)
+
+
+def _kind(column_type):
+    if isinstance(column_type, Uuid):
+        return Uuid
+    python_type = column_type.python_type
+    return 'number' if python_type in _NUMBERS else python_type
+
+
+def test_migrated_schema_matches_models():
+    inspector = inspect(engine)
+    problems = []
+    for table in Base.metadata.sorted_tables:
+        columns = {c['name']: c for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            found = columns.get(column.name)
+            if found is None:
+                problems.append(f'{table.name}.{column.name} missing')
+            elif _kind(found['type']) is not _kind(column.type):
+                problems.append(f'{table.name}.{column.name} is {found["type"]}, model has {column.type}')
+        for name, found in columns.items():
+            if name not in table.columns and not found['nullable'] and found['default'] is None:
+                problems.append(f'{table.name}.{name} is NOT NULL without a default and not in the model')
+        references = {(tuple(fk['constrained_columns']), fk['referred_table']) for fk in inspector.get_foreign_keys(table.name)}
+        for fk in table.foreign_keys:
+            if ((fk.parent.name,), fk.column.table.name) not in references:
+                problems.append(f'{table.name}.{fk.parent.name} has no foreign key to {fk.column.table.name}')
+    assert problems == []
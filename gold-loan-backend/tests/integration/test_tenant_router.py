@@ -0,0 +1,63 @@
+import asyncio
+import uuid
+import pytest
+from fastapi import HTTPException
+from app.main import app  # noqa: F401  (creates tables)
+from app.core.database import SessionLocal, unit_of_work
+from app.core.migrations import latest_version
+from app.core.tenant_router import TenantRouter
+from app.models.tenant import Tenant
+
+
+def _tenant(tenant_type='DEDICATED', status='ACTIVE', schema_version=latest_version()):
+    tenant_id = str(uuid.uuid4())
+    with unit_of_work() as db:
+        db.add(Tenant(id=tenant_id, bank_name='Bank', tenant_type=tenant_type, status=status,
+                      db_host='db.internal', db_port=5432, db_name=f'bank_{tenant_id[:8]}', db_user='app',
+                      schema_version=schema_version))
+    return tenant_id
+
+
+def test_shared_and_unknown_tenants_use_shared_pool():
+    router = TenantRouter(cache_size=2, idle_seconds=600, metadata_ttl_seconds=60)
+    assert router.sessionmaker_for(_tenant('SHARED')) is SessionLocal
+    assert router.sessionmaker_for(str(uuid.uuid4())) is SessionLocal
+
+
+def test_suspended_tenant_rejected():
+    router = TenantRouter(cache_size=2, idle_seconds=600, metadata_ttl_seconds=60)
+    with pytest.raises(HTTPException) as ex:
+        router.sessionmaker_for(_tenant(status='SUSPENDED'))
+    assert ex.value.status_code == 403
+
+
+def test_tenant_behind_schema_is_refused():
+    router = TenantRouter(cache_size=2, idle_seconds=600, metadata_ttl_seconds=60)
+    tenant_id = _tenant(schema_version='0001')
+    with pytest.raises(HTTPException) as ex:
+        router.sessionmaker_for(tenant_id)
+    assert ex.value.status_code == 503
+    assert router.database_url(tenant_id).database == f'bank_{tenant_id[:8]}'
+
+
+def test_dedicated_engines_are_lru_bounded():
+    router = TenantRouter(cache_size=1, idle_seconds=600, metadata_ttl_seconds=60)
+    first, second = _tenant(), _tenant()
+    factory = router.sessionmaker_for(first)
+    assert factory is not SessionLocal
+    assert router.sessionmaker_for(first) is factory
+    assert factory.kw['bind'].url.database == f'bank_{first[:8]}'
+    router.sessionmaker_for(second)
+    assert list(router._engines) == [second]
+    asyncio.run(router.dispose())
+
+
+def test_tenant_metadata_cache_is_bounded():
+    router = TenantRouter(cache_size=2, idle_seconds=600, metadata_ttl_seconds=60, metadata_cache_size=2)
+    known = _tenant('SHARED')
+    router.sessionmaker_for(known)
+    for _ in range(3):
+        # Arbitrary X-Tenant-ID values: unknown, so cached as such, but only up to the bound.
+        router.sessionmaker_for(str(uuid.uuid4()))
+    assert not router.is_cached(known)
+    assert len(router._tenants._items) == 2
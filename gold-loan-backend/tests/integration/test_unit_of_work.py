@@ -0,0 +1,19 @@
+import uuid
+import pytest
+from app.main import app  # noqa: F401  (creates tables)
+from app.core.database import SessionLocal, unit_of_work
+from app.models.audit import AuditLog
+
+
+def test_failure_rolls_back_every_write():
+    entity_id = str(uuid.uuid4())
+    with pytest.raises(RuntimeError):
+        with unit_of_work() as db:
+            db.add(AuditLog(tenant_id=str(uuid.uuid4()), action='CREATE_LOAN', entity_type='LOAN', entity_id=entity_id))
+            db.flush()
+            raise RuntimeError('boom')
+    db = SessionLocal()
+    try:
+        assert db.query(AuditLog).filter_by(entity_id=entity_id).count() == 0
+    finally:
+        db.close()
@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.integrations.ai_client import AIClient, PurityBatcher, StubPurityModel
+
+
+def test_results_routed_back_to_each_caller():
+    calls = []
+    client = AIClient(StubPurityModel())
+
+    def run_batch(items):
+        calls.append(len(items))
+        return client.run_purity_batch(items)
+
+    with ThreadPoolExecutor(2) as executor:
+        batcher = PurityBatcher(executor, run_batch, max_batch_size=8, max_wait_ms=50)
+        items = [(f'loan-{i % 5}', i) for i in range(20)]
+        futures = [batcher.submit(*item) for item in items]
+        results = [future.result(timeout=5) for future in futures]
+        batcher.close()
+    assert results == [client.run_purity(*item) for item in items]
+    assert max(calls) <= 8 and sum(calls) == 20 and len(calls) < 20
+
+
+def test_batch_failure_reaches_every_waiter():
+    def run_batch(_items):
+        raise RuntimeError('model down')
+
+    with ThreadPoolExecutor(1) as executor:
+        batcher = PurityBatcher(executor, run_batch, max_batch_size=4, max_wait_ms=20)
+        futures = [batcher.submit('loan', i) for i in range(3)]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=5)
+        batcher.close()
@@ -0,0 +1,18 @@
+import pytest
+from fastapi import HTTPException
+from app.services.compliance_service import ComplianceService
+
+
+def _payload(total, indices):
+    return {'total_jewel_count': total, 'jewel_images': [{'index': i, 'image_id': f'img-{i}'} for i in indices]}
+
+
+def test_contiguous_unique_indices_accepted():
+    ComplianceService().validate_indices(_payload(3, [3, 1, 2]))
+
+
+@pytest.mark.parametrize('total,indices', [(3, [1, 2]), (3, [1, 2, 2]), (3, [0, 1, 2]), (2, [1, 3])])
+def test_bad_indices_rejected(total, indices):
+    with pytest.raises(HTTPException) as ex:
+        ComplianceService().validate_indices(_payload(total, indices))
+    assert ex.value.status_code == 400
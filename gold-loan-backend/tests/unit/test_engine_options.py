@@ -0,0 +1,33 @@
+import asyncio
+import json
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from app.config.settings import settings
+from app.core.database import engine_options
+from app.core.exceptions import http_exception_handler
+from app.core.timing import TimedNullPool, TimedQueuePool
+
+URL = make_url('postgresql+psycopg://app@db.internal/bank')
+
+
+def test_queue_pool_is_sized_per_tier():
+    options = engine_options(URL, 'DEDICATED', TimedQueuePool)
+    assert options['poolclass'] is TimedQueuePool
+    assert options['pool_size'] == settings.tenant_pool_size['DEDICATED']
+    assert options['pool_recycle'] == settings.db_pool_recycle_seconds
+    assert 'connect_args' not in options
+
+
+def test_pgbouncer_mode_disables_prepared_statements(monkeypatch):
+    monkeypatch.setattr(settings, 'db_pgbouncer', True)
+    monkeypatch.setattr(settings, 'db_null_pool', True)
+    monkeypatch.setattr(settings, 'db_pool_pre_ping', False)
+    options = engine_options(URL, 'SHARED', TimedQueuePool)
+    assert options == {'pool_pre_ping': False, 'poolclass': TimedNullPool, 'connect_args': {'prepare_threshold': None}}
+
+
+def test_lost_connection_is_a_503():
+    exc = OperationalError('SELECT 1', {}, Exception('server closed the connection'), connection_invalidated=True)
+    response = asyncio.run(http_exception_handler(None, exc))
+    assert response.status_code == 503
+    assert json.loads(response.body)['error']['message'] == 'Database connection lost, retry the request'
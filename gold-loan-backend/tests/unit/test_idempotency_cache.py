@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from app.core.cache import LRUCache
+from app.core import idempotency
+from app.core.idempotency import IdempotencyInProgress, _BloomFilter, _claim
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = _BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f'/loans\x1fkey-{i}' for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f'/loans\x1fother-{i}' in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def _filters(monkeypatch, stored=()):
+    # Fresh per-tenant filters, warmed only when the test runs the queued scans.
+    warms = []
+    monkeypatch.setattr(idempotency.settings, 'idempotency_filter_capacity', 1000)
+    monkeypatch.setattr(idempotency, '_filters', LRUCache(2, 0))
+    monkeypatch.setattr(idempotency, '_stored_keys', lambda tenant_id: stored)
+    monkeypatch.setattr(idempotency, '_warming', SimpleNamespace(submit=lambda fn, *args: warms.append((fn, args))))
+    return lambda: [fn(*args) for fn, args in warms]
+
+
+def test_filters_drop_keys_after_two_retention_periods(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(idempotency.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(idempotency.settings, 'idempotency_retention_hours', 1)
+    warm = _filters(monkeypatch)
+    idempotency._remember('t', '/loans', 'a')
+    warm()
+    now[0] += 3600
+    # Still retained: the record may live up to an hour after it was stored.
+    assert idempotency._might_exist('t', '/loans', 'a')
+    idempotency._remember('t', '/loans', 'b')
+    now[0] += 3600
+    # Compaction may have removed 'a' by now; 'b' may still be live.
+    assert not idempotency._might_exist('t', '/loans', 'a')
+    assert idempotency._might_exist('t', '/loans', 'b')
+    now[0] += 2 * 3600
+    assert not idempotency._might_exist('t', '/loans', 'b')
+
+
+def test_tenant_filter_is_used_once_warmed_and_bounded(monkeypatch):
+    warm = _filters(monkeypatch, stored=[('/loans', 'a')])
+    # Not loaded yet: every lookup goes to the database.
+    assert idempotency._might_exist('t1', '/loans', 'b')
+    warm()
+    assert idempotency._might_exist('t1', '/loans', 'a')
+    assert not idempotency._might_exist('t1', '/loans', 'b')
+
+    idempotency._might_exist('t2', '/loans', 'a')
+    idempotency._might_exist('t3', '/loans', 'a')
+    # Evicted with the third tenant, so t1 is back on the database path until warmed again.
+    assert idempotency._might_exist('t1', '/loans', 'b')
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2, ttl_seconds=60)
+    cache.put(('t', '/loans', 'a'), ('h', '{}'))
+    cache.put(('t', '/loans', 'b'), ('h', '{}'))
+    assert cache.get(('t', '/loans', 'a')) is not None
+    cache.put(('t', '/loans', 'c'), ('h', '{}'))
+    assert cache.get(('t', '/loans', 'b')) is None
+    assert cache.get(('t', '/loans', 'a')) is not None
+
+
+def test_response_cache_expires_entries():
+    cache = LRUCache(maxsize=10, ttl_seconds=-1)
+    cache.put(('t', '/loans', 'a'), ('h', '{}'))
+    assert cache.get(('t', '/loans', 'a')) is None
+
+
+def test_entry_ttl_is_capped_below_the_cache_ttl():
+    cache = LRUCache(maxsize=10, ttl_seconds=60)
+    cache.put(('t', '/loans', 'a'), ('h', '{}'), ttl_seconds=-1)
+    cache.put(('t', '/loans', 'b'), ('h', '{}'), ttl_seconds=3600)
+    assert cache.get(('t', '/loans', 'a')) is None
+    assert cache._items[('t', '/loans', 'b')][0] <= idempotency.time.monotonic() + 60
+
+
+class _FailingSession:
+    def __init__(self, sqlstate):
+        self.error = OperationalError('INSERT', {}, type('PgError', (Exception,), {'sqlstate': sqlstate})())
+
+    def get_bind(self):
+        return create_engine('sqlite://')
+
+    def execute(self, stmt):
+        raise self.error
+
+
+def test_only_a_lock_timeout_means_in_progress():
+    with pytest.raises(IdempotencyInProgress):
+        _claim(_FailingSession('55P03'), None)
+    with pytest.raises(OperationalError):
+        _claim(_FailingSession('08006'), None)
@@ -0,0 +1,22 @@
+from app.core.metrics import Histogram, LabeledCounter
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram('latency_seconds', 'Latency', (0.1, 1.0), ('route',))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.labels('/loans/{loan_id}').observe(value)
+    lines = hist.render()
+    assert 'latency_seconds_bucket{route="/loans/{loan_id}",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/loans/{loan_id}",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{route="/loans/{loan_id}",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{route="/loans/{loan_id}"} 4' in lines
+
+
+def test_labeled_children_are_reused_and_escaped():
+    requests = LabeledCounter('requests_total', 'Requests', ('route', 'status'))
+    assert requests.labels('/a', 200) is requests.labels('/a', 200)
+    requests.labels('/a', 200).inc()
+    requests.labels('say "hi"', 500).inc(2)
+    lines = requests.render()
+    assert 'requests_total{route="/a",status="200"} 1' in lines
+    assert 'requests_total{route="say \\"hi\\"",status="500"} 2' in lines
@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import create_engine, text
+from app.core.migrations import MIGRATIONS_DIR, SchemaOutOfDate, check_version, latest_version, load
+
+
+def test_migrations_load_in_version_order(tmp_path):
+    for name in ['0002_add_index.sql', '0010_later.sql', '0001_baseline.sql', 'README.md', '3_bad.sql']:
+        (tmp_path / name).write_text('SELECT 1;')
+    assert [version for version, _ in load(tmp_path)] == ['0001', '0002', '0010']
+    assert latest_version(tmp_path) == '0010'
+
+
+def test_shipped_migrations_start_at_baseline():
+    versions = [version for version, _ in load(MIGRATIONS_DIR)]
+    assert versions[0] == '0001'
+    assert len(set(versions)) == len(versions)
+
+
+def test_check_version_refuses_a_database_behind_the_build():
+    engine = create_engine('sqlite://')
+    with pytest.raises(SchemaOutOfDate):
+        check_version(engine, '0002')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE schema_migrations (version VARCHAR(20) PRIMARY KEY)'))
+        conn.execute(text("INSERT INTO schema_migrations VALUES ('0001')"))
+    with pytest.raises(SchemaOutOfDate):
+        check_version(engine, '0002')
+    assert check_version(engine, '0001') == '0001'
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO schema_migrations VALUES ('0003')"))
+    assert check_version(engine, '0002') == '0003'
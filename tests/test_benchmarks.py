@@ -0,0 +1,26 @@
+import asyncio
+
+import httpx
+
+from app.main import app
+from benchmarks.lifecycle import regressions, run
+
+
+def test_lifecycle_benchmark_runs_against_sqlite_app():
+    async def bench():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await run(client, "sqlite", lifecycles=4, concurrency=2, jewels=2, retry_rate=0.5)
+
+    result = asyncio.run(bench())
+    assert result["failed_lifecycles"] == 0
+    assert result["endpoints"]["POST /loans/{loan_id}/complete"]["count"] == 4
+    assert result["endpoints"]["POST /images/upload-url"]["count"] >= 12
+    assert any(name.endswith("(retry)") for name in result["endpoints"])
+
+
+def test_regressions_flag_slower_endpoints_and_lower_throughput():
+    baseline = {"lifecycles_per_s": 100.0, "endpoints": {"POST /loans": {"p95_ms": 10.0}}}
+    result = {"lifecycles_per_s": 80.0, "endpoints": {"POST /loans": {"p95_ms": 12.0}, "GET /new": {"p95_ms": 50.0}}}
+    assert len(regressions(result, baseline, 0.10)) == 2
+    assert regressions(result, baseline, 0.25) == []
@@ -0,0 +1,22 @@
+from sqlalchemy import create_engine
+
+from app.migrations import LATEST, migrate
+
+
+def test_unversioned_database_is_upgraded_in_place(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE loan (id VARCHAR PRIMARY KEY, tenant_id VARCHAR, customer_id VARCHAR, appraiser_id VARCHAR, "
+            "bank_id VARCHAR, branch_id VARCHAR, status VARCHAR, created_at DATETIME, completed_at DATETIME)"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO loan VALUES ('0b5e7a4c-1111-4222-8333-944455556666', 't', 'c', 'a', 'b', 'br', 'CREATED', "
+            "'2025-03-01 10:00:00', NULL)"
+        )
+
+    assert migrate(engine) == LATEST
+    assert migrate(engine) == LATEST
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT loan_number FROM loan").scalar() == "GL-20250301-0B5E7A4C1111"
+        assert conn.exec_driver_sql("PRAGMA user_version").scalar() == LATEST